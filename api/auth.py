@@ -2,34 +2,46 @@ from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
 from schemas.auth_schemas import Token, User, UserCreate
-from services.auth import AuthService, get_current_user
+from services.auth import AsyncAuthService, get_current_user, oauth2_scheme
 
 auth_router = APIRouter(prefix="/auth", tags=["Users"])
 
 
 @auth_router.post("/register", response_model=Token)
-def register_user(
+async def register_user(
         auth_data: UserCreate,
-        service: AuthService = Depends()):
+        service: AsyncAuthService = Depends()):
 
     """Регистрация пользователя"""
 
-    return service.registration_user(auth_data)
+    return await service.registration_user(auth_data)
 
 
 @auth_router.post("/login", response_model=Token)
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), service: AuthService = Depends()):
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), service: AsyncAuthService = Depends()):
 
     """Аутентификация пользователя"""
 
-    return service.authenticate_user(
+    return await service.authenticate_user(
         username=form_data.username,
         password=form_data.password
     )
 
 
+@auth_router.post("/logout")
+async def logout_user(
+        token: str = Depends(oauth2_scheme),
+        user: User = Depends(get_current_user),
+        service: AsyncAuthService = Depends()):
+
+    """Выход пользователя: токен отзывается во всех воркерах и удаляется из кеша"""
+
+    await service.revoke_token(token, user.id)
+    return {"message": "Выход выполнен"}
+
+
 @auth_router.get("/user", response_model=User)
-def get_user(user: User = Depends(get_current_user)):
+async def get_user(user: User = Depends(get_current_user)):
     """Получения пользователя по id"""
 
     return user
@@ -0,0 +1,89 @@
+from typing import List
+
+from fastapi import APIRouter, Depends
+
+from models import UserModel
+from schemas.category_schemas import (Category, CategoryCreate, CategoryRule,
+                                      CategoryRuleCreate, RecategorizeResult)
+from services.auth import get_current_user
+from services.categories import AsyncCategoryService
+
+category_router = APIRouter(prefix="/categories", tags=["Categories"])
+
+
+@category_router.get("/", response_model=List[Category])
+async def get_categories(
+        service: AsyncCategoryService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Категории пользователя"""
+
+    return await service.get_categories(user.id)
+
+
+@category_router.post("/", response_model=Category)
+async def create_category(
+        category_data: CategoryCreate,
+        service: AsyncCategoryService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Создание категории"""
+
+    return await service.create_category(category_data, user.id)
+
+
+@category_router.delete("/{category_id}")
+async def delete_category(
+        category_id: int,
+        service: AsyncCategoryService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Удаление категории без записей вместе с ее правилами"""
+
+    await service.delete_category(category_id, user.id)
+    return {"message": f"Категория с id={category_id} удалена"}
+
+
+@category_router.get("/rules", response_model=List[CategoryRule])
+async def get_rules(
+        service: AsyncCategoryService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Правила автокатегоризации в порядке применения"""
+
+    return await service.get_rules(user.id)
+
+
+@category_router.post("/rules", response_model=CategoryRule)
+async def create_rule(
+        rule_data: CategoryRuleCreate,
+        service: AsyncCategoryService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Создание правила: применяется к новым и измененным записям,
+    существующие записи обновляет /categories/recategorize"""
+
+    return await service.create_rule(rule_data, user.id)
+
+
+@category_router.delete("/rules/{rule_id}")
+async def delete_rule(
+        rule_id: int,
+        service: AsyncCategoryService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Удаление правила, категории записей остаются"""
+
+    await service.delete_rule(rule_id, user.id)
+    return {"message": f"Правило с id={rule_id} удалено"}
+
+
+@category_router.post("/recategorize", response_model=RecategorizeResult)
+async def recategorize(
+        service: AsyncCategoryService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Подбор категорий всех записей пользователя по текущим правилам,
+    кроме категорий, указанных вручную"""
+
+    return await service.recategorize(user.id)
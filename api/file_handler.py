@@ -1,38 +1,85 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, File, UploadFile
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, UploadFile, status
 from fastapi.responses import StreamingResponse
 
 from models import UserModel
+from schemas.import_schemas import ExportFormat, ImportJob
+from schemas.record_schemas import OperationType
 from services.auth import get_current_user
-from services.csv_load import FileService
+from services.csv_load import AsyncFileService
+from services.export import MEDIA_TYPES, TEXT_FORMATS
+from services.import_jobs import AsyncImportJobService
 
 file_router = APIRouter(prefix="/file", tags=["CSV-report"])
 
 
-@file_router.post("/dump")
-def dump_csv(
-        back_tasks: BackgroundTasks,
+@file_router.post("/dump", response_model=ImportJob, status_code=status.HTTP_202_ACCEPTED)
+async def dump_csv(
         user: UserModel = Depends(get_current_user),
         file: UploadFile = File(...),
-        service: FileService = Depends()):
+        service: AsyncImportJobService = Depends()):
+
+    """Постановка в очередь задачи добавления записей через CSV-файл"""
+
+    return await service.submit(user.id, file.filename, file.file)
+
+
+@file_router.get("/jobs/{job_id}", response_model=ImportJob)
+async def get_import_job(
+        job_id: int,
+        user: UserModel = Depends(get_current_user),
+        service: AsyncImportJobService = Depends()):
+
+    """Статус задачи импорта"""
+
+    return await service.get(job_id, user.id)
 
-    """Добавление записей через CSV-файл"""
 
-    back_tasks.add_task(service.dump_csv_file,
-                        user.id,
-                        file.file)
+@file_router.get("/jobs/{job_id}/errors")
+async def get_import_errors(
+        job_id: int,
+        user: UserModel = Depends(get_current_user),
+        service: AsyncImportJobService = Depends()):
+
+    """Выгрузка отчета об ошибочных строках задачи импорта в CSV-файл"""
 
-    return {"message": "Успешно добавлено записи"}
+    report = await service.error_report(job_id, user.id)
+    return StreamingResponse(
+        report,
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=import_{job_id}_errors.csv"}
+    )
 
 
 @file_router.get("/load")
-def load_csv(user: UserModel = Depends(get_current_user),
-             service: FileService = Depends()):
+async def load_csv(start: Optional[datetime] = None,
+                   end: Optional[datetime] = None,
+                   type_operation: Optional[OperationType] = None,
+                   format: ExportFormat = ExportFormat.csv,
+                   gzip: bool = False,
+                   user: UserModel = Depends(get_current_user),
+                   service: AsyncFileService = Depends()):
+
+    """Выгрузка записей за полуинтервал [start, end) в CSV, NDJSON, Parquet
+    или Arrow IPC. Текстовые форматы опционально сжимаются gzip, колоночные
+    сжаты zstd всегда"""
 
-    """Выгрузка данных из БД в CSV-файл"""
+    headers = {"Content-Disposition": f"attachment; filename=report.{format.value}"}
+    if gzip and format in TEXT_FORMATS:
+        headers["Content-Encoding"] = "gzip"
 
-    records = service.load_csv_file(user_id=user.id)
+    records = await service.load_file(
+        user_id=user.id,
+        export_format=format,
+        start=start,
+        end=end,
+        type_operation=type_operation,
+        compress=gzip
+    )
     return StreamingResponse(
         records,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=report.csv"}
+        media_type=MEDIA_TYPES[format],
+        headers=headers
     )
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services.metrics import metrics
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Метрики приложения в текстовом формате Prometheus"""
+
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,99 +1,223 @@
+from datetime import date, datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 
 from models import UserModel
-from schemas.record_schemas import (OperationType, Record, RecordCreate,
-                                    RecordUpdate)
+from schemas.record_schemas import (BalanceSummary, BatchOperation,
+                                    BatchResult, OperationType, PeriodRecords,
+                                    Record, RecordChanges, RecordCreate,
+                                    RecordPage, RecordSearch, RecordUpdate)
+from schemas.stats_schemas import Granularity, StatsBucket, StatsGroup
 from services.auth import get_current_user
-from services.operations import OperationService
+from services.operations import AsyncOperationService
+from services.response_cache import response_cache
+from services.serialization import FastJSONResponse
+from services.stats import AsyncStatsService
 
 operation_router = APIRouter(prefix="/operation", tags=["Record"])
 
 
-@operation_router.get("/get_record_by_day")
-def get_records_by_day(
-    service: OperationService = Depends(),
+@operation_router.get("/get_record_by_day", response_model=PeriodRecords)
+async def get_records_by_day(
+    request: Request,
+    service: AsyncOperationService = Depends(),
     user: UserModel = Depends(get_current_user)
 ):
     """Получение записей и общей суммы трат за текущий день"""
 
-    result, total_sum = service.get_by_time(user_id=user.id, by_day=True)
-    return result, {"Общая сумма": total_sum}
+    return await response_cache.respond(
+        request, user.id, service.session, lambda: service.get_by_time(user_id=user.id, by_day=True)
+    )
 
 
-@operation_router.get("/get_record_by_week")
-def get_records_by_week(
-    service: OperationService = Depends(),
+@operation_router.get("/get_record_by_week", response_model=PeriodRecords)
+async def get_records_by_week(
+    request: Request,
+    service: AsyncOperationService = Depends(),
     user: UserModel = Depends(get_current_user)
 ):
     """Получение записей и общей суммы трат за неделю"""
 
-    return service.get_by_time(user_id=user.id, by_week=True)
+    return await response_cache.respond(
+        request, user.id, service.session, lambda: service.get_by_time(user_id=user.id, by_week=True)
+    )
 
 
-@operation_router.get("/get_record_by_month")
-def get_records_by_month(
-    service: OperationService = Depends(),
+@operation_router.get("/get_record_by_month", response_model=PeriodRecords)
+async def get_records_by_month(
+    request: Request,
+    service: AsyncOperationService = Depends(),
     user: UserModel = Depends(get_current_user)
 ):
     """Получение записей и общей суммы трат за месяц"""
 
-    return service.get_by_time(user_id=user.id, by_month=True)
+    return await response_cache.respond(
+        request, user.id, service.session, lambda: service.get_by_time(user_id=user.id, by_month=True)
+    )
 
 
-@operation_router.get("/", response_model=List[Record])
-def get_records(
+@operation_router.get("/get_record_by_period", response_model=PeriodRecords)
+async def get_records_by_period(
+    start: datetime,
+    end: datetime,
+    service: AsyncOperationService = Depends(),
+    user: UserModel = Depends(get_current_user)
+):
+    """Получение записей и общей суммы трат за период [start, end)"""
+
+    return FastJSONResponse(await service.get_by_period(user_id=user.id, start=start, end=end))
+
+
+@operation_router.get("/summary", response_model=BalanceSummary)
+async def get_summary(
+    start: date,
+    end: date,
+    service: AsyncOperationService = Depends(),
+    user: UserModel = Depends(get_current_user)
+):
+    """Итоги доходов и расходов за дни [start, end) по дневным итогам"""
+
+    return await service.get_summary(user_id=user.id, start=start, end=end)
+
+
+@operation_router.get("/search", response_model=RecordSearch)
+async def search_records(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Слова из описания, например: кофе такси"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    type_operation: Optional[OperationType] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    before: Optional[str] = None,
+    service: AsyncOperationService = Depends(),
+    user: UserModel = Depends(get_current_user)
+):
+    """Поиск записей по описанию с фильтром по периоду [start, end) и типу,
+    от новых к старым; before - next_cursor предыдущей страницы"""
+
+    return await response_cache.respond(request, user.id, service.session, lambda: service.search(
+        user_id=user.id,
+        text=q,
+        start=start,
+        end=end,
+        type_operation=type_operation,
+        limit=limit,
+        before=before
+    ))
+
+
+@operation_router.get("/changes", response_model=RecordChanges)
+async def get_changes(
+    since: int = Query(0, ge=0, description="seq из предыдущего ответа, 0 - полная синхронизация"),
+    limit: int = Query(1000, ge=1, le=5000),
+    service: AsyncOperationService = Depends(),
+    user: UserModel = Depends(get_current_user)
+):
+    """Записи, созданные, измененные или удаленные после номера изменения since.
+    Пока has_more, запрос повторяется с since из seq ответа"""
+
+    return FastJSONResponse(await service.get_changes(user_id=user.id, since=since, limit=limit))
+
+
+@operation_router.get("/stats", response_model=List[StatsBucket])
+async def get_stats(
+    granularity: Granularity = Granularity.month,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    type_operation: Optional[OperationType] = None,
+    group_by: Optional[StatsGroup] = None,
+    service: AsyncStatsService = Depends(),
+    user: UserModel = Depends(get_current_user)
+):
+    """Доходы, расходы, сальдо и нарастающий итог по дням/неделям/месяцам/годам"""
+
+    return await service.get_stats(
+        user_id=user.id,
+        granularity=granularity,
+        start=start,
+        end=end,
+        type_operation=type_operation,
+        group_by=group_by
+    )
+
+
+@operation_router.get("/", response_model=RecordPage)
+async def get_records(
+        request: Request,
         type_operation: Optional[OperationType] = None,
-        service: OperationService = Depends(),
+        limit: int = Query(100, ge=1, le=1000),
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        fields: Optional[str] = Query(None, description="Поля через запятую, например amount,created_at"),
+        service: AsyncOperationService = Depends(),
         user: UserModel = Depends(get_current_user)):
 
-    """Получение всех записей из БД пользователя"""
+    """Получение записей пользователя постранично, курсоры after/before
+    берутся из next_cursor/prev_cursor предыдущей страницы"""
 
-    return service.get_records(type_operation=type_operation, user_id=user.id)
+    return await response_cache.respond(request, user.id, service.session, lambda: service.get_records(
+        user_id=user.id,
+        type_operation=type_operation,
+        limit=limit,
+        after=after,
+        before=before,
+        fields=fields.split(",") if fields else None
+    ))
 
 
 @operation_router.post("/", response_model=Record)
-def create_record(
+async def create_record(
         record_data: RecordCreate,
-        service: OperationService = Depends(),
+        service: AsyncOperationService = Depends(),
         user: UserModel = Depends(get_current_user)):
 
     """Создание записи в БД о доходе/расходе"""
 
-    return service.create_record(record_data, user.id)
+    return await service.create_record(record_data, user.id)
+
+
+@operation_router.post("/batch", response_model=List[BatchResult])
+async def batch_records(
+        operations: List[BatchOperation],
+        service: AsyncOperationService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Пакетное создание, обновление и удаление записей в одной транзакции"""
+
+    return await service.batch(operations, user.id)
 
 
-@operation_router.get("/{record_id}")
-def get_record(
+@operation_router.get("/{record_id}", response_model=Record)
+async def get_record(
         record_id: int,
-        service: OperationService = Depends(),
+        service: AsyncOperationService = Depends(),
         user: UserModel = Depends(get_current_user)):
 
     """Получение записи по id"""
 
-    return service.get(record_id, user.id)
+    return await service.get(record_id, user.id)
 
 
 @operation_router.put("/{record_id}/update", response_model=Record)
-def update_record(
+async def update_record(
         record_id: int,
         record_data: RecordUpdate,
-        service: OperationService = Depends(),
+        service: AsyncOperationService = Depends(),
         user: UserModel = Depends(get_current_user)):
 
     """Обновление информации о записи в БД по id"""
 
-    return service.update(record_id, record_data, user.id)
+    return await service.update(record_id, record_data, user.id)
 
 
 @operation_router.delete("/{record_id}/delete")
-def delete_record(
+async def delete_record(
         record_id: int,
-        service: OperationService = Depends(),
+        service: AsyncOperationService = Depends(),
         user: UserModel = Depends(get_current_user)):
 
     """Удаление записи из БД по id"""
 
-    service.delete(record_id, user.id)
+    await service.delete(record_id, user.id)
     return {"meesage": f"Запись с id={record_id} успешно удалена"}
@@ -0,0 +1,54 @@
+from typing import List
+
+from fastapi import APIRouter, Depends
+
+from models import UserModel
+from schemas.recurring_schemas import (MaterializeResult, RecurringRule,
+                                       RecurringRuleCreate)
+from services.auth import get_current_user
+from services.recurring import AsyncRecurringService
+
+recurring_router = APIRouter(prefix="/recurring", tags=["Recurring"])
+
+
+@recurring_router.get("/", response_model=List[RecurringRule])
+async def get_rules(
+        service: AsyncRecurringService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Правила регулярных операций пользователя"""
+
+    return await service.get_rules(user.id)
+
+
+@recurring_router.post("/", response_model=RecurringRule)
+async def create_rule(
+        rule_data: RecurringRuleCreate,
+        service: AsyncRecurringService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Создание правила регулярной операции, записи уже наступивших повторений создаются сразу"""
+
+    return await service.create_rule(rule_data, user.id)
+
+
+@recurring_router.post("/materialize", response_model=MaterializeResult)
+async def materialize_rules(
+        service: AsyncRecurringService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Создание записей наступивших повторений правил пользователя, не дожидаясь планировщика"""
+
+    return await service.materialize(user_id=user.id)
+
+
+@recurring_router.delete("/{rule_id}")
+async def delete_rule(
+        rule_id: int,
+        service: AsyncRecurringService = Depends(),
+        user: UserModel = Depends(get_current_user)):
+
+    """Удаление правила, созданные по нему записи остаются"""
+
+    await service.delete_rule(rule_id, user.id)
+    return {"message": f"Правило с id={rule_id} удалено"}
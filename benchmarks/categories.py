@@ -0,0 +1,141 @@
+"""Автокатегоризация записей при импорте.
+
+Правила: RULES подстрок (названия магазинов), несколько регулярных выражений
+и правил по сумме. Сравнивает проверку каждой строки по всем правилам по
+очереди со скомпилированными правилами (префиксное дерево подстрок + общее
+регулярное выражение) на описаниях, повторяющихся как в выписках, и на
+уникальных описаниях, затем - цену категоризации во вставке create_many_records.
+
+Запуск: python -m benchmarks.categories [строк] [правил]
+"""
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, List, Optional, Tuple
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from benchmarks.datagen import seed  # noqa: E402
+from config import settings  # noqa: E402
+from schemas.category_schemas import CategoryCreate  # noqa: E402
+from schemas.category_schemas import CategoryRuleCreate  # noqa: E402
+from schemas.record_schemas import RecordBase  # noqa: E402
+from services.categories import CategoryMatcher, CategoryService  # noqa: E402
+from services.operations import OperationService  # noqa: E402
+
+REGEXES = (r"(?:uber|yandex)\s*go", r"^перевод\s+\d+", r"аптека\s*№?\s*\d+", r"azs|азс", r"kino\w*")
+INSERT_ROWS = 100_000
+
+
+def make_rules(count: int) -> List[SimpleNamespace]:
+    rules = [SimpleNamespace(id=number + 1, priority=1, category_id=number % 20 + 1, kind="substring",
+                             pattern=f"магазин{number:04}", type_operation=None, amount_min=None, amount_max=None)
+             for number in range(count)]
+    rules += [SimpleNamespace(id=count + number + 1, priority=1, category_id=21, kind="regex", pattern=pattern,
+                              type_operation=None, amount_min=None, amount_max=None)
+              for number, pattern in enumerate(REGEXES)]
+    rules.append(SimpleNamespace(id=len(rules) + 1, priority=0, category_id=22, kind="amount", pattern=None,
+                                 type_operation="expenses", amount_min=Decimal(50_000), amount_max=None))
+    return rules
+
+
+def make_rows(count: int, rules: int, unique: bool) -> List[dict]:
+    generator = random.Random(1)
+    rows = []
+    for number in range(count):
+        # каждая пятая строка не подходит ни под одно правило
+        merchant = f"магазин{generator.randrange(rules):04}" if number % 5 else "перевод другу"
+        suffix = f" чек {number}" if unique else f" {generator.randrange(20)}"
+        rows.append({"description": f"Оплата {merchant}{suffix}",
+                     "amount": Decimal(generator.randrange(1, 100_000)),
+                     "type_operation": "expenses"})
+    return rows
+
+
+def naive_match(rules: List[Any]) -> Callable[[Optional[str], Decimal, str], Optional[int]]:
+    """Каждое правило по очереди, как без компиляции"""
+
+    ordered = sorted(rules, key=lambda rule: (rule.priority, rule.id))
+    compiled = {rule.id: re.compile(rule.pattern, re.IGNORECASE) for rule in ordered if rule.kind == "regex"}
+
+    def match(description: Optional[str], amount: Decimal, type_operation: str) -> Optional[int]:
+        lowered = (description or "").lower()
+        for rule in ordered:
+            if rule.kind == "substring" and rule.pattern not in lowered:
+                continue
+            if rule.kind == "regex" and not compiled[rule.id].search(description or ""):
+                continue
+            if rule.type_operation not in (None, type_operation):
+                continue
+            if (rule.amount_min is not None and amount < rule.amount_min
+                    or rule.amount_max is not None and amount > rule.amount_max):
+                continue
+            return rule.category_id
+        return None
+
+    return match
+
+
+def timed(function: Callable[[], Any]) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    result = function()
+    return time.perf_counter() - started, result
+
+
+def run(count: int, rule_count: int) -> None:
+    settings.slow_query_threshold = float("inf")
+    rules = make_rules(rule_count)
+
+    elapsed, _ = timed(lambda: CategoryMatcher(rules))
+    print(f"compile {len(rules)} rules: {elapsed * 1000:.1f} ms")
+
+    for unique in (False, True):
+        rows = make_rows(count, rule_count, unique)
+        matcher = CategoryMatcher(rules)
+        naive = naive_match(rules)
+        label = "unique descriptions" if unique else "repeated descriptions"
+        results = []
+        for name, match in (("rule by rule", naive), ("compiled", matcher.match)):
+            # без компиляции строк столько же, сколько до 10 секунд работы
+            sample = rows if name == "compiled" else rows[:min(count, 50_000)]
+            elapsed, found = timed(lambda: [match(row["description"], row["amount"], row["type_operation"])
+                                            for row in sample])
+            results.append(found)
+            print(f"{label:>22} {name:>13}: {len(sample) / elapsed:12,.0f} rows/s")
+        assert results[0] == results[1][:len(results[0])]
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        user_ids = seed(engine, users=2, records=0)
+        records = [RecordBase(**row) for row in make_rows(INSERT_ROWS, rule_count, unique=False)]
+
+        with Session(engine) as session:
+            categories = CategoryService(session)
+            owner = user_ids[0]
+            for number in range(22):
+                categories.create_category(CategoryCreate(name=f"категория {number}"), owner)
+            for rule in rules:
+                categories.create_rule(CategoryRuleCreate(
+                    category_id=rule.category_id, kind=rule.kind, pattern=rule.pattern,
+                    type_operation=rule.type_operation, amount_min=rule.amount_min, priority=rule.priority
+                ), owner)
+
+            service = OperationService(session)
+            for name, user_id in (("without rules", user_ids[1]), ("with rules", owner)):
+                elapsed, inserted = timed(lambda: sum(
+                    service.create_many_records(records[start:start + settings.import_batch_size], user_id)
+                    for start in range(0, len(records), settings.import_batch_size)
+                ))
+                print(f"create_many_records {name:>13}: {inserted / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000, int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -0,0 +1,81 @@
+"""Потребление памяти и скорость потоковой выгрузки CSV.
+
+Запуск: python -m benchmarks.csv_export 5000000
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from migrations import migrate  # noqa: E402
+from models import RecordModel  # noqa: E402
+from services.csv_load import FileService  # noqa: E402
+from services.operations import OperationService  # noqa: E402
+
+BATCH_SIZE = 50_000
+
+
+def rss_mb() -> float:
+    """Текущий RSS процесса в мегабайтах"""
+
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+    return 0.0
+
+
+def seed(session: Session, rows: int) -> None:
+    """Записи одного пользователя с шагом в минуту"""
+
+    start = datetime.datetime(2020, 1, 1)
+    for offset in range(0, rows, BATCH_SIZE):
+        session.execute(RecordModel.__table__.insert(), [
+            {
+                "created_at": start + datetime.timedelta(minutes=number),
+                "amount": number % 10_000 / 100,
+                "type_operation": "income" if number % 3 == 0 else "expenses",
+                "description": f"record {number}",
+                "user_id": 1,
+            }
+            for number in range(offset, min(offset + BATCH_SIZE, rows))
+        ])
+        session.commit()
+
+
+def run(rows: int) -> None:
+    """Выгрузка rows записей с замером RSS на каждом фрагменте"""
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        migrate(engine)
+
+        with Session(engine) as session:
+            seed(session, rows)
+
+            service = FileService(OperationService(session))
+            for compress in (False, True):
+                baseline = peak = rss_mb()
+                size = 0
+                started = time.perf_counter()
+                for chunk in service.load_csv_file(user_id=1, compress=compress):
+                    size += len(chunk)
+                    peak = max(peak, rss_mb())
+                elapsed = time.perf_counter() - started
+
+                print(f"{rows} rows gzip={compress}: {elapsed:.1f} s, {rows / elapsed:,.0f} rows/s, "
+                      f"{size / 2 ** 20:.1f} MB, RSS {baseline:.1f} -> peak {peak:.1f} MB")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    for size in map(int, sys.argv[1:] or (5_000_000,)):
+        run(size)
@@ -0,0 +1,108 @@
+"""Итоги в базовой валюте по записям в нескольких валютах.
+
+Сравнивает пересчет каждой записи в Python по курсам из словаря с пересчетом
+в SQL: по записям (суммы по дням и валютам, затем курс) и по дневным итогам.
+
+Запуск: python -m benchmarks.currency [записей]
+"""
+import bisect
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from io import StringIO
+from typing import Any, Callable, Dict, List, Tuple
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from benchmarks.datagen import seed  # noqa: E402
+from config import settings  # noqa: E402
+from models import RecordModel  # noqa: E402
+from schemas.record_schemas import OperationType  # noqa: E402
+from services.currency import CurrencyService, to_cents  # noqa: E402
+from services.operations import OperationService  # noqa: E402
+from services.stats import StatsService  # noqa: E402
+
+CURRENCIES = {"USD": 90.0, "EUR": 100.0, "CNY": 12.5}
+DAYS = 365
+
+
+def rates_csv(start: datetime.date) -> str:
+    """Курсы по рабочим дням: выходные берут курс пятницы"""
+
+    generator = random.Random(1)
+    lines = ["date,currency,rate"]
+    for offset in range(DAYS + 1):
+        day = start + datetime.timedelta(days=offset)
+        if day.weekday() < 5:
+            lines.extend(f"{day},{currency},{rate * generator.uniform(0.9, 1.1):.4f}"
+                         for currency, rate in CURRENCIES.items())
+
+    return "\n".join(lines) + "\n"
+
+
+def timed(function: Callable[[], Any]) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    result = function()
+    return time.perf_counter() - started, result
+
+
+def run(records: int) -> None:
+    settings.slow_query_threshold = float("inf")
+    today = datetime.date.today()
+    start = today - datetime.timedelta(days=DAYS + 7)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        [user_id] = seed(engine, users=1, records=records, days=DAYS,
+                         currencies=[settings.base_currency, *CURRENCIES])
+
+        with Session(engine) as session:
+            CurrencyService(session).load_rates(StringIO(rates_csv(start)))
+
+            def per_record() -> Decimal:
+                # курсы в памяти по датам, но поиск курса и сложение - на каждую запись
+                table: Dict[str, Tuple[List[datetime.date], List[Decimal]]] = {}
+                for currency, day, rate in session.execute("SELECT currency, date, rate FROM exchange_rates "
+                                                           "ORDER BY currency, date"):
+                    days, values = table.setdefault(currency, ([], []))
+                    days.append(datetime.date.fromisoformat(day))
+                    values.append(Decimal(str(rate)))
+
+                total = Decimal(0)
+                rows = session.execute(
+                    select(RecordModel.created_at, RecordModel.amount, RecordModel.currency,
+                           RecordModel.type_operation).where(RecordModel.user_id == user_id)
+                )
+                for created_at, amount, currency, type_operation in rows:
+                    rate = Decimal(1)
+                    if currency != settings.base_currency:
+                        days, values = table[currency]
+                        rate = values[bisect.bisect_right(days, created_at.date()) - 1]
+                    total += amount * rate if type_operation == OperationType.income.value else -amount * rate
+
+                return to_cents(total)
+
+            service = OperationService(session)
+            # конец периода не в полночь - итог считается по записям
+            now = datetime.datetime.now()
+            by_records = (lambda: service._calculate_sum(user_id, datetime.datetime.combine(start, datetime.time()),
+                                                         now + datetime.timedelta(days=1)))
+            by_balances = (lambda: service.get_summary(user_id, start, today + datetime.timedelta(days=1)).total)
+            stats = (lambda: sum(bucket.net for bucket in StatsService(session).get_stats(
+                user_id, type_operation=OperationType.outcome)))
+
+            for name, total in (("per-record python", per_record), ("sql over records", by_records),
+                                ("sql over daily_balances", by_balances), ("stats by month, expenses", stats)):
+                elapsed, value = timed(total)
+                print(f"{name:>24}: {elapsed * 1000:9.1f} ms, total {value}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
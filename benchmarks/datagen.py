@@ -0,0 +1,95 @@
+"""Генератор тестовых данных: N пользователей по M записей.
+
+Запуск: python -m benchmarks.datagen sqlite:///bench.db 10 100000
+"""
+import datetime
+import os
+import random
+import sys
+from typing import List, Optional, Sequence
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from passlib.hash import bcrypt  # noqa: E402
+from sqlalchemy import update  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from config import settings  # noqa: E402
+from migrations import migrate  # noqa: E402
+from models import RecordModel, UserModel  # noqa: E402
+from services.balances import BalanceService  # noqa: E402
+
+PASSWORD = "bench"
+BATCH_SIZE = 50_000
+DESCRIPTIONS = ("продукты", "кафе", "зарплата", "такси", "аренда", "подарок", None)
+
+
+def username(number: int) -> str:
+    return f"bench{number}"
+
+
+def seed(engine: Engine,
+         users: int,
+         records: int,
+         days: int = 365,
+         seed_value: int = 0,
+         currencies: Sequence[str] = (),
+         descriptions: Sequence[Optional[str]] = DESCRIPTIONS) -> List[int]:
+
+    """Создает схему, users пользователей с паролем PASSWORD и по records записей
+    у каждого за последние days дней с номерами изменений 1..records
+    (в случайной из currencies или в базовой валюте, с описанием из descriptions),
+    пересчитывает дневные итоги.
+    Возвращает id пользователей"""
+
+    migrate(engine)
+    generator = random.Random(seed_value)
+    # один хеш на всех: bcrypt для каждого пользователя занял бы минуты
+    hash_password = bcrypt.using(rounds=4).hash(PASSWORD)
+    end = datetime.datetime.now().replace(microsecond=0)
+    span = days * 24 * 60 * 60
+
+    with Session(engine) as session:
+        first = session.query(UserModel).count()
+        session.execute(UserModel.__table__.insert(), [
+            {"email": f"{username(number)}@example.com", "username": username(number),
+             "hash_password": hash_password}
+            for number in range(first, first + users)
+        ])
+        user_ids = [user_id for user_id, in session.query(UserModel.id).order_by(UserModel.id).offset(first)]
+
+        rows = []
+        for user_id in user_ids:
+            for change_seq in range(1, records + 1):
+                rows.append({
+                    "created_at": end - datetime.timedelta(seconds=generator.randrange(span)),
+                    "amount": round(generator.uniform(1, 5000), 2),
+                    "type_operation": "income" if generator.random() < 0.2 else "expenses",
+                    "description": generator.choice(descriptions),
+                    "user_id": user_id,
+                    "change_seq": change_seq,
+                    "currency": generator.choice(currencies) if currencies else settings.base_currency,
+                })
+                if len(rows) >= BATCH_SIZE:
+                    session.execute(RecordModel.__table__.insert(), rows)
+                    rows = []
+        if rows:
+            session.execute(RecordModel.__table__.insert(), rows)
+
+        session.execute(
+            update(UserModel.__table__).where(UserModel.id.in_(user_ids)).values(change_seq=records)
+        )
+        for user_id in user_ids:
+            BalanceService(session).rebuild(user_id)
+        session.commit()
+
+    return user_ids
+
+
+if __name__ == "__main__":
+    from db_config import create_db_engine  # noqa: E402
+
+    url, user_count, record_count = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    created = seed(create_db_engine(url), user_count, record_count)
+    print(f"{len(created)} users x {record_count} records -> {url}")
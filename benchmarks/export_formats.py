@@ -0,0 +1,89 @@
+"""Выгрузка записей в CSV, NDJSON, Parquet и Arrow: время, размер файла и
+время обратного чтения всего файла (как ночная загрузка в аналитику).
+
+CSV читается csv.reader с приведением суммы и даты, как его разбирают сейчас,
+NDJSON - orjson построчно, колоночные форматы - pyarrow.
+
+Запуск: python -m benchmarks.export_formats [записей]
+"""
+import csv
+import datetime
+import gzip
+import io
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from typing import Any, Callable, Tuple
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+import orjson  # noqa: E402
+import pyarrow as pa  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from benchmarks.datagen import seed  # noqa: E402
+from config import settings  # noqa: E402
+from schemas.import_schemas import ExportFormat  # noqa: E402
+from services.csv_load import FileService  # noqa: E402
+from services.operations import OperationService  # noqa: E402
+
+
+def read_csv(data: bytes) -> int:
+    rows = 0
+    reader = csv.reader(io.StringIO(data.decode()))
+    next(reader)
+    for row in reader:
+        datetime.datetime.fromisoformat(row[0])
+        Decimal(row[1])
+        rows += 1
+    return rows
+
+
+def read_ndjson(data: bytes) -> int:
+    return sum(1 for line in data.splitlines() if orjson.loads(line))
+
+
+READERS = {
+    ExportFormat.csv: read_csv,
+    ExportFormat.ndjson: read_ndjson,
+    ExportFormat.parquet: lambda data: pq.read_table(io.BytesIO(data)).num_rows,
+    ExportFormat.arrow: lambda data: pa.ipc.open_file(io.BytesIO(data)).read_all().num_rows,
+}
+
+
+def timed(function: Callable[[], Any]) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    result = function()
+    return time.perf_counter() - started, result
+
+
+def run(records: int) -> None:
+    settings.slow_query_threshold = float("inf")
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        [user_id] = seed(engine, users=1, records=records)
+
+        with Session(engine) as session:
+            service = FileService(OperationService(session))
+            for export_format in ExportFormat:
+                for compress in (False, True) if export_format in (ExportFormat.csv, ExportFormat.ndjson) else (False,):
+                    elapsed, data = timed(lambda: b"".join(
+                        chunk.encode() if isinstance(chunk, str) else chunk
+                        for chunk in service.load_file(user_id, export_format, compress=compress)
+                    ))
+                    raw = gzip.decompress(data) if compress else data
+                    read, rows = timed(lambda: READERS[export_format](raw))
+                    assert rows == records, (export_format, rows)
+
+                    name = export_format.value + (" gzip" if compress else "")
+                    print(f"{name:>12}: export {elapsed:6.2f} s ({records / elapsed:9,.0f} rows/s), "
+                          f"{len(data) / 2 ** 20:7.1f} MiB, read back {read:6.2f} s")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,143 @@
+"""Нагрузочный тест синхронного и асинхронного режима работы с БД.
+
+Поднимает uvicorn с async_database=false/true на временной БД и
+держит 1, 100 и 1000 одновременных keep-alive клиентов на
+GET /operation/get_record_by_month.
+
+Запуск: python -m benchmarks.load_async [секунд на замер]
+"""
+import asyncio
+import datetime
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import List
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import create_engine  # noqa: E402
+
+from migrations import migrate  # noqa: E402
+from models import RecordModel  # noqa: E402
+
+CONCURRENCY = (1, 100, 1000)
+PATH = "/operation/get_record_by_month"
+RECORDS = 200
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database: str, port: int, async_database: bool) -> subprocess.Popen:
+    """Запускает uvicorn и ждет, пока он начнет принимать соединения"""
+
+    env = dict(
+        os.environ,
+        JWT_SECRET="benchmark",
+        DATABASE_URL=f"sqlite:///{database}",
+        ASYNC_DATABASE=str(async_database).lower(),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "error"],
+        env=env
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+
+    server.kill()
+    raise RuntimeError("uvicorn не запустился")
+
+
+def register(port: int) -> str:
+    """Регистрирует пользователя и возвращает его токен"""
+
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/auth/register",
+        data=json.dumps({"email": "bench@example.com", "username": "bench", "password": "bench"}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["access_token"]
+
+
+async def client(port: int, token: str, deadline: float, latencies: List[float], errors: List[int]) -> None:
+    """Keep-alive клиент, шлющий запросы до истечения deadline"""
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = (f"GET {PATH} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n\r\n").encode()
+
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = next(int(line.split(b":")[1]) for line in head.split(b"\r\n")
+                      if line.lower().startswith(b"content-length"))
+        await reader.readexactly(length)
+
+        latencies.append(time.perf_counter() - started)
+        if not head.startswith(b"HTTP/1.1 200"):
+            errors.append(1)
+
+    writer.close()
+
+
+async def load(port: int, token: str, clients: int, seconds: float) -> str:
+    """Замер задержек и пропускной способности при clients клиентах"""
+
+    latencies: List[float] = []
+    errors: List[int] = []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, token, started + seconds, latencies, errors) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return (f"clients={clients:<5} rps={len(latencies) / elapsed:8.1f} "
+            f"p50={quantiles[49] * 1000:8.1f} ms p99={quantiles[98] * 1000:8.1f} ms errors={len(errors)}")
+
+
+def run(async_database: bool, seconds: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{database}")
+        migrate(engine)
+
+        port = free_port()
+        server = start_server(database, port, async_database)
+        try:
+            token = register(port)
+            now = datetime.datetime.now()
+            with engine.begin() as connection:
+                connection.execute(RecordModel.__table__.insert(), [
+                    {"created_at": now - datetime.timedelta(hours=number), "amount": number,
+                     "type_operation": "income", "description": "bench", "user_id": 1}
+                    for number in range(RECORDS)
+                ])
+
+            print(f"async_database={async_database}")
+            for clients in CONCURRENCY:
+                print("  " + asyncio.run(load(port, token, clients, seconds)))
+        finally:
+            server.terminate()
+            server.wait()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    for mode in (False, True):
+        run(mode, duration)
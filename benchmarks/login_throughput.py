@@ -0,0 +1,58 @@
+"""Пропускная способность проверки паролей при логине в зависимости от
+числа процессов пула bcrypt и задержка цикла событий во время нагрузки.
+
+Запуск: python -m benchmarks.login_throughput [процессы ...]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from config import settings  # noqa: E402
+from services.hashing import PasswordHasher  # noqa: E402
+
+CLIENTS = 32
+SECONDS = 10.0
+
+
+async def measure_lag(stop: asyncio.Event) -> float:
+    """Максимальная задержка пробуждения цикла событий, мс"""
+
+    lag = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lag = max(lag, time.perf_counter() - started - 0.01)
+
+    return lag * 1000
+
+
+async def run(workers: int) -> None:
+    hasher = PasswordHasher(workers=workers, queue_size=CLIENTS, rounds=settings.bcrypt_rounds)
+    hash_password = hasher.hash("benchmark")
+    logins = 0
+
+    async def client(deadline: float) -> None:
+        nonlocal logins
+        while time.perf_counter() < deadline:
+            await hasher.verify_async("benchmark", hash_password)
+            logins += 1
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(client(started + SECONDS) for _ in range(CLIENTS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+
+    print(f"workers={workers:<3} rounds={settings.bcrypt_rounds} logins/s={logins / elapsed:7.1f} "
+          f"max loop lag={await lag:6.1f} ms")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    counts = sys.argv[1:] or sorted({1, 2, 4, os.cpu_count() or 1})
+    for count in map(int, counts):
+        asyncio.run(run(count))
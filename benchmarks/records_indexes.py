@@ -0,0 +1,117 @@
+"""Планы запросов и задержки выборок по records до и после миграции индексов.
+
+Запуск: python -m benchmarks.records_indexes 10000 1000000 10000000
+"""
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from migrations import migrate  # noqa: E402
+from models import Base, RecordModel  # noqa: E402
+
+USERS = 100
+REPEATS = 20
+BATCH_SIZE = 50_000
+
+QUERIES = {
+    "period": (
+        "SELECT * FROM records WHERE user_id = :user_id "
+        "AND created_at >= :start AND created_at < :end ORDER BY created_at, id"
+    ),
+    "period_sum": (
+        "SELECT coalesce(sum(CASE WHEN type_operation = 'income' THEN amount "
+        "WHEN type_operation = 'expenses' THEN -amount ELSE 0 END), 0) "
+        "FROM records WHERE user_id = :user_id AND created_at >= :start AND created_at < :end"
+    ),
+    "by_type": (
+        "SELECT * FROM records WHERE user_id = :user_id AND type_operation = :type_operation"
+    ),
+}
+
+
+def seed(engine: Engine, rows: int) -> None:
+    """Заполняет таблицу записями USERS пользователей за последние ~3 года"""
+
+    now = datetime.datetime.now()
+    with engine.begin() as connection:
+        for offset in range(0, rows, BATCH_SIZE):
+            batch = [
+                {
+                    "created_at": now - datetime.timedelta(minutes=random.randrange(3 * 365 * 24 * 60)),
+                    "amount": random.randrange(1, 100_000) / 100,
+                    "type_operation": random.choice(("income", "expenses")),
+                    "description": "bench",
+                    "user_id": random.randrange(1, USERS + 1),
+                }
+                for _ in range(min(BATCH_SIZE, rows - offset))
+            ]
+            connection.execute(RecordModel.__table__.insert(), batch)
+
+
+def measure(engine: Engine, sql: str, params: dict) -> float:
+    """Медианное время выполнения запроса в миллисекундах"""
+
+    timings: List[float] = []
+    with engine.connect() as connection:
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            connection.execute(text(sql), params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+
+    return statistics.median(timings)
+
+
+def report(engine: Engine, title: str) -> None:
+    """Печатает план и задержку каждого запроса"""
+
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    params = {
+        "user_id": USERS // 2,
+        "start": today - datetime.timedelta(days=30),
+        "end": today + datetime.timedelta(days=1),
+        "type_operation": "income",
+    }
+
+    print(f"  [{title}]")
+    for name, sql in QUERIES.items():
+        with engine.connect() as connection:
+            plan = connection.execute(text("EXPLAIN QUERY PLAN " + sql), params).fetchall()
+        print(f"    {name:<11} {measure(engine, sql, params):10.3f} ms  "
+              + "; ".join(row[-1] for row in plan))
+
+
+def run(rows: int) -> None:
+    """Замер на временной БД из rows записей без индексов и после миграции"""
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            for index in RecordModel.__table__.indexes:
+                index.drop(connection)
+
+        started = time.perf_counter()
+        seed(engine, rows)
+        print(f"{rows} rows, seeded in {time.perf_counter() - started:.1f} s")
+
+        report(engine, "без индексов")
+        started = time.perf_counter()
+        migrate(engine)
+        print(f"  миграция: {time.perf_counter() - started:.1f} s")
+        report(engine, "после миграции")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    for size in map(int, sys.argv[1:] or (10_000, 1_000_000, 10_000_000)):
+        run(size)
@@ -0,0 +1,92 @@
+"""Материализация регулярных операций после простоя.
+
+Создает N правил (по умолчанию 100 000) у 1000 пользователей с началом в
+последние 90 дней, догоняет все повторения одним проходом планировщика и
+сравнивает с созданием записей по одной через OperationService.create_record.
+
+Запуск: python -m benchmarks.recurring [правил]
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from benchmarks.datagen import seed  # noqa: E402
+from config import settings  # noqa: E402
+from db_config import create_db_engine  # noqa: E402
+from models import RecordModel, RecurringRuleModel  # noqa: E402
+from schemas.record_schemas import RecordCreate  # noqa: E402
+from schemas.recurring_schemas import Frequency  # noqa: E402
+from services.operations import OperationService  # noqa: E402
+from services.recurring import RecurringService  # noqa: E402
+
+USERS = 1000
+NAIVE_SAMPLE = 2000
+
+
+def create_rules(session: Session, user_ids: list, rules: int, now: datetime.datetime) -> None:
+    generator = random.Random(0)
+    frequencies = [Frequency.monthly.value] * 6 + [Frequency.weekly.value] * 3 + [Frequency.daily.value]
+    session.execute(RecurringRuleModel.__table__.insert(), [
+        {
+            "user_id": user_ids[number % len(user_ids)],
+            "amount": round(generator.uniform(1, 5000), 2),
+            "type_operation": "expenses",
+            "description": f"rule {number}",
+            "frequency": generator.choice(frequencies),
+            "interval": 1,
+            "start_at": start,
+            "next_run_at": start,
+        }
+        for number, start in ((number, now - datetime.timedelta(minutes=generator.randrange(90 * 24 * 60)))
+                              for number in range(rules))
+    ])
+    session.commit()
+
+
+def run(rules: int) -> None:
+    # пакетные запросы на 100 000 правил заведомо дольше порога журнала медленных запросов
+    settings.slow_query_threshold = float("inf")
+    now = datetime.datetime.now().replace(microsecond=0)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        user_ids = seed(engine, users=USERS, records=0)
+
+        with Session(engine) as session:
+            create_rules(session, user_ids, rules, now)
+
+            service = RecurringService(session)
+            started = time.perf_counter()
+            result = service.materialize(now=now)
+            elapsed = time.perf_counter() - started
+            stored = session.scalar(select(func.count()).select_from(RecordModel))
+            print(f"batched:  {result.rules} rules, {result.records} records in {elapsed:.1f} s "
+                  f"({result.rules / elapsed:,.0f} rules/s, {result.records / elapsed:,.0f} records/s), "
+                  f"stored {stored}")
+
+            started = time.perf_counter()
+            repeated = service.materialize(now=now)
+            print(f"repeat:   {repeated.rules} rules, {repeated.records} records in "
+                  f"{time.perf_counter() - started:.2f} s")
+
+            operations = OperationService(session)
+            record = RecordCreate(created_at=now, amount=10, type_operation="expenses", description="naive")
+            started = time.perf_counter()
+            for number in range(NAIVE_SAMPLE):
+                operations.create_record(record, user_ids[number % len(user_ids)])
+            per_record = (time.perf_counter() - started) / NAIVE_SAMPLE
+            print(f"one by one: {1 / per_record:,.0f} records/s, "
+                  f"{result.records} records would take {result.records * per_record:.1f} s")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,88 @@
+"""Поиск по описаниям записей: FTS5 против LIKE '%...%' на SQLite.
+
+Один пользователь с N записями; описания - категория из CATEGORIES и один из
+MERCHANTS магазинов, поэтому запросы различаются селективностью: категория
+встречается примерно в 5% записей, магазин - в 0.05%, пара - в 0.0025%.
+Для каждого запроса - первая страница (50 записей от новых к старым, как
+GET /operation/search) и подсчет всех совпадений.
+
+Запуск: python -m benchmarks.search [записей]
+"""
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Tuple
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import and_, create_engine, func  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.sql import ColumnElement  # noqa: E402
+
+from benchmarks.datagen import seed  # noqa: E402
+from config import settings  # noqa: E402
+from models import RecordModel  # noqa: E402
+from schemas.record_schemas import RecordBase  # noqa: E402
+from services.operations import OperationService  # noqa: E402
+from services.search import (description_like, search_condition,  # noqa: E402
+                             search_terms)
+
+CATEGORIES = ("кофе", "такси", "продукты", "аптека", "кино", "ресторан", "бензин", "книги", "спорт", "связь",
+              "одежда", "обувь", "подарки", "ремонт", "мебель", "техника", "игрушки", "цветы", "парковка", "музей")
+MERCHANTS = tuple(f"магазин{number:04}" for number in range(2000))
+DESCRIPTIONS = tuple(f"{category} {merchant}" for category in CATEGORIES for merchant in MERCHANTS)
+QUERIES = ("кофе", "магазин0042", "кофе магазин0042", "нетакого")
+PAGE = 50
+REPEAT = 5
+
+
+def best_of(function: Callable[[], Any]) -> Tuple[float, Any]:
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+
+    return best, result
+
+
+def run(records: int) -> None:
+    settings.slow_query_threshold = float("inf")
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        started = time.perf_counter()
+        [user_id] = seed(engine, users=1, records=records, descriptions=DESCRIPTIONS)
+        print(f"seeded {records} records with search index in {time.perf_counter() - started:.1f} s")
+
+        with Session(engine) as session:
+            def page(condition: Callable[[], ColumnElement]) -> int:
+                return len(session.query(RecordModel.id).filter(condition())
+                           .order_by(RecordModel.created_at.desc(), RecordModel.id.desc()).limit(PAGE).all())
+
+            def count(condition: Callable[[], ColumnElement]) -> int:
+                return session.query(func.count(RecordModel.id)).filter(condition()).scalar()
+
+            for text in QUERIES:
+                # условие FTS5 строится на каждый запрос: в него входит проверка числа совпадений
+                fts = (lambda: search_condition(session, text, user_id))
+                like = (lambda: and_(RecordModel.user_id == user_id, description_like(search_terms(text))))
+                for name, condition in (("fts5", fts), ("like", like)):
+                    page_time, found = best_of(lambda: page(condition))
+                    count_time, total = best_of(lambda: count(condition))
+                    print(f"{text:>18} {name}: page of {found:2} {page_time * 1000:8.2f} ms, "
+                          f"count {total:6} {count_time * 1000:8.2f} ms")
+
+            # цена синхронизации индекса триггерами при пакетной вставке
+            rows = [RecordBase(amount=1, type_operation="expenses", description=DESCRIPTIONS[number])
+                    for number in range(10_000)]
+            service = OperationService(session)
+            elapsed, _ = best_of(lambda: service.create_many_records(rows, user_id))
+            session.execute("DROP TRIGGER records_fts_insert")
+            plain, _ = best_of(lambda: service.create_many_records(rows, user_id))
+            print(f"insert 10000 records: {elapsed * 1000:.1f} ms with index triggers, {plain * 1000:.1f} ms without")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
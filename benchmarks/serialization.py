@@ -0,0 +1,86 @@
+"""Время выборки и сериализации записей за период в расчете на 10 000 записей.
+
+Сравнивает прежний путь (ORM-объекты -> jsonable_encoder -> json), путь через
+Record.from_orm и текущий (кортежи Core -> orjson).
+
+Запуск: python -m benchmarks.serialization [записей]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Tuple
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from benchmarks.datagen import seed  # noqa: E402
+from models import RecordModel  # noqa: E402
+from schemas.record_schemas import Record  # noqa: E402
+from services.operations import OperationService  # noqa: E402
+from services.serialization import dumps  # noqa: E402
+
+REPEAT = 5
+
+
+def best_of(function: Callable[[], Any]) -> Tuple[float, Any]:
+    """Лучшее время из REPEAT запусков и результат последнего"""
+
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+
+    return best, result
+
+
+def run(records: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        [user_id] = seed(engine, users=1, records=records, days=30)
+        end = datetime.datetime.combine(datetime.date.today(), datetime.time()) + datetime.timedelta(days=1)
+        start = end - datetime.timedelta(days=31)
+
+        with Session(engine) as session:
+            service = OperationService(session)
+
+            def orm_rows():
+                session.expunge_all()
+                return (session.query(RecordModel)
+                        .filter(RecordModel.user_id == user_id, RecordModel.created_at >= start,
+                                RecordModel.created_at < end)
+                        .order_by(RecordModel.created_at, RecordModel.id).all())
+
+            paths = {
+                "orm + jsonable_encoder": (
+                    orm_rows,
+                    lambda rows: JSONResponse(jsonable_encoder((rows, 0))).body,
+                ),
+                "orm + from_orm + jsonable_encoder": (
+                    orm_rows,
+                    lambda rows: JSONResponse(jsonable_encoder([Record.from_orm(row) for row in rows])).body,
+                ),
+                "core tuples + orjson": (
+                    lambda: service.get_by_period(user_id=user_id, start=start, end=end),
+                    dumps,
+                ),
+            }
+
+            scale = 10_000 / records
+            for name, (fetch, encode) in paths.items():
+                fetched, rows = best_of(fetch)
+                encoded, body = best_of(lambda: encode(rows))
+                print(f"{name:34} fetch {fetched * scale * 1000:8.1f} ms  encode {encoded * scale * 1000:8.1f} ms  "
+                      f"total {(fetched + encoded) * scale * 1000:8.1f} ms per 10k  ({len(body) / 2 ** 20:.1f} MB)")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,107 @@
+"""Смешанная нагрузка читателей и писателей на SQLite: настройки по
+умолчанию (rollback journal, NullPool) против профиля из настроек
+(WAL, synchronous=NORMAL, mmap, cache_size, busy_timeout, пул).
+
+Запуск: python -m benchmarks.sqlite_concurrency [читателей] [писателей] [секунд]
+"""
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, List
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from db_config import create_db_engine  # noqa: E402
+from migrations import migrate  # noqa: E402
+from models import RecordModel  # noqa: E402
+
+ROWS = 100_000
+USERS = 100
+
+READ = text(
+    "SELECT * FROM records WHERE user_id = :user_id AND created_at >= :start AND created_at < :end"
+)
+
+
+def seed(engine: Engine) -> None:
+    now = datetime.datetime.now()
+    with engine.begin() as connection:
+        connection.execute(RecordModel.__table__.insert(), [
+            {"created_at": now - datetime.timedelta(minutes=random.randrange(365 * 24 * 60)),
+             "amount": random.randrange(1, 10_000) / 100, "type_operation": "income",
+             "description": "bench", "user_id": random.randrange(1, USERS + 1)}
+            for _ in range(ROWS)
+        ])
+
+
+def worker(operation: Callable[[], None], deadline: float, latencies: List[float], errors: List[int]) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            operation()
+        except OperationalError:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def run(title: str, make_engine: Callable[[str], Engine], readers: int, writers: int, seconds: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = make_engine(url)
+        migrate(engine)
+        seed(engine)
+
+        today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+
+        def read() -> None:
+            with engine.connect() as connection:
+                connection.execute(READ, {
+                    "user_id": random.randrange(1, USERS + 1),
+                    "start": today - datetime.timedelta(days=30),
+                    "end": today + datetime.timedelta(days=1),
+                }).fetchall()
+
+        def write() -> None:
+            with engine.begin() as connection:
+                connection.execute(RecordModel.__table__.insert(), {
+                    "created_at": datetime.datetime.now(), "amount": 1, "type_operation": "expenses",
+                    "description": "bench", "user_id": random.randrange(1, USERS + 1),
+                })
+
+        reads: List[float] = []
+        writes: List[float] = []
+        errors: List[int] = []
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=worker, args=(read, deadline, reads, errors)) for _ in range(readers)]
+        threads += [threading.Thread(target=worker, args=(write, deadline, writes, errors)) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        def p99(values: List[float]) -> float:
+            return statistics.quantiles(values, n=100)[98] * 1000 if len(values) > 1 else 0.0
+
+        print(f"{title:<8} reads/s={len(reads) / seconds:8.1f} p99={p99(reads):7.1f} ms  "
+              f"writes/s={len(writes) / seconds:7.1f} p99={p99(writes):7.1f} ms  locked={len(errors)}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+
+    run("default", lambda url: create_engine(url, connect_args={"check_same_thread": False}),
+        readers, writers, seconds)
+    run("profile", create_db_engine, readers, writers, seconds)
@@ -0,0 +1,317 @@
+"""Набор бенчмарков API: микробенчмарки сервисов и нагрузочный тест HTTP.
+
+Данные генерируются benchmarks.datagen во временной БД (или в BENCH_DATABASE_URL),
+HTTP-нагрузка подается в процессе через ASGI-транспорт httpx без сети
+(httpx есть в requirements.txt).
+Результаты сохраняются в JSON; с --compare сравниваются p50 с прошлым прогоном,
+и при замедлении больше --tolerance сценарий завершается с кодом 1.
+
+Запуск: python -m benchmarks.suite --users 10 --records 10000 --output bench.json
+        python -m benchmarks.suite --output new.json --compare bench.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+WORKDIR = tempfile.mkdtemp(prefix="finance-bench-")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}")
+
+import httpx  # noqa: E402
+
+from benchmarks.datagen import seed  # noqa: E402
+from config import settings  # noqa: E402
+from db_config import Session, engine  # noqa: E402
+from main import app  # noqa: E402
+from models import UserModel  # noqa: E402
+from schemas.record_schemas import (BatchAction, BatchOperation,  # noqa: E402
+                                    RecordCreate)
+from schemas.stats_schemas import Granularity  # noqa: E402
+from services.auth import AuthService  # noqa: E402
+from services.csv_load import CSV_FIELDS, FileService  # noqa: E402
+from services.operations import OperationService  # noqa: E402
+from services.response_cache import response_cache  # noqa: E402
+from services.stats import StatsService  # noqa: E402
+from services.token_cache import token_cache  # noqa: E402
+
+Result = Dict[str, float]
+
+
+def peak_rss_mb() -> float:
+    """Пиковый RSS процесса в мегабайтах"""
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Result:
+    """Пропускная способность и перцентили задержек в миллисекундах"""
+
+    ordered = sorted(latencies)
+    quantiles = statistics.quantiles(ordered, n=100) if len(ordered) > 1 else ordered * 99
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "ops_per_sec": round(len(ordered) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(quantiles[49] * 1000, 3),
+        "p95_ms": round(quantiles[94] * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def measure(function: Callable[[], Any], iterations: int) -> Result:
+    """Время каждого из iterations вызовов function"""
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - call_started)
+
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def write_import_file(rows: int) -> str:
+    """CSV-файл для бенчмарка импорта"""
+
+    path = os.path.join(WORKDIR, f"import-{time.monotonic_ns()}.csv")
+    start = datetime.datetime.now() - datetime.timedelta(days=30)
+    with open(path, "w") as file:
+        file.write(",".join(CSV_FIELDS) + "\n")
+        for number in range(rows):
+            created_at = (start + datetime.timedelta(minutes=number)).isoformat()
+            file.write(f"{created_at},{number % 1000 + 0.5},expenses,import {number},\n")
+
+    return path
+
+
+def micro_benchmarks(user_id: int, iterations: int, import_rows: int) -> Dict[str, Result]:
+    """Микробенчмарки методов OperationService, StatsService, FileService и AuthService"""
+
+    results: Dict[str, Result] = {}
+    today = datetime.date.today()
+    year_ago = today - datetime.timedelta(days=365)
+
+    with Session() as session:
+        operations = OperationService(session)
+        stats = StatsService(session)
+        files = FileService(operations)
+        cursor = operations.get_records(user_id=user_id, limit=100).next_cursor
+
+        reads = {
+            "operations.get_records": lambda: operations.get_records(user_id=user_id, limit=100),
+            "operations.get_records.after": lambda: operations.get_records(user_id=user_id, limit=100,
+                                                                           after=cursor),
+            "operations.get_records.fields": lambda: operations.get_records(user_id=user_id, limit=100,
+                                                                            fields=["amount", "created_at"]),
+            "operations.get_by_time.month": lambda: operations.get_by_time(user_id=user_id, by_month=True),
+            "operations.get_summary.year": lambda: operations.get_summary(user_id=user_id, start=year_ago,
+                                                                          end=today),
+            "stats.get_stats.month": lambda: stats.get_stats(user_id=user_id, granularity=Granularity.month),
+        }
+        for name, function in reads.items():
+            results[name] = measure(function, iterations)
+
+        record = RecordCreate(created_at=datetime.datetime.now(), amount=10, type_operation="expenses",
+                              description="bench")
+        results["operations.create_record"] = measure(lambda: operations.create_record(record, user_id),
+                                                      iterations)
+
+        batch = [BatchOperation(action=BatchAction.create, data=record) for _ in range(100)]
+        results["operations.batch.100"] = measure(lambda: operations.batch(batch, user_id), max(iterations // 10, 1))
+
+        path = write_import_file(import_rows)
+        results[f"files.dump_csv_file.{import_rows}"] = measure(lambda: files.dump_csv_file(user_id, path), 3)
+        os.remove(path)
+
+        results["files.load_csv_file"] = measure(lambda: sum(map(len, files.load_csv_file(user_id=user_id))), 3)
+
+        user = session.get(UserModel, user_id)
+        token = AuthService.create_token(user).access_token
+        results["auth.create_token"] = measure(lambda: AuthService.create_token(user), iterations)
+        results["auth.decode_token"] = measure(lambda: AuthService.decode_token(token), iterations)
+        auth = AuthService(session)
+        results["auth.validate_token.cached"] = measure(lambda: auth.validate_token(token), iterations)
+
+        token_cache.enabled = False
+        results["auth.validate_token.uncached"] = measure(lambda: auth.validate_token(token), iterations)
+        token_cache.enabled = settings.token_cache_enabled
+
+    return results
+
+
+def http_routes(record_id: int) -> List[Tuple[str, str, str, Optional[dict]]]:
+    """Маршруты нагрузочного теста: (имя, метод, путь, тело)"""
+
+    today = datetime.date.today()
+    year_ago = today - datetime.timedelta(days=365)
+    record = {"created_at": datetime.datetime.now().isoformat(), "amount": 10, "type_operation": "expenses",
+              "description": "load"}
+
+    return [
+        ("GET /operation/", "GET", "/operation/?limit=100", None),
+        ("GET /operation/get_record_by_month", "GET", "/operation/get_record_by_month", None),
+        ("GET /operation/summary", "GET", f"/operation/summary?start={year_ago}&end={today}", None),
+        ("GET /operation/stats", "GET", "/operation/stats?granularity=month", None),
+        ("GET /operation/{record_id}", "GET", f"/operation/{record_id}", None),
+        ("GET /auth/user", "GET", "/auth/user", None),
+        ("POST /operation/", "POST", "/operation/", record),
+    ]
+
+
+async def http_load(tokens: Dict[int, str], concurrency: int, duration: float) -> Dict[str, Result]:
+    """Нагрузочный тест основных маршрутов: concurrency клиентов по кругу
+    обходят маршруты от имени разных пользователей в течение duration секунд"""
+
+    with Session() as session:
+        records = {user_id: OperationService(session).get_records(user_id=user_id, limit=1).items[0]["id"]
+                   for user_id in tokens}
+
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    users = list(tokens)
+
+    async def client(number: int, http: httpx.AsyncClient, deadline: float) -> None:
+        user_id = users[number % len(users)]
+        headers = {"Authorization": f"Bearer {tokens[user_id]}"}
+        routes = http_routes(records[user_id])
+        step = number
+        while time.perf_counter() < deadline:
+            name, method, path, body = routes[step % len(routes)]
+            step += 1
+            started = time.perf_counter()
+            response = await http.request(method, path, headers=headers, json=body)
+            latencies.setdefault(name, []).append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[name] = errors.get(name, 0) + 1
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as http:
+        await asyncio.gather(*(client(number, http, started + duration) for number in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    results = {name: summarize(values, elapsed, errors.get(name, 0)) for name, values in latencies.items()}
+    results["total"] = summarize([value for values in latencies.values() for value in values], elapsed,
+                                 sum(errors.values()))
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any], tolerance: float) -> List[str]:
+    """Печатает изменение p50 по сравнению с прошлым прогоном, возвращает замедлившиеся замеры"""
+
+    regressions = []
+    for section in ("micro", "http"):
+        for name, result in current[section].items():
+            old = previous.get(section, {}).get(name)
+            if not old or not old["p50_ms"]:
+                continue
+
+            ratio = result["p50_ms"] / old["p50_ms"]
+            marker = "REGRESSION" if ratio > 1 + tolerance else ""
+            print(f"{section:5} {name:45} p50 {old['p50_ms']:9.3f} -> {result['p50_ms']:9.3f} ms "
+                  f"x{ratio:5.2f} {marker}")
+            if marker:
+                regressions.append(f"{section}:{name}")
+
+    return regressions
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    if not args.response_cache:
+        response_cache.enabled = False
+
+    started = time.perf_counter()
+    user_ids = seed(engine, args.users, args.records)
+    seeded = time.perf_counter() - started
+    print(f"seeded {args.users} users x {args.records} records in {seeded:.1f} s")
+
+    micro = micro_benchmarks(user_ids[0], args.iterations, args.import_rows)
+    for name, result in micro.items():
+        print(f"micro {name:45} p50 {result['p50_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms  "
+              f"{result['ops_per_sec']:10.1f} ops/s")
+
+    with Session() as session:
+        tokens = {user.id: AuthService.create_token(user).access_token
+                  for user in session.query(UserModel).filter(UserModel.id.in_(user_ids))}
+    http = asyncio.run(http_load(tokens, args.concurrency, args.duration))
+    for name, result in http.items():
+        print(f"http  {name:45} p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  "
+              f"p99 {result['p99_ms']:9.3f} ms  {result['ops_per_sec']:8.1f} rps  errors {result['errors']}")
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": engine.dialect.name,
+            "async_database": settings.async_database,
+            "response_cache": response_cache.enabled,
+            "token_cache": settings.token_cache_enabled,
+            "params": vars(args),
+            "seed_seconds": round(seeded, 2),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+        "micro": micro,
+        "http": http,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--records", type=int, default=10_000, help="записей на пользователя")
+    parser.add_argument("--iterations", type=int, default=200, help="повторов микробенчмарка")
+    parser.add_argument("--import-rows", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд нагрузочного теста")
+    parser.add_argument("--no-response-cache", dest="response_cache", action="store_false")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="JSON прошлого прогона")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое замедление p50, доля")
+    args = parser.parse_args()
+
+    try:
+        results = run(args)
+    finally:
+        engine.dispose()
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+    print(f"results -> {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Синхронизация клиента: полная перезагрузка списка записей против
+дельты GET /operation/changes после небольшого числа изменений.
+
+Запуск: python -m benchmarks.sync [записей] [изменений]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from typing import Callable, Tuple
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from benchmarks.datagen import seed  # noqa: E402
+from schemas.record_schemas import RecordCreate, RecordUpdate  # noqa: E402
+from services.operations import OperationService  # noqa: E402
+from services.serialization import dumps  # noqa: E402
+
+PAGE_SIZE = 1000
+
+
+def measure(sync: Callable[[], Tuple[int, int]]) -> Tuple[float, int, int]:
+    """(время, запросов страниц, байт ответов) одной синхронизации"""
+
+    started = time.perf_counter()
+    pages, size = sync()
+    return time.perf_counter() - started, pages, size
+
+
+def run(records: int, changes: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        [user_id] = seed(engine, users=1, records=records)
+
+        with Session(engine) as session:
+            service = OperationService(session)
+            # клиент уже получил все сгенерированные записи: datagen нумерует их 1..records
+            synced = records
+
+            # треть изменений - новые записи, треть - правки, треть - удаления
+            for number in range(changes):
+                record_id = 1 + number * (records // max(changes, 1))
+                if number % 3 == 0:
+                    service.create_record(RecordCreate(amount=Decimal("10.00"), type_operation="income",
+                                                       created_at=datetime.datetime.now()), user_id)
+                elif number % 3 == 1:
+                    record = service.get(record_id, user_id)
+                    service.update(record_id, RecordUpdate(amount=record.amount + 1,
+                                                           type_operation=record.type_operation,
+                                                           created_at=record.created_at), user_id)
+                else:
+                    service.delete(record_id, user_id)
+
+            def full() -> Tuple[int, int]:
+                pages = size = 0
+                cursor = None
+                while True:
+                    page = service.get_records(user_id, limit=PAGE_SIZE, after=cursor)
+                    pages, size = pages + 1, size + len(dumps(page))
+                    cursor = page.next_cursor
+                    if not cursor:
+                        return pages, size
+
+            def delta() -> Tuple[int, int]:
+                pages = size = 0
+                since = synced
+                while True:
+                    page = service.get_changes(user_id, since, PAGE_SIZE)
+                    pages, size = pages + 1, size + len(dumps(page))
+                    since = page.seq
+                    if not page.has_more:
+                        return pages, size
+
+            for name, sync in (("full", full), ("delta", delta)):
+                elapsed, pages, size = measure(sync)
+                print(f"{name:>5}: {elapsed * 1000:9.1f} ms, {pages:4} requests, {size / 1024:10.1f} KiB")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100)
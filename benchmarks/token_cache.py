@@ -0,0 +1,50 @@
+"""Микробенчмарк проверки токена с кешем токенов и без него.
+Отзыв токена проверяется по списку в памяти, который перечитывается из БД
+раз в TOKEN_REVOCATION_TTL секунд.
+
+Запуск: python -m benchmarks.token_cache [итераций]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from migrations import migrate  # noqa: E402
+from models import UserModel  # noqa: E402
+from services.auth import AuthService  # noqa: E402
+from services.token_cache import token_cache  # noqa: E402
+
+
+def measure(token: str, session: Session, iterations: int) -> float:
+    """Среднее время проверки токена, мкс"""
+
+    auth = AuthService(session)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        auth.validate_token(token)
+
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def run(iterations: int) -> None:
+    user = UserModel(id=1, email="bench@example.com", username="bench")
+    token = AuthService.create_token(user).access_token
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        migrate(engine)
+
+        with Session(engine) as session:
+            for enabled in (False, True):
+                token_cache.enabled = enabled
+                elapsed = measure(token, session, iterations)
+                print(f"cache={'on ' if enabled else 'off'} {elapsed:8.2f} us/call  {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
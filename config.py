@@ -1,12 +1,63 @@
+from typing import Optional
+
 from pydantic import BaseSettings
 
 
 class Settings(BaseSettings):
+    server_host: str = "0.0.0.0"
     server_port = 8000
+    server_workers: int = 1
+    server_reload: bool = False
+    server_loop: str = "auto"
+    server_http: str = "auto"
+    migrate_on_startup: bool = True
+    import_drain_timeout: int = 30
     database_url: str = "sqlite:///./database.db"
+    async_database: bool = False
+    async_database_url: Optional[str] = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_recycle: int = 1800
+    pg_copy_import: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64 * 1024
+    sqlite_busy_timeout: int = 5000
+    sqlite_write_lock: bool = True
+    sqlite_write_lock_timeout: float = 30.0
     jwt_algorithm: str = "HS256"
     jwt_secret: str
     jwt_expiration: int = 3600
+    token_cache_enabled: bool = True
+    token_cache_size: int = 10000
+    token_cache_ttl: int = 300
+    token_revocation_ttl: float = 5.0
+    response_cache_enabled: bool = True
+    response_cache_size: int = 10000
+    response_cache_ttl: int = 300
+    response_cache_backend: str = ""
+    bcrypt_rounds: int = 12
+    hashing_workers: int = 2
+    hashing_queue_size: int = 32
+    hashing_retry_after: int = 1
+    import_batch_size: int = 1000
+    import_workers: int = 2
+    import_max_errors: int = 10000
+    export_batch_size: int = 5000
+    export_row_group_size: int = 100_000
+    batch_max_operations: int = 1000
+    base_currency: str = "RUB"
+    search_fts_driving_limit: int = 5000
+    category_matcher_cache_size: int = 1000
+    category_recategorize_batch_size: int = 5000
+    exchange_rates_file: Optional[str] = None
+    recurring_scheduler_enabled: bool = True
+    recurring_interval: int = 60
+    recurring_batch_size: int = 1000
+    recurring_max_catchup: int = 1000
+    slow_request_threshold: float = 1.0
+    slow_query_threshold: float = 0.25
 
 
 settings = Settings(
@@ -1,13 +1,198 @@
-from sqlalchemy import create_engine
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from config import settings
+from services.metrics import (TimedPoolMixin, instrument_engine, metrics,
+                              sqlite_write_lock_wait)
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка только между потоками процесса
+    fcntl = None
+
+WRITE_STATEMENT = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|ALTER|DROP)\b", re.IGNORECASE)
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url() -> str:
+    """URL асинхронного драйвера для database_url, если он не задан явно"""
+
+    if settings.async_database_url:
+        return settings.async_database_url
+
+    backend, _, rest = settings.database_url.partition("://")
+    return f"{ASYNC_DRIVERS.get(backend.split('+')[0], backend)}://{rest}"
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """PRAGMA профиля производительности SQLite из настроек"""
+
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "busy_timeout": settings.sqlite_busy_timeout,
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """Выполняет PRAGMA на каждом новом соединении движка"""
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+class SQLiteWriteLock:
+    """Один пишущий поток на файл SQLite среди всех потоков и процессов-воркеров.
+
+    Блокировка берется перед первым изменяющим запросом транзакции и
+    снимается при commit/rollback, так что писатели ждут друг друга в
+    очереди, а не получают "database is locked" по истечении busy_timeout"""
+
+    def __init__(self, path: str, timeout: float) -> None:
+        self.timeout = timeout
+        self._thread_lock = threading.Lock()
+        self._file = open(f"{path}.lock", "a") if fcntl else None
+
+    def acquire(self) -> None:
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise TimeoutError("Не дождались блокировки записи SQLite")
+
+        while self._file is not None:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.perf_counter() >= deadline:
+                    self._thread_lock.release()
+                    raise TimeoutError("Не дождались блокировки записи SQLite")
+                time.sleep(0.005)
+
+        sqlite_write_lock_wait.observe(time.perf_counter() - started)
+
+    def release(self) -> None:
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
 
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
+def apply_sqlite_write_lock(engine: Engine, lock: SQLiteWriteLock) -> None:
+    """Берет блокировку записи на время транзакций, изменяющих данные"""
+
+    def release(info: Optional[dict]) -> None:
+        if info is not None and info.pop("sqlite_write_lock", False):
+            lock.release()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def acquire(connection: Any, cursor: Any, statement: str, *_: Any) -> None:
+        if not connection.info.get("sqlite_write_lock") and WRITE_STATEMENT.match(statement):
+            lock.acquire()
+            connection.info["sqlite_write_lock"] = True
+
+    @event.listens_for(engine, "commit")
+    def on_commit(connection: Any) -> None:
+        release(connection.info)
+
+    @event.listens_for(engine, "rollback")
+    def on_rollback(connection: Any) -> None:
+        release(connection.info)
+
+    # соединение вернулось в пул без commit/rollback через Connection
+    @event.listens_for(engine, "checkin")
+    def on_checkin(_: Any, connection_record: Any) -> None:
+        release(connection_record.info if connection_record is not None else None)
+
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """Параметры движка под СУБД: для файловой SQLite - пул соединений
+    вместо NullPool, для серверных СУБД - проверка и пересоздание соединений"""
+
+    options: Dict[str, Any] = {}
+    backend = make_url(url).get_backend_name()
+
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if ":memory:" in url:
+            return options
+    else:
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = settings.db_pool_recycle
+
+    options["poolclass"] = TimedAsyncQueuePool if is_async else TimedQueuePool
+    options["pool_size"] = settings.db_pool_size
+    options["max_overflow"] = settings.db_max_overflow
+    return options
+
+
+def create_db_engine(url: str) -> Engine:
+    """Синхронный движок с параметрами и PRAGMA из настроек"""
+
+    engine = create_engine(url, **engine_options(url))
+    if engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(engine, sqlite_pragmas())
+        database = make_url(url).database
+        if settings.sqlite_write_lock and database and database != ":memory:":
+            apply_sqlite_write_lock(engine, SQLiteWriteLock(database, settings.sqlite_write_lock_timeout))
+    instrument_engine(engine)
+    return engine
+
+
+engine = create_db_engine(settings.database_url)
+# как у асинхронной сессии: объекты после commit не перечитываются, иначе
+# FastAPI при сериализации ответа догружал бы их в потоке event loop
 Session = sessionmaker(
     engine,
     autoflush=False,
-    autocommit=False
+    autocommit=False,
+    expire_on_commit=False
+)
+
+async_engine = None
+if settings.async_database:
+    async_url = get_async_database_url()
+    async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+    if async_engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas())
+    instrument_engine(async_engine.sync_engine)
+
+for name, pool_engine in (("sync", engine), ("async", async_engine)):
+    if pool_engine is not None and isinstance(pool_engine.pool, QueuePool):
+        metrics.gauge(f"db_pool_{name}_checked_out", "Соединения, выданные из пула",
+                      pool_engine.pool.checkedout)
+
+AsyncSessionMaker = sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    autocommit=False,
+    expire_on_commit=False
 )
 
 
@@ -19,3 +204,14 @@ def create_session() -> Session:
         yield session
     finally:
         session.close()
+
+
+async def create_async_session() -> AsyncSession:
+    """Создание асинхронной сессии и закрытие ее"""
+
+    async with AsyncSessionMaker() as session:
+        yield session
+
+
+# сессия для асинхронных сервисов, выбирается настройкой async_database
+create_db_session = create_async_session if settings.async_database else create_session
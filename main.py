@@ -1,12 +1,28 @@
+import asyncio
+import logging
+import os
+
 import uvicorn
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
 
 from api.auth import auth_router
+from api.categories import category_router
 from api.file_handler import file_router
+from api.metrics import metrics_router
 from api.operations import operation_router
-from db_config import engine
-from models import Base
+from api.recurring import recurring_router
 from config import settings
+from db_config import async_engine, engine
+from migrations import migrate
+from services.currency import load_rates_file
+from services.hashing import password_hasher
+from services.import_jobs import drain_imports
+from services.metrics import MetricsMiddleware
+from services.recurring import run_scheduler_pass
+
+logger = logging.getLogger(__name__)
 
 tags_metadata = [
     {
@@ -19,6 +35,18 @@ tags_metadata = [
     },    {
         "name": "Record",
         "description": "CRUD-операции с записями о доходах и расходах"
+    },
+    {
+        "name": "Recurring",
+        "description": "Регулярные операции: аренда, зарплата, подписки"
+    },
+    {
+        "name": "Categories",
+        "description": "Категории записей и правила автокатегоризации"
+    },
+    {
+        "name": "Metrics",
+        "description": "Метрики для Prometheus"
     }
 ]
 
@@ -31,9 +59,94 @@ app = FastAPI(
 app.include_router(auth_router)
 app.include_router(operation_router)
 app.include_router(file_router)
+app.include_router(recurring_router)
+app.include_router(category_router)
+app.include_router(metrics_router)
+app.add_middleware(MetricsMiddleware)
+
+
+async def recurring_scheduler() -> None:
+    """Периодически создает записи наступивших регулярных операций,
+    первый проход догоняет повторения, пропущенные за время простоя"""
+
+    while True:
+        try:
+            await run_in_threadpool(run_scheduler_pass)
+        except Exception:
+            logger.exception("Ошибка планировщика регулярных операций")
+        await asyncio.sleep(settings.recurring_interval)
+
+
+@app.on_event("startup")
+async def startup() -> None:
+    """Миграция схемы и загрузка курсов валют (если не выполнены до запуска
+    воркеров) и прогрев пула соединений"""
+
+    if settings.migrate_on_startup:
+        await run_in_threadpool(migrate, engine)
+        if settings.exchange_rates_file:
+            await run_in_threadpool(load_rates_file, settings.exchange_rates_file)
+
+    def ping() -> None:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    await run_in_threadpool(ping)
+    if async_engine is not None:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    if settings.recurring_scheduler_enabled:
+        app.state.recurring_scheduler = asyncio.create_task(recurring_scheduler())
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    """Останавливает планировщик, дожидается фоновых импортов,
+    останавливает пул bcrypt и закрывает соединения"""
+
+    scheduler = getattr(app.state, "recurring_scheduler", None)
+    if scheduler is not None:
+        scheduler.cancel()
+    await run_in_threadpool(drain_imports, settings.import_drain_timeout)
+    password_hasher.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+
+
+def server_workers() -> int:
+    """Число воркеров: асинхронный драйвер SQLite не использует блокировку
+    записи между процессами, поэтому с ним запускается один воркер"""
+
+    if settings.server_workers > 1 and settings.async_database and engine.dialect.name == "sqlite":
+        logger.warning("SQLite с async_database: запускается 1 воркер вместо %s", settings.server_workers)
+        return 1
+
+    return settings.server_workers
+
+
+def run() -> None:
+    """Миграция схемы и загрузка курсов один раз до запуска воркеров, затем
+    запуск uvicorn. Startup их не повторяет: в этом процессе (один воркер)
+    отключается настройка, воркерам-процессам - переменная окружения"""
+
+    migrate(engine)
+    if settings.exchange_rates_file:
+        load_rates_file(settings.exchange_rates_file)
+    settings.migrate_on_startup = False
+    os.environ["MIGRATE_ON_STARTUP"] = "false"
+
+    uvicorn.run(
+        "main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=server_workers(),
+        reload=settings.server_reload,
+        loop=settings.server_loop,
+        http=settings.server_http,
+    )
 
 
 if __name__ == "__main__":
-    # создаем БД
-    Base.metadata.create_all(engine)
-    uvicorn.run("main:app", host="0.0.0.0", port=settings.server_port, reload=True)
+    run()
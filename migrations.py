@@ -0,0 +1,209 @@
+from typing import Callable, List, Tuple
+
+from sqlalchemy import (Column, Index, Integer, MetaData, Table, func, insert,
+                        inspect, select, update)
+from sqlalchemy.engine import Connection, Engine
+
+from config import settings
+from models import (Base, CategoryModel, CategoryRuleModel, DailyBalanceModel,
+                    ExchangeRateModel, ImportErrorModel, ImportJobModel,
+                    RecordModel, RecordTombstoneModel, RecurringRuleModel,
+                    RevokedTokenModel, UserModel)
+from services.balances import BALANCE_COLUMNS, BalanceService
+from services.search import create_search_index
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, nullable=False)
+)
+
+
+def _add_column(connection: Connection, column: Column) -> None:
+    """Добавляет столбец в существующую таблицу, если его еще нет"""
+
+    table = column.table
+    columns = {info["name"] for info in inspect(connection).get_columns(table.name)}
+    if column.name in columns:
+        return
+
+    column_type = column.type.compile(connection.dialect)
+    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+
+
+def _create_index(connection: Connection, index: Index) -> None:
+    """Создает индекс, если его еще нет"""
+
+    index.create(connection, checkfirst=True)
+
+
+def _records_indexes(connection: Connection) -> None:
+    """Составные индексы по пользователю и external_id для дедупликации импорта"""
+
+    _add_column(connection, RecordModel.__table__.c.external_id)
+    for index in RecordModel.__table__.indexes:
+        if index.name in ("ix_records_user_created", "ix_records_user_type_created", "ux_records_user_external"):
+            _create_index(connection, index)
+
+
+def _import_jobs(connection: Connection) -> None:
+    """Таблицы задач импорта и построчных ошибок"""
+
+    ImportJobModel.__table__.create(connection, checkfirst=True)
+    ImportErrorModel.__table__.create(connection, checkfirst=True)
+
+
+def _daily_balances(connection: Connection) -> None:
+    """Таблица дневных итогов (пересоздается), заполняется по существующим записям"""
+
+    table = DailyBalanceModel.__table__
+    table.drop(connection, checkfirst=True)
+    table.create(connection)
+    connection.execute(insert(table).from_select(BALANCE_COLUMNS, BalanceService.aggregate()))
+
+
+def _superseded(connection: Connection) -> None:
+    """Миграция, которую целиком выполняет более поздняя версия"""
+
+
+def _recurring_rules(connection: Connection) -> None:
+    """Таблица правил регулярных операций"""
+
+    RecurringRuleModel.__table__.create(connection, checkfirst=True)
+
+
+def _change_tracking(connection: Connection) -> None:
+    """updated_at и номера изменений записей, отметки об удалении.
+
+    Существующим записям номер изменения - их id: он растет и в пределах
+    пользователя, счетчик пользователя продолжается с максимального номера"""
+
+    records, users = RecordModel.__table__, UserModel.__table__
+    for column in (records.c.updated_at, records.c.change_seq, users.c.change_seq):
+        _add_column(connection, column)
+
+    connection.execute(update(records).values(change_seq=records.c.id, updated_at=records.c.created_at))
+    connection.execute(update(users).values(change_seq=(
+        select(func.coalesce(func.max(records.c.change_seq), 0))
+        .where(records.c.user_id == users.c.id)
+        .scalar_subquery()
+    )))
+    _create_index(connection, next(index for index in records.indexes if index.name == "ix_records_user_change"))
+    RecordTombstoneModel.__table__.create(connection, checkfirst=True)
+
+
+def _currencies(connection: Connection) -> None:
+    """Валюта записей и правил (существующие - в базовой валюте), курсы валют
+    и дневные итоги по валютам: ключ daily_balances меняется, поэтому таблица пересоздается"""
+
+    for table in (RecordModel.__table__, RecurringRuleModel.__table__):
+        _add_column(connection, table.c.currency)
+        values = {"currency": settings.base_currency}
+        # без явного значения onupdate записей перезаписал бы updated_at из миграции 5
+        if "updated_at" in table.c:
+            values["updated_at"] = table.c.updated_at
+        connection.execute(update(table).where(table.c.currency.is_(None)).values(**values))
+
+    ExchangeRateModel.__table__.create(connection, checkfirst=True)
+    _daily_balances(connection)
+
+
+def _description_search(connection: Connection) -> None:
+    """Индекс поиска по описаниям: FTS5 на SQLite, триграммы на PostgreSQL"""
+
+    create_search_index(connection)
+
+
+def _categories(connection: Connection) -> None:
+    """Категории, правила автокатегоризации и категория записей. Существующие
+    записи остаются без категории до перекатегоризации"""
+
+    CategoryModel.__table__.create(connection, checkfirst=True)
+    CategoryRuleModel.__table__.create(connection, checkfirst=True)
+
+    records, users = RecordModel.__table__, UserModel.__table__
+    for column in (records.c.category_id, records.c.category_manual, users.c.rules_version):
+        _add_column(connection, column)
+    connection.execute(update(users).values(rules_version=0))
+    _create_index(connection, next(index for index in records.indexes if index.name == "ix_records_user_category"))
+
+
+def _external_id_duplicates(connection: Connection) -> None:
+    """Счетчик повторов external_id в задачах импорта. Пустые external_id
+    из повторно загруженных выгрузок становятся NULL: дата изменения записей
+    остается прежней"""
+
+    jobs, records = ImportJobModel.__table__, RecordModel.__table__
+    _add_column(connection, jobs.c.rows_duplicate)
+    connection.execute(update(jobs).values(rows_duplicate=0))
+    connection.execute(
+        update(records)
+        .where(func.trim(records.c.external_id) == "")
+        .values(external_id=None, updated_at=records.c.updated_at)
+    )
+
+
+def _shared_caches(connection: Connection) -> None:
+    """Версия кеша ответов и отозванные токены в БД, общие для всех воркеров"""
+
+    users = UserModel.__table__
+    _add_column(connection, users.c.cache_version)
+    connection.execute(update(users).values(cache_version=0))
+    RevokedTokenModel.__table__.create(connection, checkfirst=True)
+
+
+# (версия, описание, функция обновления) - новые миграции добавляются в конец
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "records: составные индексы и external_id", _records_indexes),
+    (2, "import_jobs и import_errors", _import_jobs),
+    (3, "daily_balances (выполняется в версии 6)", _superseded),
+    (4, "recurring_rules", _recurring_rules),
+    (5, "records: updated_at, change_seq и record_tombstones", _change_tracking),
+    (6, "валюта записей, exchange_rates, daily_balances по валютам", _currencies),
+    (7, "поиск по описаниям записей", _description_search),
+    (8, "categories, category_rules и категория записей", _categories),
+    (9, "import_jobs.rows_duplicate, пустые external_id записей", _external_id_duplicates),
+    (10, "users.cache_version и revoked_tokens", _shared_caches),
+]
+
+HEAD = MIGRATIONS[-1][0]
+
+
+def _current_version(connection: Connection) -> int:
+    """Текущая версия схемы БД.
+
+    БД без таблицы версий, но с таблицами моделей, считается созданной
+    через create_all до появления миграций (версия 0)"""
+
+    tables = set(inspect(connection).get_table_names())
+    schema_version.create(connection, checkfirst=True)
+
+    version = connection.execute(select(schema_version.c.version)).scalar()
+    if version is not None:
+        return version
+
+    if tables & set(Base.metadata.tables):
+        version = 0
+    else:
+        Base.metadata.create_all(connection)
+        # объекты вне моделей создаются так же, как их миграцией
+        _description_search(connection)
+        version = HEAD
+
+    connection.execute(schema_version.insert().values(version=version))
+    return version
+
+
+def migrate(engine: Engine) -> int:
+    """Создает схему БД или обновляет существующую до последней версии"""
+
+    with engine.begin() as connection:
+        version = _current_version(connection)
+        for number, _, upgrade in MIGRATIONS:
+            if number <= version:
+                continue
+            upgrade(connection)
+            connection.execute(schema_version.update().values(version=number))
+            version = number
+
+    return version
@@ -1,10 +1,13 @@
 import datetime
+from typing import Optional
 
-from sqlalchemy import (Column, DateTime, ForeignKey, Integer, Numeric, String,
-                        Text)
+from sqlalchemy import (Boolean, Column, Date, DateTime, ForeignKey, Index,
+                        Integer, Numeric, String, Text)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy_utils import EmailType
 
+from config import settings
+
 Base = declarative_base()
 
 
@@ -17,12 +20,36 @@ class UserModel(Base):
     email = Column(EmailType, unique=True)
     username = Column(String, unique=True)
     hash_password = Column(Text)
+    # последний выданный номер изменения записей пользователя
+    change_seq = Column(Integer, default=0)
+    # версия правил категорий: меняется при каждом изменении правил пользователя
+    rules_version = Column(Integer, default=0)
+    # версия кеша ответов для изменений не в записях (курсы, пересчет итогов)
+    cache_version = Column(Integer, default=0)
+
+
+class RevokedTokenModel(Base):
+    """Модель отозванного при выходе JWT-токена: проверяется всеми воркерами"""
+
+    __tablename__ = "revoked_tokens"
+
+    # SHA-256 токена, сам токен не хранится
+    token_hash = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    expires_at = Column(DateTime, index=True)
 
 
 class RecordModel(Base):
     """Модель для записи(учет доходов/расходов)"""
 
     __tablename__ = "records"
+    __table_args__ = (
+        Index("ix_records_user_created", "user_id", "created_at"),
+        Index("ix_records_user_type_created", "user_id", "type_operation", "created_at"),
+        Index("ux_records_user_external", "user_id", "external_id", unique=True),
+        Index("ix_records_user_change", "user_id", "change_seq"),
+        Index("ix_records_user_category", "user_id", "category_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     created_at = Column(DateTime, default=datetime.datetime.now())
@@ -30,3 +57,145 @@ class RecordModel(Base):
     type_operation = Column(String)
     description = Column(String, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
+    external_id = Column(String, nullable=True)
+    currency = Column(String(3), default=settings.base_currency)
+    updated_at = Column(DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now)
+    # номер последнего изменения записи в последовательности пользователя
+    change_seq = Column(Integer, nullable=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    # категория указана пользователем, правила и перекатегоризация ее не меняют
+    category_manual = Column(Boolean, default=False)
+
+
+class RecordTombstoneModel(Base):
+    """Модель отметки об удалении записи для синхронизации клиентов"""
+
+    __tablename__ = "record_tombstones"
+    __table_args__ = (
+        Index("ix_record_tombstones_user_change", "user_id", "change_seq"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    record_id = Column(Integer)
+    change_seq = Column(Integer)
+    deleted_at = Column(DateTime, default=datetime.datetime.now)
+
+
+class DailyBalanceModel(Base):
+    """Модель дневных итогов доходов/расходов пользователя по валютам"""
+
+    __tablename__ = "daily_balances"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    currency = Column(String(3), primary_key=True, default=settings.base_currency)
+    income_sum = Column(Numeric(14, 2), default=0)
+    expense_sum = Column(Numeric(14, 2), default=0)
+    count = Column(Integer, default=0)
+
+
+class ExchangeRateModel(Base):
+    """Модель курса валюты: сколько единиц базовой валюты стоит единица currency на дату"""
+
+    __tablename__ = "exchange_rates"
+
+    currency = Column(String(3), primary_key=True)
+    date = Column(Date, primary_key=True)
+    rate = Column(Numeric(18, 8))
+
+
+class ImportJobModel(Base):
+    """Модель задачи импорта записей из CSV-файла"""
+
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    filename = Column(String, nullable=True)
+    state = Column(String, default="pending")
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.now)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    rows_processed = Column(Integer, default=0)
+    rows_accepted = Column(Integer, default=0)
+    rows_rejected = Column(Integer, default=0)
+    # строки с уже загруженным external_id, пропущенные при вставке
+    rows_duplicate = Column(Integer, default=0)
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        """Скорость обработки строк с момента запуска задачи"""
+
+        if not self.started_at:
+            return None
+
+        finished_at = self.finished_at or datetime.datetime.now()
+        elapsed = (finished_at - self.started_at).total_seconds()
+        if elapsed <= 0:
+            return None
+
+        return round(self.rows_processed / elapsed, 1)
+
+
+class ImportErrorModel(Base):
+    """Модель ошибки разбора строки CSV-файла в задаче импорта"""
+
+    __tablename__ = "import_errors"
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("import_jobs.id"), index=True)
+    line = Column(Integer)
+    error = Column(Text)
+
+
+class RecurringRuleModel(Base):
+    """Модель правила регулярной операции (аренда, зарплата, подписки)"""
+
+    __tablename__ = "recurring_rules"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    amount = Column(Numeric(10, 2))
+    currency = Column(String(3), default=settings.base_currency)
+    type_operation = Column(String)
+    description = Column(String, nullable=True)
+    frequency = Column(String)
+    interval = Column(Integer, default=1)
+    start_at = Column(DateTime)
+    until = Column(DateTime, nullable=True)
+    # ближайшее еще не созданное повторение, NULL - правило исчерпано
+    next_run_at = Column(DateTime, nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.datetime.now)
+
+
+class CategoryModel(Base):
+    """Модель категории записей пользователя"""
+
+    __tablename__ = "categories"
+    __table_args__ = (
+        Index("ux_categories_user_name", "user_id", "name", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    name = Column(String)
+
+
+class CategoryRuleModel(Base):
+    """Модель правила автокатегоризации: подстрока или регулярное выражение
+    в описании, диапазон суммы и тип операции. Из подходящих правил
+    срабатывает правило с меньшим priority (при равенстве - созданное раньше)"""
+
+    __tablename__ = "category_rules"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    category_id = Column(Integer, ForeignKey("categories.id"))
+    kind = Column(String)
+    pattern = Column(String, nullable=True)
+    type_operation = Column(String, nullable=True)
+    amount_min = Column(Numeric(10, 2), nullable=True)
+    amount_max = Column(Numeric(10, 2), nullable=True)
+    priority = Column(Integer, default=0)
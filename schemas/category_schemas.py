@@ -0,0 +1,139 @@
+import re
+from decimal import Decimal
+from enum import Enum
+from typing import Any, List, Optional, Tuple
+
+from pydantic import BaseModel, Field, constr, root_validator
+
+from schemas.record_schemas import OperationType
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+REGEX_MAX_LENGTH = 100
+REPEATS = {"MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"}
+
+
+def _check_regex_items(items: List[Tuple[Any, Any]], repeated: bool) -> None:
+    """Обход разобранного выражения: repeated - элемент уже под квантификатором
+    с верхней границей больше 1"""
+
+    for op, value in items:
+        name = str(op)
+        if name in REPEATS:
+            _, high, sub = value
+            if high > 1 and repeated:
+                raise ValueError("Вложенные квантификаторы в регулярном выражении, например (a+)+")
+            _check_regex_items(sub, repeated or high > 1)
+        elif name == "BRANCH":
+            if repeated:
+                raise ValueError("Альтернатива под квантификатором в регулярном выражении, например (ab|cd)+")
+            for branch in value[1]:
+                _check_regex_items(branch, repeated)
+        elif name in ("GROUPREF", "GROUPREF_EXISTS"):
+            raise ValueError("Обратные ссылки в регулярном выражении не поддерживаются")
+        elif name == "SUBPATTERN":
+            _check_regex_items(value[-1], repeated)
+        elif name in ("ASSERT", "ASSERT_NOT"):
+            _check_regex_items(value[1], repeated)
+        elif name == "ATOMIC_GROUP":
+            _check_regex_items(value, repeated)
+
+
+def check_regex(pattern: str) -> None:
+    """Регулярное выражение правила проверяется на каждом описании при импорте,
+    поэтому допускаются только выражения без катастрофического перебора:
+    ограниченной длины, без вложенных квантификаторов, альтернатив под
+    квантификатором и обратных ссылок"""
+
+    if len(pattern) > REGEX_MAX_LENGTH:
+        raise ValueError(f"Регулярное выражение длиннее {REGEX_MAX_LENGTH} символов")
+
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error as error:
+        raise ValueError(f"Невалидное регулярное выражение: {error}")
+
+    _check_regex_items(list(parsed), repeated=False)
+
+
+class RuleKind(str, Enum):
+    """Вид условия правила по описанию записи"""
+
+    substring = "substring"
+    regex = "regex"
+    amount = "amount"
+
+
+class CategoryCreate(BaseModel):
+    """Модель категории для создания"""
+
+    name: constr(strip_whitespace=True, min_length=1, max_length=100)
+
+
+class Category(CategoryCreate):
+    """Модель категории для отображения"""
+
+    id: int
+
+    class Config:
+        orm_mode = True
+
+
+class CategoryRuleBase(BaseModel):
+    """Базовая модель правила автокатегоризации.
+
+    substring - подстрока описания без учета регистра, regex - регулярное
+    выражение (re.search без учета регистра, ограничения - в check_regex),
+    amount - только диапазон суммы.
+    Диапазон [amount_min, amount_max] и тип операции дополнительно
+    ограничивают правило любого вида"""
+
+    category_id: int
+    kind: RuleKind
+    pattern: Optional[constr(min_length=1, max_length=200)]
+    type_operation: Optional[OperationType]
+    amount_min: Optional[Decimal]
+    amount_max: Optional[Decimal]
+    priority: int = Field(0, ge=0)
+
+    @root_validator(skip_on_failure=True)
+    def check_rule(cls, values):
+        kind, pattern = values["kind"], values["pattern"]
+        if kind == RuleKind.amount:
+            if pattern is not None:
+                raise ValueError("У правила amount не бывает pattern")
+            if values["amount_min"] is None and values["amount_max"] is None:
+                raise ValueError("Для правила amount нужен amount_min или amount_max")
+        elif pattern is None:
+            raise ValueError(f"Для правила {kind.value} нужен pattern")
+        elif kind == RuleKind.regex:
+            check_regex(pattern)
+
+        if None not in (values["amount_min"], values["amount_max"]) and values["amount_min"] > values["amount_max"]:
+            raise ValueError("amount_min больше amount_max")
+        return values
+
+
+class CategoryRuleCreate(CategoryRuleBase):
+    """Модель правила для создания"""
+
+    pass
+
+
+class CategoryRule(CategoryRuleBase):
+    """Модель правила для отображения"""
+
+    id: int
+
+    class Config:
+        orm_mode = True
+
+
+class RecategorizeResult(BaseModel):
+    """Итог перекатегоризации записей пользователя по текущим правилам"""
+
+    checked: int
+    changed: int
@@ -0,0 +1,43 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ImportState(str, Enum):
+    """Состояние задачи импорта"""
+
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ExportFormat(str, Enum):
+    """Формат выгрузки записей"""
+
+    csv = "csv"
+    ndjson = "ndjson"
+    parquet = "parquet"
+    arrow = "arrow"
+
+
+class ImportJob(BaseModel):
+    """Модель задачи импорта для отображения"""
+
+    id: int
+    filename: Optional[str]
+    state: ImportState
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    rows_processed: int
+    rows_accepted: int
+    rows_rejected: int
+    rows_duplicate: int
+    rows_per_second: Optional[float]
+
+    class Config:
+        orm_mode = True
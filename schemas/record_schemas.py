@@ -1,9 +1,30 @@
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, root_validator, validator
+
+from config import settings
+
+CURRENCY_PATTERN = r"^[A-Z]{3}$"
+
+
+def normalize_currency(value: Any) -> Any:
+    """Код валюты ISO 4217 в верхнем регистре, пустой - базовая валюта"""
+
+    if value is None or value == "":
+        return settings.base_currency
+    return value.upper() if isinstance(value, str) else value
+
+
+def normalize_external_id(value: Any) -> Any:
+    """Пустой external_id (так его выгружает CSV) - отсутствие идентификатора:
+    иначе '' попадает в уникальный индекс (user_id, external_id)"""
+
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
 
 
 class OperationType(str, Enum):
@@ -20,6 +41,13 @@ class RecordBase(BaseModel):
     amount: Decimal
     type_operation: OperationType
     description: Optional[str]
+    external_id: Optional[str]
+    currency: str = Field(settings.base_currency, regex=CURRENCY_PATTERN)
+    # без категории она подбирается по правилам пользователя
+    category_id: Optional[int]
+
+    _check_currency = validator("currency", pre=True, always=True, allow_reuse=True)(normalize_currency)
+    _check_external_id = validator("external_id", pre=True, allow_reuse=True)(normalize_external_id)
 
     class Config:
         orm_mode = True
@@ -34,6 +62,66 @@ class Record(RecordBase):
         orm_mode = True
 
 
+class PeriodRecords(BaseModel):
+    """Записи за полуинтервал [start, end) и сумма доходов за вычетом расходов
+    в базовой валюте currency"""
+
+    start: datetime
+    end: datetime
+    total: Decimal
+    currency: str
+    records: List[Record]
+
+
+class RecordPage(BaseModel):
+    """Страница записей с курсорами keyset-пагинации"""
+
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+class ChangedRecord(Record):
+    """Созданная или измененная запись с номером изменения"""
+
+    updated_at: Optional[datetime]
+    change_seq: int
+
+
+class RecordSearch(BaseModel):
+    """Найденные записи от новых к старым и курсор следующей страницы"""
+
+    items: List[Record]
+    next_cursor: Optional[str]
+
+
+class ChangeKind(str, Enum):
+    """Вид изменения записи"""
+
+    upsert = "upsert"
+    delete = "delete"
+
+
+class RecordChange(BaseModel):
+    """Изменение записи: upsert - созданная или измененная запись в последнем
+    состоянии (record), delete - удаление записи id"""
+
+    kind: ChangeKind
+    id: int
+    change_seq: int
+    record: Optional[ChangedRecord]
+
+
+class RecordChanges(BaseModel):
+    """Изменения записей после номера since по возрастанию change_seq и номер,
+    с которого продолжать синхронизацию. Клиент применяет их по порядку:
+    на SQLite id удаленной записи может достаться новой"""
+
+    changes: List[RecordChange]
+    seq: int
+    has_more: bool
+
+
 class RecordCreate(RecordBase):
     """Модель записи для создания"""
 
@@ -44,3 +132,47 @@ class RecordUpdate(RecordBase):
     """Модель записи для обновления"""
 
     pass
+
+
+class BalanceSummary(BaseModel):
+    """Итоги доходов и расходов за период в базовой валюте currency"""
+
+    income: Decimal
+    expenses: Decimal
+    total: Decimal
+    count: int
+    currency: str
+
+
+class BatchAction(str, Enum):
+    """Вид операции в пакете"""
+
+    create = "create"
+    update = "update"
+    delete = "delete"
+
+
+class BatchOperation(BaseModel):
+    """Операция пакетного изменения записей"""
+
+    action: BatchAction
+    id: Optional[int]
+    data: Optional[RecordCreate]
+
+    @root_validator(skip_on_failure=True)
+    def check_action(cls, values):
+        action = values["action"]
+        if action != BatchAction.create and values.get("id") is None:
+            raise ValueError(f"Для {action.value} нужен id записи")
+        if action != BatchAction.delete and values.get("data") is None:
+            raise ValueError(f"Для {action.value} нужны данные записи")
+        return values
+
+
+class BatchResult(BaseModel):
+    """Результат операции из пакета"""
+
+    index: int
+    action: BatchAction
+    id: Optional[int]
+    status: str
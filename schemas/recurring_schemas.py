@@ -0,0 +1,66 @@
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, Field, root_validator, validator
+
+from config import settings
+from schemas.record_schemas import (CURRENCY_PATTERN, OperationType,
+                                    normalize_currency)
+
+
+class Frequency(str, Enum):
+    """Частота повторения (FREQ в RRULE)"""
+
+    daily = "daily"
+    weekly = "weekly"
+    monthly = "monthly"
+    yearly = "yearly"
+
+
+class RecurringRuleBase(BaseModel):
+    """Базовая модель правила: подмножество RRULE из DTSTART, FREQ, INTERVAL и UNTIL.
+
+    Время и день первого повторения задаются start_at; для monthly/yearly
+    день месяца сохраняется, а в коротких месяцах берется последний день"""
+
+    amount: Decimal
+    currency: str = Field(settings.base_currency, regex=CURRENCY_PATTERN)
+    type_operation: OperationType
+    description: Optional[str]
+    frequency: Frequency
+    interval: int = Field(1, ge=1)
+    start_at: datetime
+    until: Optional[datetime]
+
+    _check_currency = validator("currency", pre=True, always=True, allow_reuse=True)(normalize_currency)
+
+    @root_validator(skip_on_failure=True)
+    def check_until(cls, values):
+        if values["until"] is not None and values["until"] < values["start_at"]:
+            raise ValueError("until раньше start_at")
+        return values
+
+
+class RecurringRuleCreate(RecurringRuleBase):
+    """Модель правила для создания"""
+
+    pass
+
+
+class RecurringRule(RecurringRuleBase):
+    """Модель правила для отображения"""
+
+    id: int
+    next_run_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class MaterializeResult(BaseModel):
+    """Итог прохода планировщика регулярных операций"""
+
+    rules: int
+    records: int
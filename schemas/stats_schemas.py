@@ -0,0 +1,34 @@
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class Granularity(str, Enum):
+    """Шаг агрегации по времени"""
+
+    day = "day"
+    week = "week"
+    month = "month"
+    year = "year"
+
+
+class StatsGroup(str, Enum):
+    """Поле группировки записей внутри периода"""
+
+    description = "description"
+    category = "category"
+
+
+class StatsBucket(BaseModel):
+    """Агрегаты доходов и расходов за период"""
+
+    period: date
+    group: Optional[str]
+    income: Decimal
+    expenses: Decimal
+    net: Decimal
+    count: int
+    running_balance: Decimal
@@ -1,24 +1,37 @@
 import datetime
+import uuid
+from typing import List, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
-from passlib.hash import bcrypt
 from pydantic import ValidationError
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from config import settings
+from db_config import Session as SessionFactory
 from db_config import create_session
-from models import UserModel
+from models import RevokedTokenModel, UserModel
 from schemas.auth_schemas import Token, User, UserCreate
+from services.base import AsyncService
+from services.hashing import password_hasher
+from services.token_cache import revocations, token_cache, token_key
+
+revoked_tokens = RevokedTokenModel.__table__
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login/")
 
 
 def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    """Получает текущего юзера на сайте с валидацией его токена"""
+    """Получает текущего юзера на сайте с валидацией его токена.
+    Синхронная зависимость: FastAPI выполняет ее в пуле потоков, и ни
+    проверка подписи, ни перечитывание списка отзыва не блокируют цикл событий.
+    Сессия берет соединение из пула, только если список отзыва устарел"""
 
-    return AuthService.validate_token(token)
+    with SessionFactory() as session:
+        return AuthService(session).validate_token(token)
 
 
 class AuthService:
@@ -28,17 +41,17 @@ class AuthService:
     def hash_password(cls, raw_password: str) -> str:
         """Хеширует пароль пользователя"""
 
-        return bcrypt.hash(raw_password)
+        return password_hasher.hash(raw_password)
 
     @classmethod
     def verify_password(cls, password: str, hash_password: str) -> bool:
         """Проверяет введный пользователь пароль при аутентификации"""
 
-        return bcrypt.verify(password, hash_password)
+        return password_hasher.verify(password, hash_password)
 
-    @classmethod
-    def validate_token(cls, token: str) -> User:
-        """Получает пользователя из JWT-токена и проверяет валидность"""
+    def validate_token(self, token: str) -> User:
+        """Получает пользователя из JWT-токена и проверяет валидность.
+        Подпись проверяется при промахе кеша, отзыв - по списку в памяти воркера"""
 
         exception = HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,22 +59,78 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"}
             )
 
+        user = token_cache.get(token)
+        if user is None:
+            payload = self.decode_token(token)
+
+            user_data = payload.get("user")
+            try:
+                user = User.parse_obj(user_data)
+            except ValidationError:
+                raise exception
+
+            token_cache.put(token, user, payload["exp"])
+
+        if revocations.is_revoked(token, self.revoked_keys):
+            raise exception
+
+        return user
+
+    def revoked_keys(self) -> List[str]:
+        """Ключи отозванных токенов, срок которых еще не истек"""
+
+        now = datetime.datetime.utcnow()
+        return self.session.scalars(
+            select(revoked_tokens.c.token_hash).where(revoked_tokens.c.expires_at > now)
+        ).all()
+
+    @classmethod
+    def decode_token(cls, token: str) -> dict:
+        """Проверяет подпись и срок действия JWT-токена"""
+
         try:
-            payload = jwt.decode(
+            return jwt.decode(
                 token,
                 settings.jwt_secret,
                 algorithms=[settings.jwt_algorithm]
             )
         except jwt.JWTError:
-            raise exception
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Невалидный токен",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+
+    def revoke_token(self, token: str, user_id: int) -> None:
+        """Отзывает токен при выходе пользователя до истечения его срока.
+        Заодно удаляются истекшие отозванные токены"""
 
-        user_data = payload.get("user")
+        payload = self.decode_token(token)
+        now = datetime.datetime.utcnow()
+
+        self.session.execute(delete(revoked_tokens).where(revoked_tokens.c.expires_at < now))
+        self.session.add(RevokedTokenModel(
+            token_hash=token_key(token),
+            user_id=user_id,
+            expires_at=datetime.datetime.utcfromtimestamp(payload["exp"])
+        ))
         try:
-            user = User.parse_obj(user_data)
-        except ValidationError:
-            raise exception
+            self.session.commit()
+        except IntegrityError:  # тот же токен уже отозван параллельным запросом
+            self.session.rollback()
 
-        return user
+        revocations.add(token)
+        token_cache.revoke(token)
+
+    @classmethod
+    def credentials_exception(cls) -> HTTPException:
+        """Ошибка неверного логина или пароля"""
+
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неправильный логин или пароль",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
 
     @classmethod
     def create_token(cls, user: UserModel) -> Token:
@@ -76,6 +145,7 @@ class AuthService:
             "nbf": now,
             "exp": now + datetime.timedelta(seconds=settings.jwt_expiration),
             "sub": str(user_data.id),
+            "jti": uuid.uuid4().hex,
             "user": user_data.dict()
         }
 
@@ -92,13 +162,13 @@ class AuthService:
 
         self.session = session
 
-    def registration_user(self, user: UserCreate) -> Token:
+    def registration_user(self, user: UserCreate, hash_password: Optional[str] = None) -> Token:
         """Регистрация пользователя в БД"""
 
         user = UserModel(
             email=user.email,
             username=user.username,
-            hash_password=self.hash_password(user.password)
+            hash_password=hash_password or self.hash_password(user.password)
         )
 
         self.session.add(user)
@@ -106,21 +176,61 @@ class AuthService:
 
         return self.create_token(user)
 
-    def authenticate_user(self, username: str, password: str) -> Token:
-        """Аутентификация пользователя в БД"""
-
-        exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Неправильный логин или пароль",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
+    def get_user(self, username: str) -> UserModel:
+        """Получение пользователя по логину для аутентификации"""
 
         user = self.session.query(UserModel).filter_by(username=username).first()
 
         if not user:
-            raise exception
+            raise self.credentials_exception()
+
+        return user
+
+    def update_hash_password(self, user: UserModel, hash_password: str) -> None:
+        """Сохраняет пересчитанный с новой стоимостью bcrypt хеш пароля"""
+
+        user.hash_password = hash_password
+        self.session.commit()
+
+    def authenticate_user(self, username: str, password: str) -> Token:
+        """Аутентификация пользователя в БД"""
+
+        user = self.get_user(username)
 
         if not self.verify_password(password, user.hash_password):
-            raise exception
+            raise self.credentials_exception()
 
-        return self.create_token(user)
+        token = self.create_token(user)
+        if password_hasher.needs_rehash(user.hash_password):
+            self.update_hash_password(user, self.hash_password(password))
+
+        return token
+
+
+class AsyncAuthService(AsyncService):
+    """Асинхронная версия сервиса аутентификации"""
+
+    def _service(self, session: Session) -> AuthService:
+        return AuthService(session)
+
+    async def revoke_token(self, token: str, user_id: int) -> None:
+        return await self._run(AuthService.revoke_token, token, user_id)
+
+    async def registration_user(self, user: UserCreate) -> Token:
+        hash_password = await password_hasher.hash_async(user.password)
+        return await self._run(AuthService.registration_user, user, hash_password)
+
+    async def authenticate_user(self, username: str, password: str) -> Token:
+        """Аутентификация, bcrypt выполняется в пуле процессов без блокировки цикла событий"""
+
+        user = await self._run(AuthService.get_user, username)
+
+        if not await password_hasher.verify_async(password, user.hash_password):
+            raise AuthService.credentials_exception()
+
+        token = AuthService.create_token(user)
+        if password_hasher.needs_rehash(user.hash_password):
+            hash_password = await password_hasher.hash_async(password)
+            await self._run(AuthService.update_hash_password, user, hash_password)
+
+        return token
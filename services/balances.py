@@ -0,0 +1,198 @@
+import argparse
+import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from fastapi import Depends
+from sqlalchemy import case, delete, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from config import settings
+from db_config import Session as SessionFactory
+from db_config import create_session
+from models import DailyBalanceModel, RecordModel
+from schemas.record_schemas import BalanceSummary, OperationType
+from services.base import dialect_insert
+from services.currency import check_rates, to_cents, with_rates
+from services.response_cache import response_cache
+
+balances = DailyBalanceModel.__table__
+BALANCE_COLUMNS = ["user_id", "date", "currency", "income_sum", "expense_sum", "count"]
+
+
+class BalanceService:
+    """Класс дневных итогов доходов/расходов пользователя (daily_balances)"""
+
+    def __init__(self, session: Session = Depends(create_session)) -> None:
+        """Инициализации сессии для работы с БД"""
+
+        self.session = session
+
+    def apply(self,
+              user_id: int,
+              created_at: datetime.datetime,
+              type_operation: str,
+              amount: Decimal,
+              currency: str,
+              sign: int = 1) -> None:
+
+        """Инкрементально учитывает запись в итогах ее дня и валюты,
+        sign=-1 исключает ранее учтенную запись"""
+
+        values = {
+            "user_id": user_id,
+            "date": created_at.date(),
+            "currency": currency,
+            "income_sum": sign * amount if type_operation == OperationType.income.value else 0,
+            "expense_sum": sign * amount if type_operation == OperationType.outcome.value else 0,
+            "count": sign,
+        }
+
+        statement = dialect_insert(self.session, balances).values(**values)
+        if hasattr(statement, "on_conflict_do_update"):
+            self.session.execute(statement.on_conflict_do_update(
+                index_elements=[balances.c.user_id, balances.c.date, balances.c.currency],
+                set_={
+                    column: balances.c[column] + statement.excluded[column]
+                    for column in ("income_sum", "expense_sum", "count")
+                }
+            ))
+            return
+
+        updated = self.session.execute(
+            update(balances)
+            .where(balances.c.user_id == user_id, balances.c.date == values["date"],
+                   balances.c.currency == currency)
+            .values({
+                column: balances.c[column] + values[column]
+                for column in ("income_sum", "expense_sum", "count")
+            })
+        )
+        if not updated.rowcount:
+            self.session.execute(insert(balances).values(**values))
+
+    @staticmethod
+    def aggregate() -> Select:
+        """Итоги по дням и валютам, посчитанные по записям"""
+
+        day = func.date(RecordModel.created_at)
+        return (
+            select(
+                RecordModel.user_id,
+                day,
+                RecordModel.currency,
+                func.sum(case((RecordModel.type_operation == OperationType.income.value, RecordModel.amount),
+                              else_=0)),
+                func.sum(case((RecordModel.type_operation == OperationType.outcome.value, RecordModel.amount),
+                              else_=0)),
+                func.count(),
+            )
+            .group_by(RecordModel.user_id, day, RecordModel.currency)
+        )
+
+    def _insert_aggregate(self, query: Select) -> None:
+        self.session.execute(
+            insert(balances).from_select(BALANCE_COLUMNS, query)
+        )
+
+    def refresh_days(self, user_id: int, days: Iterable[datetime.date]) -> None:
+        """Пересчитывает итоги указанных дней пользователя по записям"""
+
+        days = sorted(set(days))
+        if not days:
+            return
+
+        self.session.execute(
+            delete(balances).where(balances.c.user_id == user_id, balances.c.date.in_(days))
+        )
+        start = datetime.datetime.combine(days[0], datetime.time())
+        end = datetime.datetime.combine(days[-1], datetime.time()) + datetime.timedelta(days=1)
+        self._insert_aggregate(
+            self.aggregate().where(
+                RecordModel.user_id == user_id,
+                RecordModel.created_at >= start,
+                RecordModel.created_at < end,
+                func.date(RecordModel.created_at).in_(days)
+            )
+        )
+
+    def refresh_many(self, days_by_user: Dict[int, Iterable[datetime.date]]) -> None:
+        """Пересчитывает итоги дней нескольких пользователей двумя запросами
+        вместо пары запросов на каждого пользователя"""
+
+        pairs = sorted({(user_id, day) for user_id, days in days_by_user.items() for day in days})
+        if not pairs:
+            return
+
+        dates = sorted({day for _, day in pairs})
+        self.session.execute(
+            delete(balances).where(tuple_(balances.c.user_id, balances.c.date).in_(pairs))
+        )
+        start = datetime.datetime.combine(dates[0], datetime.time())
+        end = datetime.datetime.combine(dates[-1], datetime.time()) + datetime.timedelta(days=1)
+        self._insert_aggregate(
+            self.aggregate().where(
+                RecordModel.user_id.in_(list(days_by_user)),
+                RecordModel.created_at >= start,
+                RecordModel.created_at < end,
+                tuple_(RecordModel.user_id, func.date(RecordModel.created_at)).in_(pairs)
+            )
+        )
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """Полностью пересчитывает итоги (пользователя или всех) для исправления
+        расхождений. Ответы по старым итогам сбрасываются из кеша"""
+
+        query = self.aggregate()
+        removal = delete(balances)
+        if user_id is not None:
+            query = query.where(RecordModel.user_id == user_id)
+            removal = removal.where(balances.c.user_id == user_id)
+
+        self.session.execute(removal)
+        self._insert_aggregate(query)
+        response_cache.bump(self.session, None if user_id is None else [user_id])
+        self.session.commit()
+
+        count = select(func.count()).select_from(balances)
+        if user_id is not None:
+            count = count.where(balances.c.user_id == user_id)
+        return self.session.execute(count).scalar()
+
+    def summary(self, user_id: int, start: datetime.date, end: datetime.date) -> BalanceSummary:
+        """Итоги за дни полуинтервала [start, end) в базовой валюте:
+        итоги дня в каждой валюте умножаются на курс этого дня в SQL"""
+
+        days = with_rates(
+            select(balances.c.income_sum, balances.c.expense_sum, balances.c["count"],
+                   balances.c.currency, balances.c.date.label("day"))
+            .where(
+                balances.c.user_id == user_id,
+                balances.c.date >= start,
+                balances.c.date < end
+            )
+        )
+        income, expenses, count, missing = self.session.execute(
+            select(
+                func.sum(days.c.income_sum * days.c.rate),
+                func.sum(days.c.expense_sum * days.c.rate),
+                func.coalesce(func.sum(days.c["count"]), 0),
+                func.count() - func.count(days.c.rate),
+            )
+        ).one()
+        check_rates(missing)
+
+        income, expenses = to_cents(income), to_cents(expenses)
+        return BalanceSummary(income=income, expenses=expenses, total=income - expenses, count=count,
+                              currency=settings.base_currency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересчет дневных итогов daily_balances")
+    parser.add_argument("--user-id", type=int, default=None)
+    arguments = parser.parse_args()
+
+    with SessionFactory() as session:
+        rows = BalanceService(session).rebuild(arguments.user_id)
+    print(f"daily_balances: {rows} строк")
@@ -0,0 +1,67 @@
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar, Union
+
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Table, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Insert
+
+from db_config import create_db_session
+
+T = TypeVar("T")
+
+_exhausted = object()
+
+DIALECT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def dialect_insert(session: Session, table: Table) -> Insert:
+    """INSERT диалекта БД сессии: на SQLite и PostgreSQL с поддержкой ON CONFLICT"""
+
+    return DIALECT_INSERTS.get(session.get_bind().dialect.name, insert)(table)
+
+
+class AsyncService:
+    """Базовый класс асинхронной версии сервиса.
+
+    С async_database методы синхронного сервиса выполняются через
+    AsyncSession.run_sync на асинхронном движке и не занимают поток,
+    иначе - в пуле потоков с обычной сессией, как синхронные эндпоинты"""
+
+    def __init__(self, session: Union[AsyncSession, Session] = Depends(create_db_session)) -> None:
+        """Инициализации сессии для работы с БД"""
+
+        self.session = session
+
+    def _service(self, session: Session) -> Any:
+        """Синхронный сервис поверх сессии"""
+
+        raise NotImplementedError
+
+    async def _run(self, method: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Вызывает метод синхронного сервиса"""
+
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(
+                lambda session: method(self._service(session), *args, **kwargs)
+            )
+
+        return await run_in_threadpool(method, self._service(self.session), *args, **kwargs)
+
+    async def _iterate(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        """Асинхронный обход генератора, который читает из БД"""
+
+        while True:
+            if isinstance(self.session, AsyncSession):
+                item = await self.session.run_sync(lambda _: next(iterator, _exhausted))
+            else:
+                item = await run_in_threadpool(next, iterator, _exhausted)
+
+            if item is _exhausted:
+                return
+            yield item
@@ -0,0 +1,441 @@
+import argparse
+import datetime
+import logging
+import re
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_config import Session as SessionFactory
+from db_config import create_session
+from models import CategoryModel, CategoryRuleModel, RecordModel, UserModel
+from schemas.category_schemas import (CategoryCreate, CategoryRuleCreate,
+                                      RecategorizeResult, RuleKind)
+from services.base import AsyncService
+from services.sync import SyncService
+
+logger = logging.getLogger(__name__)
+
+records = RecordModel.__table__
+rules_table = CategoryRuleModel.__table__
+users = UserModel.__table__
+
+# описаний в кеше кандидатов одного пользователя, при переполнении кеш очищается
+DESCRIPTION_CACHE_SIZE = 100_000
+
+# (id категории, тип операции, минимальная сумма, максимальная сумма)
+Candidate = Tuple[int, Optional[str], Optional[Decimal], Optional[Decimal]]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Регулярное выражение из префиксного дерева слов: ветвление идет по
+    очередному символу, поэтому проверка позиции не зависит от числа слов,
+    а жадные необязательные хвосты дают самое длинное слово с этой позиции"""
+
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class CategoryMatcher:
+    """Правила категорий пользователя, скомпилированные для проверки записей.
+
+    Подстроки всех правил собраны в одно префиксное дерево: один проход
+    по описанию находит все вхождения (как автомат Ахо-Корасик), регулярные
+    выражения без групп проверяются одним общим выражением. Правила,
+    подошедшие по описанию, запоминаются для описания - повторяющиеся
+    описания импорта дальше проверяются только по сумме и типу"""
+
+    def __init__(self, rules: Sequence[Any]) -> None:
+        rules = sorted(rules, key=lambda rule: (rule.priority, rule.id))
+        self._rules: List[Candidate] = [
+            (rule.category_id, rule.type_operation, rule.amount_min, rule.amount_max) for rule in rules
+        ]
+        # подстрока в нижнем регистре -> номера правил
+        self._substrings: Dict[str, List[int]] = {}
+        self._regexes: List[Tuple[int, re.Pattern]] = []
+        self._textless: List[int] = []
+        for number, rule in enumerate(rules):
+            if rule.kind == RuleKind.substring.value:
+                self._substrings.setdefault(rule.pattern.lower(), []).append(number)
+            elif rule.kind == RuleKind.regex.value:
+                self._regexes.append((number, re.compile(rule.pattern, re.IGNORECASE)))
+            else:
+                self._textless.append(number)
+
+        self._lengths = sorted({len(word) for word in self._substrings})
+        self._substring_search = (
+            re.compile(f"(?=({_trie_pattern(self._substrings)}))").finditer if self._substrings else None
+        )
+        # общее выражение только отсекает описания без совпадений: выражения
+        # с группами (и ссылками на них) в объединении поменяли бы смысл
+        self._regex_filter = None
+        self._regex_always = bool(self._regexes)
+        plain = [regex.pattern for _, regex in self._regexes if not regex.groups]
+        if plain and len(plain) == len(self._regexes):
+            try:
+                self._regex_filter = re.compile("|".join(f"(?:{pattern})" for pattern in plain),
+                                                re.IGNORECASE).search
+                self._regex_always = False
+            except re.error:
+                pass
+
+        self._candidates: Dict[Optional[str], Tuple[Candidate, ...]] = {}
+
+    def _matched_rules(self, description: str) -> Set[int]:
+        """Номера правил, условие которых по описанию выполнено"""
+
+        matched = set(self._textless)
+        if self._substring_search:
+            lowered = description.lower()
+            for found in self._substring_search(lowered):
+                longest = found.group(1)
+                for length in self._lengths:
+                    if length > len(longest):
+                        break
+                    matched.update(self._substrings.get(longest[:length], ()))
+
+        if self._regexes and (self._regex_always or self._regex_filter(description)):
+            matched.update(number for number, regex in self._regexes if regex.search(description))
+
+        return matched
+
+    def candidates(self, description: Optional[str]) -> Tuple[Candidate, ...]:
+        """Правила, подходящие по описанию, в порядке приоритета"""
+
+        candidates = self._candidates.get(description)
+        if candidates is None:
+            matched = self._matched_rules(description) if description else set(self._textless)
+            candidates = tuple(self._rules[number] for number in sorted(matched))
+            if len(self._candidates) >= DESCRIPTION_CACHE_SIZE:
+                self._candidates.clear()
+            self._candidates[description] = candidates
+
+        return candidates
+
+    def match(self, description: Optional[str], amount: Decimal, type_operation: str) -> Optional[int]:
+        """Категория первого подходящего правила или None"""
+
+        for category_id, rule_type, amount_min, amount_max in self.candidates(description):
+            if ((rule_type is None or rule_type == type_operation)
+                    and (amount_min is None or amount >= amount_min)
+                    and (amount_max is None or amount <= amount_max)):
+                return category_id
+
+        return None
+
+
+class MatcherCache:
+    """LRU-кеш скомпилированных правил пользователей по версии правил.
+
+    Версия хранится в users.rules_version и меняется в транзакции изменения
+    правил, поэтому воркеры замечают чужие изменения при следующей проверке"""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        # id пользователя -> (версия правил, скомпилированные правила)
+        self._entries: "OrderedDict[int, Tuple[int, CategoryMatcher]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, version: int) -> Optional[CategoryMatcher]:
+        """Правила пользователя этой версии или None"""
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id: int, version: int, matcher: CategoryMatcher) -> None:
+        """Кеширует правила пользователя"""
+
+        with self._lock:
+            self._entries[user_id] = (version, matcher)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+matcher_cache = MatcherCache(settings.category_matcher_cache_size)
+
+
+class CategoryService:
+    """Класс категорий, правил автокатегоризации и их применения к записям"""
+
+    def __init__(self, session: Session = Depends(create_session)) -> None:
+        """Инициализации сессии для работы с БД"""
+
+        self.session = session
+        self.sync = SyncService(session)
+
+    def _get(self, category_id: int, user_id: int) -> CategoryModel:
+        """Получение категории пользователя по id"""
+
+        category = self.session.query(CategoryModel).filter_by(id=category_id, user_id=user_id).first()
+
+        if not category:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Категория с id {category_id} не найдена")
+        return category
+
+    def _bump_rules(self, user_id: int) -> None:
+        """Новая версия правил пользователя: кешированные правила устаревают"""
+
+        self.session.execute(
+            update(users).where(users.c.id == user_id).values(rules_version=users.c.rules_version + 1)
+        )
+
+    def get_categories(self, user_id: int) -> List[CategoryModel]:
+        """Категории пользователя"""
+
+        return self.session.query(CategoryModel).filter_by(user_id=user_id).order_by(CategoryModel.id).all()
+
+    def create_category(self, category_data: CategoryCreate, user_id: int) -> CategoryModel:
+        """Создает категорию, имя уникально у пользователя"""
+
+        category = CategoryModel(**category_data.dict(), user_id=user_id)
+        self.session.add(category)
+        try:
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail=f"Категория {category_data.name} уже существует")
+
+        return category
+
+    def delete_category(self, category_id: int, user_id: int) -> None:
+        """Удаление категории вместе с ее правилами, если у нее нет записей"""
+
+        category = self._get(category_id, user_id)
+        used = self.session.execute(
+            select(records.c.id).where(records.c.user_id == user_id, records.c.category_id == category_id).limit(1)
+        ).first()
+        if used:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail=f"У категории с id {category_id} есть записи")
+
+        self.session.query(CategoryRuleModel).filter_by(category_id=category_id).delete()
+        self.session.delete(category)
+        self._bump_rules(user_id)
+        self.session.commit()
+
+    def get_rules(self, user_id: int) -> List[CategoryRuleModel]:
+        """Правила пользователя в порядке применения"""
+
+        return (self.session.query(CategoryRuleModel)
+                .filter_by(user_id=user_id)
+                .order_by(CategoryRuleModel.priority, CategoryRuleModel.id)
+                .all())
+
+    def create_rule(self, rule_data: CategoryRuleCreate, user_id: int) -> CategoryRuleModel:
+        """Создает правило. Существующие записи перекатегоризируются отдельно"""
+
+        self._get(rule_data.category_id, user_id)
+        rule = CategoryRuleModel(**rule_data.dict(), user_id=user_id)
+        self.session.add(rule)
+        self._bump_rules(user_id)
+        self.session.commit()
+
+        return rule
+
+    def delete_rule(self, rule_id: int, user_id: int) -> None:
+        """Удаление правила, категории записей остаются"""
+
+        deleted = self.session.query(CategoryRuleModel).filter_by(id=rule_id, user_id=user_id).delete()
+        if not deleted:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Правило с id {rule_id} не найдено")
+        self._bump_rules(user_id)
+        self.session.commit()
+
+    def matchers(self, user_ids: Iterable[int]) -> Dict[int, CategoryMatcher]:
+        """Скомпилированные правила пользователей: из кеша, если версия правил
+        не менялась, иначе правила читаются одним запросом и компилируются"""
+
+        # версия читается раньше правил: правила, измененные между запросами,
+        # закешируются под старой версией и будут перечитаны при следующей проверке
+        versions = dict(self.session.execute(
+            select(users.c.id, users.c.rules_version).where(users.c.id.in_(set(user_ids)))
+        ).all())
+
+        matchers = {}
+        for user_id, version in versions.items():
+            matcher = matcher_cache.get(user_id, version)
+            if matcher is not None:
+                matchers[user_id] = matcher
+
+        stale = [user_id for user_id in versions if user_id not in matchers]
+        if stale:
+            rules_by_user: Dict[int, List[Any]] = {user_id: [] for user_id in stale}
+            for rule in self.session.execute(select(rules_table).where(rules_table.c.user_id.in_(stale))):
+                rules_by_user[rule.user_id].append(rule)
+            for user_id, rules in rules_by_user.items():
+                matchers[user_id] = CategoryMatcher(rules)
+                matcher_cache.put(user_id, versions[user_id], matchers[user_id])
+
+        return matchers
+
+    def _check_manual(self, rows: List[dict], user_id: Optional[int]) -> None:
+        """Категории, указанные вручную, должны принадлежать владельцу записи"""
+
+        requested = {(row.get("user_id", user_id), row["category_id"])
+                     for row in rows if row.get("category_id") is not None}
+        if not requested:
+            return
+
+        owned = set(self.session.execute(
+            select(CategoryModel.user_id, CategoryModel.id)
+            .where(CategoryModel.id.in_({category_id for _, category_id in requested}))
+        ).all())
+        missing = sorted(category_id for _, category_id in requested - owned)
+        if missing:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Категория с id {missing[0]} не найдена")
+
+    def assign(self, rows: List[dict], user_id: Optional[int] = None) -> None:
+        """Проставляет строкам записей category_id и category_manual.
+
+        Категория, указанная в строке, остается (и проверяется), остальным
+        подбирается по правилам владельца; user_id - для строк без поля user_id"""
+
+        self._check_manual(rows, user_id)
+        matchers = self.matchers({row.get("user_id", user_id) for row in rows})
+        for row in rows:
+            if row.get("category_id") is not None:
+                row["category_manual"] = True
+                continue
+
+            matcher = matchers[row.get("user_id", user_id)]
+            row["category_id"] = matcher.match(row["description"], row["amount"], row["type_operation"])
+            row["category_manual"] = False
+
+    def recategorize(self, user_id: int, batch_size: Optional[int] = None) -> RecategorizeResult:
+        """Подбирает по текущим правилам категории всех записей пользователя,
+        кроме указанных вручную.
+
+        Записи читаются keyset-пагинацией по (created_at, id); записи с новой
+        категорией обновляются одним executemany на пачку с новыми номерами
+        изменений, каждая пачка фиксируется отдельно"""
+
+        batch_size = batch_size or settings.category_recategorize_batch_size
+        matcher = self.matchers([user_id])[user_id]
+        query = (
+            select(records.c.id, records.c.created_at, records.c.description, records.c.amount,
+                   records.c.type_operation, records.c.category_id)
+            .where(records.c.user_id == user_id, records.c.category_manual.isnot(True))
+            .order_by(records.c.created_at, records.c.id)
+            .limit(batch_size)
+        )
+        statement = (
+            update(records)
+            .where(records.c.id == bindparam("record_id"), records.c.category_manual.isnot(True))
+        )
+
+        result = RecategorizeResult(checked=0, changed=0)
+        page = query
+        while True:
+            rows = self.session.execute(page).all()
+            if not rows:
+                break
+
+            changed = []
+            for row in rows:
+                category_id = matcher.match(row.description, row.amount, row.type_operation)
+                if category_id != row.category_id:
+                    changed.append({"record_id": row.id, "category_id": category_id})
+
+            if changed:
+                # номера записей, вручную измененных между чтением и обновлением, станут дырами
+                first = self.sync.allocate(user_id, len(changed))
+                now = datetime.datetime.now()
+                self.session.execute(statement, [
+                    dict(row, change_seq=first + offset, updated_at=now) for offset, row in enumerate(changed)
+                ])
+            self.session.commit()
+
+            result.checked += len(rows)
+            result.changed += len(changed)
+            if len(rows) < batch_size:
+                break
+            last = rows[-1]
+            page = query.where(or_(records.c.created_at > last.created_at,
+                                   and_(records.c.created_at == last.created_at, records.c.id > last.id)))
+
+        return result
+
+
+def recategorize_users(user_ids: Optional[Sequence[int]] = None) -> RecategorizeResult:
+    """Перекатегоризация записей пользователей (по умолчанию всех) в отдельной сессии"""
+
+    total = RecategorizeResult(checked=0, changed=0)
+    with SessionFactory() as session:
+        if user_ids is None:
+            user_ids = [user_id for user_id, in session.execute(select(users.c.id).order_by(users.c.id))]
+
+        service = CategoryService(session)
+        for user_id in user_ids:
+            result = service.recategorize(user_id)
+            total.checked += result.checked
+            total.changed += result.changed
+            logger.info("Перекатегоризация user_id=%s: проверено %s, изменено %s",
+                        user_id, result.checked, result.changed)
+
+    return total
+
+
+class AsyncCategoryService(AsyncService):
+    """Асинхронная версия сервиса категорий"""
+
+    def _service(self, session: Session) -> CategoryService:
+        return CategoryService(session)
+
+    async def get_categories(self, user_id: int) -> List[CategoryModel]:
+        return await self._run(CategoryService.get_categories, user_id)
+
+    async def create_category(self, category_data: CategoryCreate, user_id: int) -> CategoryModel:
+        return await self._run(CategoryService.create_category, category_data, user_id)
+
+    async def delete_category(self, category_id: int, user_id: int) -> None:
+        return await self._run(CategoryService.delete_category, category_id, user_id)
+
+    async def get_rules(self, user_id: int) -> List[CategoryRuleModel]:
+        return await self._run(CategoryService.get_rules, user_id)
+
+    async def create_rule(self, rule_data: CategoryRuleCreate, user_id: int) -> CategoryRuleModel:
+        return await self._run(CategoryService.create_rule, rule_data, user_id)
+
+    async def delete_rule(self, rule_id: int, user_id: int) -> None:
+        return await self._run(CategoryService.delete_rule, rule_id, user_id)
+
+    async def recategorize(self, user_id: int) -> RecategorizeResult:
+        return await self._run(CategoryService.recategorize, user_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Перекатегоризация записей по текущим правилам категорий")
+    parser.add_argument("--user-id", type=int, action="append", dest="user_ids",
+                        help="только записи этого пользователя (можно повторять)")
+    arguments = parser.parse_args()
+
+    print(recategorize_users(arguments.user_ids))
@@ -1,11 +1,36 @@
 import csv
+import datetime
+import logging
+import shutil
+import tempfile
+import zlib
 from io import StringIO
-from typing import Any
+from itertools import islice
+from typing import (Any, AsyncIterator, Callable, Iterator, List, Optional,
+                    Tuple, Union)
 
 from fastapi import Depends
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
 
-from schemas.record_schemas import RecordBase
-from services.operations import OperationService
+from config import settings
+from models import RecordModel
+from schemas.import_schemas import ExportFormat
+from schemas.record_schemas import OperationType, RecordBase
+from services.base import AsyncService
+from services.export import TEXT_FORMATS, WRITERS, check_format
+from services.operations import RECORD_FIELDS, OperationService
+
+logger = logging.getLogger(__name__)
+
+# currency - последний необязательный столбец: файлы без него загружаются в базовой валюте
+CSV_FIELDS = ["created_at", "amount", "type_operation", "description", "external_id", "currency"]
+
+# (номер строки файла, описание ошибки)
+RowError = Tuple[int, str]
+Batch = Tuple[List[RecordBase], List[RowError]]
+# (обработано строк, добавлено записей, ошибки) для очередного пакета
+BatchCallback = Callable[[int, int, List[RowError]], None]
 
 
 class FileService:
@@ -16,39 +41,158 @@ class FileService:
 
         self.operation_service = operation_service
 
-    def dump_csv_file(self, user_id: int, file: Any) -> int:
-        """"""
+    @staticmethod
+    def save_upload(file: Any) -> str:
+        """Копирует загруженный файл во временный, чтобы фоновая задача
+        не зависела от закрытия UploadFile после ответа"""
 
-        reader = csv.DictReader(
-            (line.decode() for line in file),
-            fieldnames=["created_at", "amount", "type_operation", "description"]
-        )
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as output:
+            shutil.copyfileobj(file, output)
+
+        return output.name
+
+    @staticmethod
+    def _format_error(error: ValidationError) -> str:
+        """Краткое описание ошибки валидации строки"""
+
+        return "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors())
+
+    def _read_batches(self, lines: Iterator[str], batch_size: int) -> Iterator[Batch]:
+        """Разбирает и валидирует строки CSV пакетами по batch_size строк,
+        невалидные строки попадают в список ошибок с номером строки файла"""
+
+        reader = csv.DictReader(lines, fieldnames=CSV_FIELDS)
+        next(reader, None)
 
-        records = []
-        next(reader)
-        for row in reader:
-            record = RecordBase.parse_obj(row)
-            if record.description in ('', 'string'):
-                record.description = 'без описания'
-            records.append(record)
+        while True:
+            records, errors = [], []
+            for row in islice(reader, batch_size):
+                try:
+                    record = RecordBase.parse_obj(row)
+                except ValidationError as error:
+                    errors.append((reader.line_num, self._format_error(error)))
+                    continue
 
-        self.operation_service.create_many_records(records, user_id=user_id)
+                if record.description in ('', 'string'):
+                    record.description = 'без описания'
+                records.append(record)
 
-        return len(records)
+            if not records and not errors:
+                return
+            yield records, errors
+
+    def dump_csv_file(self,
+                      user_id: int,
+                      path: str,
+                      batch_size: Optional[int] = None,
+                      on_batch: Optional[BatchCallback] = None) -> int:
+
+        """Потоковая загрузка записей из CSV-файла пакетами,
+        каждый пакет вставляется и фиксируется отдельно.
+        Возвращает количество добавленных записей"""
+
+        batch_size = batch_size or settings.import_batch_size
+        processed = accepted = 0
+
+        with open(path, encoding="utf-8-sig", newline="") as file:
+            for records, errors in self._read_batches(file, batch_size):
+                inserted = self.operation_service.create_many_records(records, user_id=user_id)
+                processed += len(records) + len(errors)
+                accepted += inserted
+                logger.info("Импорт для user_id=%s: обработано %s строк, добавлено %s",
+                            user_id, processed, accepted)
+                if on_batch:
+                    on_batch(len(records) + len(errors), inserted, errors)
+
+        return accepted
+
+    def _csv_chunks(self,
+                    user_id: int,
+                    start: Optional[datetime.datetime],
+                    end: Optional[datetime.datetime],
+                    type_operation: Optional[OperationType]) -> Iterator[str]:
+
+        """CSV-фрагменты отчета, по одному на страницу записей"""
 
-    def load_csv_file(self, user_id: int) -> StringIO:
         output = StringIO()
-        writer = csv.DictWriter(
-            output,
-            fieldnames=["created_at", "amount", "type_operation", "description"],
-            extrasaction="ignore"
+        writer = csv.writer(output)
+        writer.writerow(CSV_FIELDS)
+
+        columns = [getattr(RecordModel, field) for field in CSV_FIELDS]
+        batches = self.operation_service.iter_record_batches(
+            user_id, columns, start=start, end=end, type_operation=type_operation
         )
+        for rows in batches:
+            writer.writerows(rows)
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+
+        yield output.getvalue()
+
+    @staticmethod
+    def _gzip(chunks: Iterator[Union[str, bytes]]) -> Iterator[bytes]:
+        """Сжимает поток фрагментов в gzip по мере поступления"""
+
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+
+        yield compressor.flush()
+
+    def load_csv_file(self,
+                      user_id: int,
+                      start: Optional[datetime.datetime] = None,
+                      end: Optional[datetime.datetime] = None,
+                      type_operation: Optional[OperationType] = None,
+                      compress: bool = False) -> Iterator[Union[str, bytes]]:
+
+        """Потоковая выгрузка записей пользователя в CSV,
+        память не зависит от количества записей"""
+
+        chunks = self._csv_chunks(user_id, start, end, type_operation)
+        if compress:
+            return self._gzip(chunks)
+
+        return chunks
+
+    def load_file(self,
+                  user_id: int,
+                  export_format: ExportFormat = ExportFormat.csv,
+                  start: Optional[datetime.datetime] = None,
+                  end: Optional[datetime.datetime] = None,
+                  type_operation: Optional[OperationType] = None,
+                  compress: bool = False) -> Iterator[Union[str, bytes]]:
+
+        """Потоковая выгрузка записей пользователя в формате export_format.
+
+        ndjson, parquet и arrow строятся из пачек кортежей, переложенных по
+        столбцам, без моделей на каждую запись; parquet и arrow сжаты zstd,
+        gzip применяется только к текстовым форматам"""
+
+        if export_format == ExportFormat.csv:
+            return self.load_csv_file(user_id, start, end, type_operation, compress)
+
+        check_format(export_format)
+        columns = [getattr(RecordModel, field) for field in RECORD_FIELDS]
+        batches = self.operation_service.iter_record_batches(
+            user_id, columns, start=start, end=end, type_operation=type_operation
+        )
+        chunks = WRITERS[export_format](batches, RECORD_FIELDS)
+        if compress and export_format in TEXT_FORMATS:
+            return self._gzip(chunks)
+
+        return chunks
+
+
+class AsyncFileService(AsyncService):
+    """Асинхронная версия сервиса работы с CSV-файлами"""
 
-        writer.writeheader()
-        records = self.operation_service.get_records(user_id=user_id)
-        for record in records:
-            data = RecordBase.from_orm(record)
-            writer.writerow(data.dict())
+    def _service(self, session: Session) -> FileService:
+        return FileService(OperationService(session))
 
-        output.seek(0)
-        return output
+    async def load_file(self, **kwargs: Any) -> AsyncIterator[Union[str, bytes]]:
+        chunks = await self._run(FileService.load_file, **kwargs)
+        return self._iterate(chunks)
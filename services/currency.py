@@ -0,0 +1,143 @@
+import argparse
+import csv
+import datetime
+import logging
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Iterable, List
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import case, delete, insert, select, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select, Subquery
+
+from config import settings
+from db_config import Session as SessionFactory
+from db_config import create_session
+from models import ExchangeRateModel
+from services.base import dialect_insert
+from services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+rates = ExchangeRateModel.__table__
+RATE_FIELDS = ["date", "currency", "rate"]
+RATES_BATCH_SIZE = 5000
+CENT = Decimal("0.01")
+
+
+def rate_to_base(currency: ColumnElement, day: ColumnElement) -> ColumnElement:
+    """Курс валюты в базовую на день: последний загруженный курс не позже day,
+    для базовой валюты - 1, NULL - если курса нет"""
+
+    latest = (
+        select(rates.c.rate)
+        .where(rates.c.currency == currency, rates.c.date <= day)
+        .order_by(rates.c.date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return case((currency == settings.base_currency, 1), else_=latest)
+
+
+def with_rates(rows: Select) -> Subquery:
+    """Строки rows (со столбцами currency и day) с курсом rate.
+
+    rows - уже агрегаты по дням и валютам, поэтому курс ищется по индексу
+    exchange_rates один раз на день и валюту, а не на каждую запись"""
+
+    rows = rows.subquery()
+    return select(rows, rate_to_base(rows.c.currency, rows.c.day).label("rate")).subquery()
+
+
+def check_rates(missing: int) -> None:
+    """Ошибка, если для части сумм не нашелся курс"""
+
+    if missing:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="Нет курса валюты на дату части записей, загрузите курсы")
+
+
+def to_cents(value: float) -> Decimal:
+    """Сумма в базовой валюте, округленная до копеек"""
+
+    return Decimal(value or 0).quantize(CENT)
+
+
+class CurrencyService:
+    """Класс таблицы курсов валют, загружаемой из CSV-файла"""
+
+    def __init__(self, session: Session = Depends(create_session)) -> None:
+        """Инициализации сессии для работы с БД"""
+
+        self.session = session
+
+    @staticmethod
+    def _parse(reader: csv.DictReader, row: dict) -> dict:
+        """Проверка строки файла курсов"""
+
+        try:
+            currency = row["currency"].strip().upper()
+            rate = Decimal(row["rate"])
+            if len(currency) != 3 or not currency.isalpha() or rate <= 0:
+                raise ValueError
+            return {"currency": currency, "date": datetime.date.fromisoformat(row["date"].strip()), "rate": rate}
+        except (AttributeError, InvalidOperation, ValueError):
+            raise ValueError(f"Строка {reader.line_num}: ожидается date,currency,rate, получено {row}")
+
+    def _upsert(self, rows: List[dict]) -> None:
+        """Вставка пачки курсов с заменой курса на ту же дату"""
+
+        statement = dialect_insert(self.session, rates)
+        if hasattr(statement, "on_conflict_do_update"):
+            self.session.execute(statement.on_conflict_do_update(
+                index_elements=[rates.c.currency, rates.c.date],
+                set_={"rate": statement.excluded.rate}
+            ), rows)
+            return
+
+        self.session.execute(delete(rates).where(
+            tuple_(rates.c.currency, rates.c.date).in_([(row["currency"], row["date"]) for row in rows])
+        ))
+        self.session.execute(insert(rates), rows)
+
+    def load_rates(self, lines: Iterable[str]) -> int:
+        """Загружает курсы из CSV с заголовком date,currency,rate пачками
+        в одной транзакции, возвращает количество строк. Итоги в базовой
+        валюте меняются, поэтому кеш ответов сбрасывается у всех пользователей"""
+
+        reader = csv.DictReader(lines, fieldnames=RATE_FIELDS)
+        next(reader, None)
+
+        loaded = 0
+        while True:
+            rows = [self._parse(reader, row) for row in islice(reader, RATES_BATCH_SIZE)]
+            if not rows:
+                break
+            self._upsert(rows)
+            loaded += len(rows)
+
+        if loaded:
+            response_cache.bump(self.session)
+        self.session.commit()
+        return loaded
+
+
+def load_rates_file(path: str) -> int:
+    """Загрузка файла курсов в отдельной сессии"""
+
+    with open(path, encoding="utf-8-sig", newline="") as file, SessionFactory() as session:
+        loaded = CurrencyService(session).load_rates(file)
+
+    logger.info("Курсы валют: загружено %s строк из %s", loaded, path)
+    return loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Загрузка курсов валют из CSV-файла date,currency,rate")
+    parser.add_argument("path", nargs="?", default=settings.exchange_rates_file)
+    arguments = parser.parse_args()
+    if not arguments.path:
+        parser.error("укажите файл курсов или EXCHANGE_RATES_FILE")
+
+    print(f"exchange_rates: {load_rates_file(arguments.path)} строк")
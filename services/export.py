@@ -0,0 +1,144 @@
+import io
+from typing import Iterator, List, Sequence
+
+from fastapi import HTTPException, status
+
+from config import settings
+from schemas.import_schemas import ExportFormat
+from services.serialization import dumps
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # необязательная зависимость: без нее доступны csv и ndjson
+    pa = pq = None
+
+COLUMNAR_FORMATS = (ExportFormat.parquet, ExportFormat.arrow)
+# колоночные форматы сжаты сами (zstd по столбцам), gzip к ним не применяется
+TEXT_FORMATS = (ExportFormat.csv, ExportFormat.ndjson)
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv",
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+    ExportFormat.arrow: "application/vnd.apache.arrow.file",
+}
+
+COMPRESSION = "zstd"
+
+# пачка строк записей: кортежи значений в порядке выгружаемых полей
+Batch = List[Sequence]
+
+
+def check_format(export_format: ExportFormat) -> None:
+    """Ошибка до начала ответа, если для формата нет pyarrow"""
+
+    if export_format in COLUMNAR_FORMATS and pa is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Формат {export_format.value} недоступен: не установлен pyarrow")
+
+
+def arrow_schema(fields: Sequence[str]) -> "pa.Schema":
+    """Схема Arrow для полей записи: сумма - decimal, как в БД"""
+
+    types = {
+        "id": pa.int64(),
+        "created_at": pa.timestamp("us"),
+        "amount": pa.decimal128(10, 2),
+        "type_operation": pa.string(),
+        "description": pa.string(),
+        "external_id": pa.string(),
+        "currency": pa.string(),
+        "category_id": pa.int64(),
+    }
+    return pa.schema([(field, types[field]) for field in fields])
+
+
+def _record_batch(rows: Batch, schema: "pa.Schema") -> "pa.RecordBatch":
+    """Пачка строк, переложенная по столбцам"""
+
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Файл только для записи, из которого записанные байты забираются
+    фрагментами ответа: писателям pyarrow нужен файл, а не генератор"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        """Байты, записанные после предыдущего вызова"""
+
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def ndjson_chunks(batches: Iterator[Batch], fields: Sequence[str]) -> Iterator[bytes]:
+    """JSON-объект записи на строку, по фрагменту на пачку"""
+
+    for rows in batches:
+        yield b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+def arrow_chunks(batches: Iterator[Batch], fields: Sequence[str]) -> Iterator[bytes]:
+    """Файл Arrow IPC (Feather v2) со сжатием zstd, по фрагменту на пачку.
+    Файловый формат пишется последовательно: оглавление - в конце"""
+
+    schema = arrow_schema(fields)
+    sink = _ChunkSink()
+    options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+    with pa.ipc.new_file(pa.PythonFile(sink, mode="w"), schema, options=options) as writer:
+        for rows in batches:
+            writer.write_batch(_record_batch(rows, schema))
+            yield sink.take()
+
+    yield sink.take()
+
+
+def parquet_chunks(batches: Iterator[Batch], fields: Sequence[str]) -> Iterator[bytes]:
+    """Файл Parquet со сжатием zstd. Пачки копятся до export_row_group_size
+    строк: мелкие группы строк хуже сжимаются и медленнее читаются"""
+
+    schema = arrow_schema(fields)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression=COMPRESSION) as writer:
+        group: List["pa.RecordBatch"] = []
+        size = 0
+        for rows in batches:
+            group.append(_record_batch(rows, schema))
+            size += len(rows)
+            if size >= settings.export_row_group_size:
+                writer.write_table(pa.Table.from_batches(group), row_group_size=size)
+                group, size = [], 0
+                yield sink.take()
+
+        if group:
+            writer.write_table(pa.Table.from_batches(group), row_group_size=size)
+
+    yield sink.take()
+
+
+WRITERS = {
+    ExportFormat.ndjson: ndjson_chunks,
+    ExportFormat.parquet: parquet_chunks,
+    ExportFormat.arrow: arrow_chunks,
+}
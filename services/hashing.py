@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+from passlib.hash import bcrypt
+
+from config import settings
+from services.metrics import metrics
+
+
+def _hash(password: str, rounds: int) -> str:
+    """Хеширование пароля в процессе пула"""
+
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def _verify(password: str, hash_password: str) -> bool:
+    """Проверка пароля в процессе пула"""
+
+    return bcrypt.verify(password, hash_password)
+
+
+class PasswordHasher:
+    """Пул процессов для bcrypt с ограниченной очередью.
+
+    Хеширование не держит GIL процесса приложения, а при заполненной
+    очереди запрос сразу получает 503 с Retry-After вместо ожидания"""
+
+    def __init__(self, workers: int, queue_size: int, rounds: int) -> None:
+        self.workers = workers
+        self.rounds = rounds
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self.in_flight = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Пул процессов, создается при первом обращении. Процессы
+        запускаются через spawn: fork из воркера с потоками (пул потоков,
+        планировщик) копирует чужие захваченные блокировки"""
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _submit(self, function: Callable[..., Any], *args: Any) -> Future:
+        """Ставит задачу в пул, если в очереди есть место"""
+
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервис перегружен, повторите запрос позже",
+                headers={"Retry-After": str(settings.hashing_retry_after)}
+            )
+
+        try:
+            future = self.executor.submit(function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.in_flight += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _: Future) -> None:
+        """Освобождает место в очереди после выполнения задачи"""
+
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._submit(_hash, password, self.rounds).result()
+
+    def verify(self, password: str, hash_password: str) -> bool:
+        return self._submit(_verify, password, hash_password).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password, self.rounds))
+
+    async def verify_async(self, password: str, hash_password: str) -> bool:
+        return await asyncio.wrap_future(self._submit(_verify, password, hash_password))
+
+    def needs_rehash(self, hash_password: str) -> bool:
+        """Хеш создан с другой стоимостью bcrypt и должен быть пересчитан"""
+
+        return bcrypt.using(rounds=self.rounds).needs_update(hash_password)
+
+    def shutdown(self) -> None:
+        """Останавливает пул процессов"""
+
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.hashing_workers,
+    queue_size=settings.hashing_queue_size,
+    rounds=settings.bcrypt_rounds
+)
+
+metrics.gauge("hashing_in_flight", "Задачи bcrypt в пуле процессов и в очереди к нему",
+              lambda: password_hasher.in_flight)
@@ -0,0 +1,239 @@
+import csv
+import datetime
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from io import StringIO
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
+
+from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_config import Session as SessionFactory
+from db_config import create_session
+from models import ImportErrorModel, ImportJobModel
+from schemas.import_schemas import ImportState
+from services.base import AsyncService
+from services.csv_load import FileService, RowError
+from services.metrics import metrics
+from services.operations import OperationService
+
+logger = logging.getLogger(__name__)
+
+# пул ограничивает число одновременно выполняемых импортов,
+# остальные задачи ждут в очереди в состоянии pending
+import_executor = ThreadPoolExecutor(
+    max_workers=settings.import_workers,
+    thread_name_prefix="csv-import"
+)
+
+# задачи пула: future -> (id задачи импорта, путь к файлу)
+_import_futures: Dict[Future, Tuple[int, str]] = {}
+_import_futures_lock = threading.Lock()
+import_draining = threading.Event()
+# задачи, поставленные в пул и еще не начатые
+_import_queued = 0
+
+
+def _queued() -> int:
+    with _import_futures_lock:
+        return _import_queued
+
+
+def _track_queued(delta: int) -> None:
+    global _import_queued
+    with _import_futures_lock:
+        _import_queued += delta
+
+
+metrics.gauge("import_queue_size", "Задачи импорта, ожидающие свободного потока", _queued)
+
+
+def _forget_future(future: Future) -> None:
+    with _import_futures_lock:
+        _import_futures.pop(future, None)
+    # отмененная задача не начиналась и из очереди уходит здесь
+    if future.cancelled():
+        _track_queued(-1)
+
+
+def _start_import_job(job_id: int, user_id: int, path: str) -> None:
+    """Задача импорта в потоке пула: уходит из очереди при начале выполнения"""
+
+    _track_queued(-1)
+    run_import_job(job_id, user_id, path)
+
+
+def drain_imports(timeout: float) -> None:
+    """Остановка приема импортов и ожидание выполнения поставленных задач.
+
+    Задачи, не начатые за timeout секунд, отменяются и помечаются failed,
+    начатые - дорабатывают до выхода процесса (потоки пула не прерываются)"""
+
+    import_draining.set()
+    with _import_futures_lock:
+        futures = dict(_import_futures)
+
+    _, not_done = wait(futures, timeout=timeout)
+
+    cancelled = [futures[future] for future in not_done if future.cancel()]
+    running = len(not_done) - len(cancelled)
+    if running:
+        logger.warning("Остановка сервера: %s задач импорта не завершились за %s с", running, timeout)
+
+    if cancelled:
+        session = SessionFactory()
+        try:
+            session.query(ImportJobModel).filter(ImportJobModel.id.in_([job_id for job_id, _ in cancelled])).update(
+                {"state": ImportState.failed.value, "error": "Импорт прерван остановкой сервера",
+                 "finished_at": datetime.datetime.now()},
+                synchronize_session=False
+            )
+            session.commit()
+        finally:
+            session.close()
+
+        for _, path in cancelled:
+            os.remove(path)
+
+    import_executor.shutdown(wait=False)
+
+
+def run_import_job(job_id: int, user_id: int, path: str) -> None:
+    """Выполняет задачу импорта в отдельной сессии и обновляет ее статус"""
+
+    session = SessionFactory()
+    job = session.get(ImportJobModel, job_id)
+
+    def on_batch(processed: int, accepted: int, errors: List[RowError]) -> None:
+        stored = job.rows_rejected
+        job.rows_processed += processed
+        job.rows_accepted += accepted
+        job.rows_rejected += len(errors)
+        # валидные строки, которые не вставились, пропущены как повтор external_id
+        job.rows_duplicate += processed - accepted - len(errors)
+
+        limit = max(settings.import_max_errors - stored, 0)
+        session.add_all(ImportErrorModel(job_id=job_id, line=line, error=error)
+                        for line, error in errors[:limit])
+        session.commit()
+
+    try:
+        job.state = ImportState.running.value
+        job.started_at = datetime.datetime.now()
+        session.commit()
+
+        service = FileService(OperationService(session))
+        service.dump_csv_file(user_id, path, on_batch=on_batch)
+
+        job.state = ImportState.done.value
+    except Exception as error:
+        logger.exception("Задача импорта %s завершилась с ошибкой", job_id)
+        session.rollback()
+        job.state = ImportState.failed.value
+        job.error = str(error)
+    finally:
+        job.finished_at = datetime.datetime.now()
+        session.commit()
+        session.close()
+        os.remove(path)
+
+
+class ImportJobService:
+    """Класс задач импорта записей из CSV-файлов"""
+
+    def __init__(self, session: Session = Depends(create_session)) -> None:
+        """Инициализации сессии для работы с БД"""
+
+        self.session = session
+
+    def _get(self, job_id: int, user_id: int) -> ImportJobModel:
+        """Получение задачи импорта пользователя по id"""
+
+        job = self.session.query(ImportJobModel).filter_by(id=job_id, user_id=user_id).first()
+
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Задача импорта с id {job_id} не найдена")
+        return job
+
+    def submit(self, user_id: int, filename: str, path: str) -> ImportJobModel:
+        """Создает задачу импорта сохраненного файла и ставит ее в очередь пула"""
+
+        if import_draining.is_set():
+            os.remove(path)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервер перезапускается, повторите загрузку позже",
+                headers={"Retry-After": str(settings.import_drain_timeout)}
+            )
+
+        job = ImportJobModel(user_id=user_id, filename=filename, state=ImportState.pending.value)
+        self.session.add(job)
+        self.session.commit()
+
+        _track_queued(1)
+        try:
+            future = import_executor.submit(_start_import_job, job.id, user_id, path)
+        except RuntimeError:  # пул уже остановлен
+            _track_queued(-1)
+            raise
+        with _import_futures_lock:
+            _import_futures[future] = (job.id, path)
+        future.add_done_callback(_forget_future)
+
+        return job
+
+    def get(self, job_id: int, user_id: int) -> ImportJobModel:
+        """Получение статуса задачи импорта"""
+
+        return self._get(job_id, user_id)
+
+    def _iter_errors(self, job_id: int) -> Iterator[str]:
+        """Построчные ошибки задачи импорта в виде CSV-фрагментов"""
+
+        query = (self.session.query(ImportErrorModel.line, ImportErrorModel.error)
+                 .filter_by(job_id=job_id)
+                 .order_by(ImportErrorModel.line))
+
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerow(["line", "error"])
+        for row in query.yield_per(settings.import_batch_size):
+            writer.writerow(row)
+            if output.tell() >= 64 * 1024:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+
+        yield output.getvalue()
+
+    def error_report(self, job_id: int, user_id: int) -> Iterator[str]:
+        """CSV-отчет об отклоненных строках задачи импорта"""
+
+        self._get(job_id, user_id)
+
+        return self._iter_errors(job_id)
+
+
+class AsyncImportJobService(AsyncService):
+    """Асинхронная версия сервиса задач импорта"""
+
+    def _service(self, session: Session) -> ImportJobService:
+        return ImportJobService(session)
+
+    async def submit(self, user_id: int, filename: str, file: Any) -> ImportJobModel:
+        """Сохраняет загруженный файл в пуле потоков и ставит задачу в очередь"""
+
+        path = await run_in_threadpool(FileService.save_upload, file)
+        return await self._run(ImportJobService.submit, user_id, filename, path)
+
+    async def get(self, job_id: int, user_id: int) -> ImportJobModel:
+        return await self._run(ImportJobService.get, job_id, user_id)
+
+    async def error_report(self, job_id: int, user_id: int) -> AsyncIterator[str]:
+        report = await self._run(ImportJobService.error_report, job_id, user_id)
+        return self._iterate(report)
@@ -0,0 +1,264 @@
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Sequence,
+                    Tuple)
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Метки в формате Prometheus: {name="value",...}"""
+
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Счетчик с метками"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    """Гистограмма с метками и накопительными корзинами le"""
+
+    kind = "histogram"
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # метки -> (счетчики по корзинам, сумма, количество)
+        self._values: Dict[Labels, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[index] += 1
+            self._values[labels] = (counts, total + value, count + 1)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items()]
+
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket
+                bound_label = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, bound_label)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {count}"
+
+
+class Gauge:
+    """Показатель, значение которого считывается функцией при выгрузке"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def samples(self) -> Iterator[str]:
+        yield f"{self.name} {self.read()}"
+
+
+class CounterFunction(Gauge):
+    """Счетчик, который ведется вне реестра и считывается функцией при выгрузке"""
+
+    kind = "counter"
+
+
+class MetricsRegistry:
+    """Набор метрик приложения в текстовом формате Prometheus"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, metric: Any) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self,
+                  name: str,
+                  documentation: str,
+                  labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, documentation, read))
+
+    def counter_function(self, name: str, documentation: str, read: Callable[[], float]) -> CounterFunction:
+        return self._register(CounterFunction(name, documentation, read))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "http_requests_total", "Количество HTTP-запросов", ("method", "route", "status")
+)
+http_duration = metrics.histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "route")
+)
+http_queries = metrics.histogram(
+    "http_request_db_queries", "Количество запросов к БД на один HTTP-запрос", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS
+)
+db_duration = metrics.histogram("db_query_duration_seconds", "Время выполнения запроса к БД")
+db_pool_wait = metrics.histogram("db_pool_wait_seconds", "Ожидание свободного соединения в пуле")
+sqlite_write_lock_wait = metrics.histogram(
+    "sqlite_write_lock_wait_seconds", "Ожидание блокировки записи SQLite"
+)
+
+
+class RequestStats:
+    """Запросы к БД в рамках одного HTTP-запроса"""
+
+    __slots__ = ("queries", "query_time")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.query_time = 0.0
+
+
+# объект общий для копий контекста, поэтому запросы из пула потоков
+# и из run_sync асинхронной сессии учитываются в своем HTTP-запросе
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Замер времени запросов движка и журнал медленных запросов"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(connection: Any, *_: Any) -> None:
+        connection.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(connection: Any, cursor: Any, statement: str, *_: Any) -> None:
+        elapsed = time.perf_counter() - connection.info["query_started"].pop()
+        db_duration.observe(elapsed)
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += elapsed
+
+        if elapsed >= settings.slow_query_threshold:
+            logger.warning("Медленный запрос к БД (%.3f с): %s", elapsed, statement[:1000])
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(context: Any) -> None:
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+class TimedPoolMixin:
+    """Замер ожидания соединения для пулов SQLAlchemy"""
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: время и число запросов к БД по маршрутам,
+    журнал медленных HTTP-запросов"""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+
+            # шаблон маршрута, а не путь, чтобы не плодить метки по id
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+
+            http_requests.inc(method, path, str(status_code))
+            http_duration.observe(elapsed, method, path)
+            http_queries.observe(stats.queries, method, path)
+
+            if elapsed >= settings.slow_request_threshold:
+                logger.warning("Медленный запрос %s %s (%.3f с): %s запросов к БД за %.3f с",
+                               method, scope["path"], elapsed, stats.queries, stats.query_time)
@@ -1,13 +1,56 @@
+import base64
+import csv
 import datetime
-from typing import List, Optional, Tuple
+from decimal import Decimal
+from io import StringIO
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Sequence,
+                    Set, Tuple)
 
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
-
+from sqlalchemy import bindparam, case, delete, func, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.sql import Insert
+
+from config import settings
 from db_config import create_session
 from models import RecordModel
-from schemas.record_schemas import (OperationType, RecordBase,
-                                    RecordCreate, RecordUpdate)
+from schemas.record_schemas import (BalanceSummary, BatchAction,
+                                    BatchOperation, BatchResult, OperationType,
+                                    PeriodRecords, RecordBase, RecordChanges,
+                                    RecordCreate, RecordPage, RecordSearch,
+                                    RecordUpdate)
+from services.balances import BalanceService
+from services.base import AsyncService, dialect_insert
+from services.categories import CategoryService
+from services.currency import check_rates, to_cents, with_rates
+from services.search import search_condition
+from services.sync import SyncService
+
+COPY_COLUMNS = ("created_at", "amount", "type_operation", "description", "external_id", "user_id",
+                "updated_at", "change_seq", "currency", "category_id", "category_manual")
+RECORD_FIELDS = ("id", "created_at", "amount", "type_operation", "description", "external_id", "currency",
+                 "category_id")
+
+
+def encode_cursor(cursor: Tuple[datetime.datetime, int]) -> str:
+    """Непрозрачный курсор keyset-пагинации из (created_at, id)"""
+
+    created_at, record_id = cursor
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{record_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """Разбор курсора keyset-пагинации"""
+
+    try:
+        created_at, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.datetime.fromisoformat(created_at), int(record_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Невалидный курсор")
 
 
 class OperationService:
@@ -17,6 +60,9 @@ class OperationService:
         """Инициализации сессии для работы с БД"""
 
         self.session = session
+        self.balances = BalanceService(session)
+        self.sync = SyncService(session)
+        self.categories = CategoryService(session)
 
     def _get(self, record_id: int, user_id: int) -> RecordModel:
         """Получение записи по id"""
@@ -28,106 +74,378 @@ class OperationService:
                                 detail=f"Запись с id {record_id} не найдена")
         return record
 
-    def _get_records_by_user(self, user_id: int) -> List[RecordModel]:
-        """Получение всех записей для пользоваля по его id"""
+    def _commit(self, external_id: Optional[str] = None) -> None:
+        """Фиксирует транзакцию, повтор external_id у пользователя - конфликт"""
 
-        query = self.session.query(RecordModel).filter_by(user_id=user_id).all()
+        try:
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail=f"Запись с external_id {external_id} уже существует")
 
-        return query
+    def _apply_balance(self, record: RecordModel, sign: int = 1) -> None:
+        """Учитывает запись в дневных итогах пользователя"""
 
-    def _calculate_sum(self, record: RecordModel) -> int:
-        """Считает сумму трат/доходов за определенный период"""
+        self.balances.apply(record.user_id, record.created_at, record.type_operation, record.amount,
+                            record.currency, sign)
 
-        if record.type_operation == 'income':
-            self.total_sum += record.amount
-        elif record.type_operation == 'expenses':
-            self.total_sum -= record.amount
+    def _get_period(self,
+                    by_day: Optional,
+                    by_week: Optional,
+                    by_month: Optional) -> Tuple[datetime.datetime, datetime.datetime]:
 
-        return self.total_sum
+        """Границы полуинтервала [start, end) для флагов by_day/by_week/by_month"""
 
-    def _get_by_time(self,
-                     user_id: int, by_day: Optional,
-                     by_week: Optional, by_month: Optional) -> List[RecordModel]:
+        today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        end = today + datetime.timedelta(days=1)
 
-        """Получение записей из БД за определенный промежутое времени,
-        исходя из флага by_day/by_week/by_month"""
+        if by_day:
+            return today, end
+        elif by_week:
+            return today - datetime.timedelta(days=7), end
+        elif by_month:
+            return today - datetime.timedelta(days=30), end
 
-        result = []
-        self.total_sum = 0
-        now = datetime.datetime.now().date()
-        records = self._get_records_by_user(user_id)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Не указан период выборки")
 
-        for record in records:
-            if by_day:
-                if record.created_at.date() == now:
-                    result.append(record)
-                    self._calculate_sum(record)
-            elif by_week:
-                if now - datetime.timedelta(days=7) <= record.created_at.date() <= now:
-                    result.append(record)
-                    self._calculate_sum(record)
+    def _filter_by_period(self,
+                          query: Query,
+                          user_id: int,
+                          start: Optional[datetime.datetime] = None,
+                          end: Optional[datetime.datetime] = None) -> Query:
 
-            elif by_month:
-                if now - datetime.timedelta(days=30) <= record.created_at.date() <= now:
-                    result.append(record)
-                    self._calculate_sum(record)
+        """Фильтр запроса по пользователю и полуинтервалу [start, end)"""
 
-        return result
+        query = query.filter(RecordModel.user_id == user_id)
+        if start is not None:
+            query = query.filter(RecordModel.created_at >= start)
+        if end is not None:
+            query = query.filter(RecordModel.created_at < end)
 
-    def get_records(self,
-                    user_id: int,
-                    type_operation: Optional[OperationType] = None) -> List[RecordModel]:
+        return query
+
+    def _calculate_sum(self,
+                       user_id: int,
+                       start: Optional[datetime.datetime] = None,
+                       end: Optional[datetime.datetime] = None) -> Decimal:
+
+        """Считает сумму доходов за вычетом расходов за период в базовой валюте
+        на стороне БД, для периода из целых дней - по дневным итогам daily_balances.
+        Суммы сначала складываются по дням и валютам, затем умножаются на курс"""
 
-        """Получение всех записей и фильтр их по полю 'type_opearion'"""
+        midnight = datetime.time()
+        if start and end and start.time() == midnight and end.time() == midnight:
+            return self.balances.summary(user_id, start.date(), end.date()).total
 
-        query = self.session.query(RecordModel).filter_by(user_id=user_id)
+        signed_amount = case(
+            (RecordModel.type_operation == OperationType.income.value, RecordModel.amount),
+            (RecordModel.type_operation == OperationType.outcome.value, -RecordModel.amount),
+            else_=0
+        )
+        day = func.date(RecordModel.created_at)
+        query = self.session.query(func.sum(signed_amount).label("amount"), RecordModel.currency,
+                                   day.label("day"))
+        days = with_rates(self._filter_by_period(query, user_id, start, end).group_by(RecordModel.currency, day))
+
+        total_sum, missing = self.session.execute(
+            select(func.sum(days.c.amount * days.c.rate), func.count() - func.count(days.c.rate))
+        ).one()
+        check_rates(missing)
+
+        return to_cents(total_sum)
+
+    def get_records(self,
+                    user_id: int,
+                    type_operation: Optional[OperationType] = None,
+                    limit: int = 100,
+                    after: Optional[str] = None,
+                    before: Optional[str] = None,
+                    fields: Optional[Sequence[str]] = None) -> RecordPage:
+
+        """Страница записей с фильтром по полю 'type_opearion',
+        keyset-пагинацией по (created_at, id) и выбором полей"""
+
+        fields = list(fields or RECORD_FIELDS)
+        unknown = set(fields) - set(RECORD_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Неизвестные поля: {', '.join(sorted(unknown))}")
+        if after and before:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Укажите только один из параметров after/before")
+
+        size = len(fields)
+        query = self.session.query(*(getattr(RecordModel, field) for field in fields),
+                                   RecordModel.created_at, RecordModel.id)
+        query = query.filter(RecordModel.user_id == user_id)
         if type_operation:
-            query = query.filter_by(type_operation=type_operation)
-        all_records = query.all()
+            query = query.filter(RecordModel.type_operation == type_operation)
+
+        if before:
+            query = self._before_cursor(query, decode_cursor(before))
+            query = query.order_by(RecordModel.created_at.desc(), RecordModel.id.desc())
+        else:
+            if after:
+                query = self._after_cursor(query, decode_cursor(after))
+            query = query.order_by(RecordModel.created_at, RecordModel.id)
+
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if before:
+            rows.reverse()
+
+        return RecordPage(
+            items=[dict(zip(fields, row[:size])) for row in rows],
+            next_cursor=encode_cursor(rows[-1][size:]) if rows and (has_more or before) else None,
+            prev_cursor=encode_cursor(rows[0][size:]) if rows and (after or (before and has_more)) else None
+        )
+
+    def search(self,
+               user_id: int,
+               text: str,
+               start: Optional[datetime.datetime] = None,
+               end: Optional[datetime.datetime] = None,
+               type_operation: Optional[OperationType] = None,
+               limit: int = 50,
+               before: Optional[str] = None) -> RecordSearch:
+
+        """Записи, в описании которых есть все слова text, за полуинтервал
+        [start, end) с фильтром по типу, от новых к старым страницами по limit"""
+
+        table = RecordModel.__table__
+        query = (
+            self.session.query(*(table.c[field] for field in RECORD_FIELDS))
+            .filter(search_condition(self.session, text, user_id))
+        )
+        if start is not None:
+            query = query.filter(RecordModel.created_at >= start)
+        if end is not None:
+            query = query.filter(RecordModel.created_at < end)
+        if type_operation:
+            query = query.filter(RecordModel.type_operation == type_operation)
+        if before:
+            query = self._before_cursor(query, decode_cursor(before))
+
+        rows = query.order_by(RecordModel.created_at.desc(), RecordModel.id.desc()).limit(limit + 1).all()
+        items = [dict(zip(RECORD_FIELDS, row)) for row in rows[:limit]]
+
+        return RecordSearch.construct(
+            items=items,
+            next_cursor=encode_cursor((items[-1]["created_at"], items[-1]["id"])) if len(rows) > limit else None
+        )
+
+    def _before_cursor(self, query: Query, cursor: Tuple[datetime.datetime, int]) -> Query:
+        """Keyset-условие: записи строго до курсора (created_at, id)"""
+
+        created_at, record_id = cursor
+        return query.filter(
+            RecordModel.created_at <= created_at,
+            or_(RecordModel.created_at < created_at, RecordModel.id < record_id)
+        )
+
+    def _after_cursor(self, query: Query, cursor: Tuple[datetime.datetime, int]) -> Query:
+        """Keyset-условие: записи строго после курсора (created_at, id)"""
+
+        created_at, record_id = cursor
+        return query.filter(
+            RecordModel.created_at >= created_at,
+            or_(RecordModel.created_at > created_at, RecordModel.id > record_id)
+        )
+
+    def iter_record_batches(self,
+                            user_id: int,
+                            columns: Sequence[InstrumentedAttribute],
+                            start: Optional[datetime.datetime] = None,
+                            end: Optional[datetime.datetime] = None,
+                            type_operation: Optional[OperationType] = None,
+                            batch_size: Optional[int] = None) -> Iterator[List[Row]]:
+
+        """Обход записей пользователя страницами по batch_size строк
+        keyset-пагинацией по (created_at, id) без создания ORM-объектов"""
+
+        batch_size = batch_size or settings.export_batch_size
+        size = len(columns)
+
+        query = self.session.query(*columns, RecordModel.created_at, RecordModel.id)
+        query = self._filter_by_period(query, user_id, start, end)
+        if type_operation:
+            query = query.filter(RecordModel.type_operation == type_operation)
+        query = query.order_by(RecordModel.created_at, RecordModel.id)
+
+        page = query
+        while True:
+            rows = page.limit(batch_size).all()
+            if not rows:
+                return
 
-        return all_records
+            yield [row[:size] for row in rows]
+            if len(rows) < batch_size:
+                return
+            page = self._after_cursor(query, rows[-1][size:])
 
     def get(self, record_id: int, user_id: int) -> RecordModel:
         """Получение записей пользователя"""
 
         return self._get(record_id, user_id)
 
+    def get_by_period(self,
+                      user_id: int,
+                      start: datetime.datetime,
+                      end: datetime.datetime) -> PeriodRecords:
+
+        """Получение записей и общей суммы за полуинтервал [start, end).
+        Записи читаются кортежами через Core и не проходят валидацию моделей"""
+
+        if start >= end:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Начало периода должно быть раньше конца")
+
+        table = RecordModel.__table__
+        rows = self.session.execute(
+            select(*(table.c[field] for field in RECORD_FIELDS))
+            .where(table.c.user_id == user_id, table.c.created_at >= start, table.c.created_at < end)
+            .order_by(table.c.created_at, table.c.id)
+        )
+
+        return PeriodRecords.construct(
+            start=start,
+            end=end,
+            total=self._calculate_sum(user_id, start, end),
+            currency=settings.base_currency,
+            records=[dict(zip(RECORD_FIELDS, row)) for row in rows]
+        )
+
+    def get_summary(self, user_id: int, start: datetime.date, end: datetime.date) -> BalanceSummary:
+        """Итоги доходов и расходов за дни [start, end) по дневным итогам"""
+
+        if start >= end:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Начало периода должно быть раньше конца")
+
+        return self.balances.summary(user_id, start, end)
+
+    def get_changes(self, user_id: int, since: int, limit: int) -> RecordChanges:
+        """Созданные, измененные и удаленные записи после номера изменения since"""
+
+        return self.sync.changes(user_id, since, limit)
+
     def get_by_time(self,
                     user_id: int,
                     by_day: Optional = None,
                     by_week: Optional = None,
-                    by_month: Optional = None) -> Tuple[List[RecordModel], int]:
+                    by_month: Optional = None) -> PeriodRecords:
 
         """Получение записей из БД за определенный промежутое времени,
         исходя из флага by_day/by_week/by_month"""
 
-        result = self._get_by_time(user_id, by_day, by_week, by_month)
+        start, end = self._get_period(by_day, by_week, by_month)
+
+        return self.get_by_period(user_id, start, end)
+
+    def _insert_records(self) -> Insert:
+        """INSERT в records, пропускающий дубликаты (user_id, external_id)"""
+
+        statement = dialect_insert(self.session, RecordModel.__table__)
+        if hasattr(statement, "on_conflict_do_nothing"):
+            return statement.on_conflict_do_nothing()
 
-        return result, self.total_sum
+        return statement
 
     def create_many_records(self,
-                            records_data: List[RecordBase],
-                            user_id: int) -> List[RecordModel]:
+                            records_data: Iterable[RecordBase],
+                            user_id: int) -> int:
 
-        """Создает несколько записей об операции дохода/расхода в БД"""
+        """Создает несколько записей об операции дохода/расхода в БД
+        одним executemany, возвращает количество добавленных записей"""
 
-        records = [RecordModel(**record.dict(),
-                               user_id=user_id
-                               )
-                   for record in records_data]
-        self.session.add_all(records)
+        # модель плоская: dict(record) дает те же поля, что record.dict(), без его накладных расходов
+        rows = [dict(record, user_id=user_id) for record in records_data]
+        if not rows:
+            return 0
+
+        inserted = self.insert_records(rows)
         self.session.commit()
 
-        return records
+        return inserted
+
+    def insert_records(self, rows: List[dict]) -> int:
+        """Пакетная вставка записей (в том числе разных пользователей) с пропуском
+        дубликатов (user_id, external_id), подбором категорий по правилам и пересчетом
+        дневных итогов затронутых дней.
+        Транзакцию фиксирует вызывающий, возвращает количество добавленных записей"""
+
+        counts: Dict[int, int] = {}
+        for row in rows:
+            counts[row["user_id"]] = counts.get(row["user_id"], 0) + 1
+        # номера пропущенных дубликатов остаются дырами в последовательности
+        next_seq = self.sync.allocate_many(counts)
+        now = datetime.datetime.now()
+        numbered = []
+        for row in rows:
+            numbered.append(dict(row, updated_at=now, change_seq=next_seq[row["user_id"]]))
+            next_seq[row["user_id"]] += 1
+        rows = numbered
+        self.categories.assign(rows)
+
+        if settings.pg_copy_import and self.session.get_bind().dialect.driver == "psycopg2":
+            inserted = self._copy_records(rows)
+        else:
+            inserted = self.session.execute(self._insert_records(), rows).rowcount
+
+        days_by_user: Dict[int, Set[datetime.date]] = {}
+        for row in rows:
+            days_by_user.setdefault(row["user_id"], set()).add(row["created_at"].date())
+        self.balances.refresh_many(days_by_user)
+
+        return inserted
+
+    def _copy_records(self, rows: List[dict]) -> int:
+        """Вставка через COPY FROM STDIN во временную таблицу PostgreSQL и
+        INSERT ... SELECT с пропуском дубликатов (user_id, external_id)"""
+
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([row[column] for column in COPY_COLUMNS] for row in rows)
+        buffer.seek(0)
+
+        columns = ", ".join(COPY_COLUMNS)
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS records_import ("
+                "created_at timestamp, amount numeric(10, 2), type_operation varchar, "
+                "description varchar, external_id varchar, user_id integer, "
+                "updated_at timestamp, change_seq integer, currency varchar(3), "
+                "category_id integer, category_manual boolean"
+                ") ON COMMIT DELETE ROWS"
+            )
+            cursor.copy_expert(f"COPY records_import ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f"INSERT INTO records ({columns}) SELECT {columns} FROM records_import "
+                "ON CONFLICT DO NOTHING"
+            )
+            inserted = cursor.rowcount
+            cursor.execute("TRUNCATE records_import")
+        finally:
+            cursor.close()
+
+        return inserted
 
     def create_record(self, record_data: RecordCreate, user_id: int) -> RecordModel:
 
         """Создает запись об операции дохода/расхода в БД"""
 
-        record = RecordModel(**record_data.dict(),
-                             user_id=user_id)
+        data = record_data.dict()
+        self.categories.assign([data], user_id)
+        record = RecordModel(**data,
+                             user_id=user_id,
+                             change_seq=self.sync.allocate(user_id))
         self.session.add(record)
-        self.session.commit()
+        self._apply_balance(record)
+        self._commit(record_data.external_id)
 
         return record
 
@@ -136,10 +454,15 @@ class OperationService:
         """Обновление данных о записи"""
 
         record = self._get(record_id, user_id)
-        for field, value in record_data:
+        self._apply_balance(record, sign=-1)
+        data = record_data.dict()
+        self.categories.assign([data], user_id)
+        for field, value in data.items():
             setattr(record, field, value)
+        record.change_seq = self.sync.allocate(user_id)
+        self._apply_balance(record)
 
-        self.session.commit()
+        self._commit(record_data.external_id)
         return record
 
     def delete(self, record_id: int, user_id: int) -> None:
@@ -147,5 +470,111 @@ class OperationService:
         """Удаление записи"""
 
         record = self._get(record_id, user_id)
+        self._apply_balance(record, sign=-1)
+        self.sync.mark_deleted(user_id, [record.id])
         self.session.delete(record)
         self.session.commit()
+
+    def batch(self, operations: List[BatchOperation], user_id: int) -> List[BatchResult]:
+
+        """Выполняет пакет операций создания/обновления/удаления в одной транзакции:
+        обновления - одним executemany, удаления - одним DELETE ... WHERE id IN"""
+
+        if len(operations) > settings.batch_max_operations:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Не более {settings.batch_max_operations} операций в пакете")
+
+        table = RecordModel.__table__
+        creates = [(index, item) for index, item in enumerate(operations) if item.action == BatchAction.create]
+        updates = [(index, item) for index, item in enumerate(operations) if item.action == BatchAction.update]
+        deletes = [(index, item) for index, item in enumerate(operations) if item.action == BatchAction.delete]
+
+        existing = dict(self.session.execute(
+            select(table.c.id, table.c.created_at).where(
+                table.c.user_id == user_id,
+                table.c.id.in_({item.id for _, item in updates + deletes})
+            )
+        ).all())
+        days = {created_at.date() for created_at in existing.values()}
+        results = {}
+
+        found = [(index, item) for index, item in updates if item.id in existing]
+        removed = {item.id for _, item in deletes if item.id in existing}
+        created = [item.data.dict() for _, item in creates]
+        changed = [dict(item.data.dict(), record_id=item.id) for _, item in found]
+        self.categories.assign(created + changed, user_id)
+        try:
+            next_seq = self.sync.allocate(user_id, len(creates) + len(found))
+            records = [RecordModel(**data, user_id=user_id, change_seq=next_seq + offset)
+                       for offset, data in enumerate(created)]
+            next_seq += len(creates)
+            self.session.add_all(records)
+            self.session.flush()
+            for (index, item), record in zip(creates, records):
+                days.add(record.created_at.date())
+                results[index] = BatchResult(index=index, action=item.action, id=record.id, status="created")
+
+            if found:
+                self.session.execute(
+                    update(table).where(table.c.id == bindparam("record_id"), table.c.user_id == user_id),
+                    [dict(data, change_seq=next_seq + offset) for offset, data in enumerate(changed)]
+                )
+                days.update(item.data.created_at.date() for _, item in found)
+
+            if removed:
+                self.sync.mark_deleted(user_id, removed)
+                self.session.execute(delete(table).where(table.c.user_id == user_id, table.c.id.in_(removed)))
+
+            self.balances.refresh_days(user_id, days)
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail="Повтор external_id в пакете операций")
+
+        statuses = {BatchAction.update: "updated", BatchAction.delete: "deleted"}
+        for index, item in updates + deletes:
+            outcome = statuses[item.action] if item.id in existing else "not_found"
+            results[index] = BatchResult(index=index, action=item.action, id=item.id, status=outcome)
+
+        return [results[index] for index in range(len(operations))]
+
+
+class AsyncOperationService(AsyncService):
+    """Асинхронная версия сервиса операций над записями"""
+
+    def _service(self, session: Session) -> OperationService:
+        return OperationService(session)
+
+    async def get_records(self, **kwargs: Any) -> RecordPage:
+        return await self._run(OperationService.get_records, **kwargs)
+
+    async def get(self, record_id: int, user_id: int) -> RecordModel:
+        return await self._run(OperationService.get, record_id, user_id)
+
+    async def get_by_period(self, **kwargs: Any) -> PeriodRecords:
+        return await self._run(OperationService.get_by_period, **kwargs)
+
+    async def get_summary(self, **kwargs: Any) -> BalanceSummary:
+        return await self._run(OperationService.get_summary, **kwargs)
+
+    async def search(self, **kwargs: Any) -> RecordSearch:
+        return await self._run(OperationService.search, **kwargs)
+
+    async def get_changes(self, **kwargs: Any) -> RecordChanges:
+        return await self._run(OperationService.get_changes, **kwargs)
+
+    async def get_by_time(self, **kwargs: Any) -> PeriodRecords:
+        return await self._run(OperationService.get_by_time, **kwargs)
+
+    async def create_record(self, record_data: RecordCreate, user_id: int) -> RecordModel:
+        return await self._run(OperationService.create_record, record_data, user_id)
+
+    async def update(self, record_id: int, record_data: RecordUpdate, user_id: int) -> RecordModel:
+        return await self._run(OperationService.update, record_id, record_data, user_id)
+
+    async def delete(self, record_id: int, user_id: int) -> None:
+        return await self._run(OperationService.delete, record_id, user_id)
+
+    async def batch(self, operations: List[BatchOperation], user_id: int) -> List[BatchResult]:
+        return await self._run(OperationService.batch, operations, user_id)
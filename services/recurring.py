@@ -0,0 +1,262 @@
+import argparse
+import calendar
+import contextlib
+import datetime
+import logging
+from typing import Any, Iterator, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.engine import Engine, Row
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_config import Session as SessionFactory
+from db_config import create_session, engine
+from models import RecurringRuleModel
+from schemas.recurring_schemas import (Frequency, MaterializeResult,
+                                       RecurringRuleCreate)
+from services.base import AsyncService
+from services.operations import OperationService
+
+try:
+    import fcntl
+except ImportError:  # Windows: проходы не разделяются между процессами
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+rules_table = RecurringRuleModel.__table__
+
+# ключ pg_try_advisory_lock прохода планировщика
+SCHEDULER_LOCK_KEY = 4_020_020
+
+
+def _add_months(moment: datetime.datetime, months: int, day: int) -> datetime.datetime:
+    """Сдвиг на months месяцев с днем day, в коротком месяце - последний день"""
+
+    index = moment.month - 1 + months
+    year, month = moment.year + index // 12, index % 12 + 1
+    return moment.replace(year=year, month=month, day=min(day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(rule: Any, moment: datetime.datetime) -> datetime.datetime:
+    """Повторение правила, следующее за moment"""
+
+    if rule.frequency == Frequency.daily.value:
+        return moment + datetime.timedelta(days=rule.interval)
+    if rule.frequency == Frequency.weekly.value:
+        return moment + datetime.timedelta(weeks=rule.interval)
+    if rule.frequency == Frequency.monthly.value:
+        return _add_months(moment, rule.interval, rule.start_at.day)
+
+    return _add_months(moment, 12 * rule.interval, rule.start_at.day)
+
+
+def due_occurrences(rule: Any,
+                    now: datetime.datetime,
+                    limit: int) -> Tuple[List[datetime.datetime], Optional[datetime.datetime]]:
+
+    """Наступившие к now повторения правила (не больше limit) и следующее
+    за ними повторение, None - если правило исчерпано по until"""
+
+    occurrences = []
+    moment = rule.next_run_at
+    while moment <= now and len(occurrences) < limit:
+        if rule.until is not None and moment > rule.until:
+            return occurrences, None
+        occurrences.append(moment)
+        moment = next_occurrence(rule, moment)
+
+    if rule.until is not None and moment > rule.until:
+        return occurrences, None
+    return occurrences, moment
+
+
+def occurrence_external_id(rule_id: int, moment: datetime.datetime) -> str:
+    """external_id записи повторения: повторный проход по тому же периоду
+    не создает дубликат благодаря уникальности (user_id, external_id)"""
+
+    return f"rule:{rule_id}:{moment:%Y%m%dT%H%M%S}"
+
+
+class RecurringService:
+    """Класс правил регулярных операций и их материализации в записи"""
+
+    def __init__(self, session: Session = Depends(create_session)) -> None:
+        """Инициализации сессии для работы с БД"""
+
+        self.session = session
+
+    def _get(self, rule_id: int, user_id: int) -> RecurringRuleModel:
+        """Получение правила пользователя по id"""
+
+        rule = self.session.query(RecurringRuleModel).filter_by(id=rule_id, user_id=user_id).first()
+
+        if not rule:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail=f"Правило с id {rule_id} не найдено")
+        return rule
+
+    def get_rules(self, user_id: int) -> List[RecurringRuleModel]:
+        """Правила пользователя"""
+
+        return self.session.query(RecurringRuleModel).filter_by(user_id=user_id).order_by(RecurringRuleModel.id).all()
+
+    def create_rule(self, rule_data: RecurringRuleCreate, user_id: int) -> RecurringRuleModel:
+        """Создает правило и сразу создает записи уже наступивших повторений"""
+
+        rule = RecurringRuleModel(**rule_data.dict(), user_id=user_id, next_run_at=rule_data.start_at)
+        self.session.add(rule)
+        self.session.commit()
+
+        self.materialize(user_id=user_id)
+        self.session.refresh(rule)
+
+        return rule
+
+    def delete_rule(self, rule_id: int, user_id: int) -> None:
+        """Удаление правила, созданные по нему записи остаются"""
+
+        self.session.delete(self._get(rule_id, user_id))
+        self.session.commit()
+
+    def _materialize_batch(self, rules: List[Row], now: datetime.datetime) -> int:
+        """Записи наступивших повторений пачки правил одной вставкой и
+        сдвиг next_run_at одним executemany в той же транзакции"""
+
+        rows = []
+        updates = []
+        for rule in rules:
+            occurrences, next_run_at = due_occurrences(rule, now, settings.recurring_max_catchup)
+            rows.extend(
+                {
+                    "created_at": moment,
+                    "amount": rule.amount,
+                    "currency": rule.currency,
+                    "type_operation": rule.type_operation,
+                    "description": rule.description,
+                    "external_id": occurrence_external_id(rule.id, moment),
+                    "user_id": rule.user_id,
+                }
+                for moment in occurrences
+            )
+            updates.append({"rule_id": rule.id, "next_value": next_run_at})
+
+        inserted = OperationService(self.session).insert_records(rows) if rows else 0
+        self.session.execute(
+            update(rules_table)
+            .where(rules_table.c.id == bindparam("rule_id"))
+            .values(next_run_at=bindparam("next_value")),
+            updates
+        )
+        self.session.commit()
+
+        return inserted
+
+    def materialize(self,
+                    now: Optional[datetime.datetime] = None,
+                    user_id: Optional[int] = None,
+                    batch_size: Optional[int] = None) -> MaterializeResult:
+
+        """Создает записи всех наступивших повторений пачками по batch_size правил.
+
+        Один проход догоняет пропущенные за время простоя повторения; правило
+        с большим отставанием, чем recurring_max_catchup, дойдет в следующих проходах"""
+
+        now = now or datetime.datetime.now()
+        batch_size = batch_size or settings.recurring_batch_size
+        query = (select(rules_table)
+                 .where(rules_table.c.next_run_at <= now)
+                 .order_by(rules_table.c.id)
+                 .limit(batch_size))
+        if user_id is not None:
+            query = query.where(rules_table.c.user_id == user_id)
+
+        result = MaterializeResult(rules=0, records=0)
+        last_id = 0
+        while True:
+            rules = self.session.execute(query.where(rules_table.c.id > last_id)).all()
+            if not rules:
+                return result
+
+            last_id = rules[-1].id
+            result.records += self._materialize_batch(rules, now)
+            result.rules += len(rules)
+
+
+@contextlib.contextmanager
+def scheduler_lock(bind: Engine = engine) -> Iterator[bool]:
+    """Блокировка прохода планировщика между воркерами и серверами:
+    advisory lock PostgreSQL или файл <БД>.scheduler.lock для SQLite.
+    True - блокировка взята, False - проход уже выполняет другой процесс"""
+
+    if bind.dialect.name == "postgresql":
+        with bind.connect() as connection:
+            locked = connection.scalar(select(func.pg_try_advisory_lock(SCHEDULER_LOCK_KEY)))
+            try:
+                yield locked
+            finally:
+                if locked:
+                    connection.scalar(select(func.pg_advisory_unlock(SCHEDULER_LOCK_KEY)))
+        return
+
+    database = bind.url.database
+    if bind.dialect.name != "sqlite" or fcntl is None or not database or database == ":memory:":
+        yield True
+        return
+
+    with open(f"{database}.scheduler.lock", "a") as file:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def run_scheduler_pass() -> Optional[MaterializeResult]:
+    """Проход планировщика в отдельной сессии. Планировщик запущен в каждом
+    воркере, но проход в один момент выполняет только один из них:
+    None - проход пропущен, его выполняет другой процесс"""
+
+    with scheduler_lock() as locked:
+        if not locked:
+            return None
+
+        with SessionFactory() as session:
+            result = RecurringService(session).materialize()
+
+    if result.records:
+        logger.info("Регулярные операции: %s правил, создано %s записей", result.rules, result.records)
+    return result
+
+
+class AsyncRecurringService(AsyncService):
+    """Асинхронная версия сервиса регулярных операций"""
+
+    def _service(self, session: Session) -> RecurringService:
+        return RecurringService(session)
+
+    async def get_rules(self, user_id: int) -> List[RecurringRuleModel]:
+        return await self._run(RecurringService.get_rules, user_id)
+
+    async def create_rule(self, rule_data: RecurringRuleCreate, user_id: int) -> RecurringRuleModel:
+        return await self._run(RecurringService.create_rule, rule_data, user_id)
+
+    async def delete_rule(self, rule_id: int, user_id: int) -> None:
+        return await self._run(RecurringService.delete_rule, rule_id, user_id)
+
+    async def materialize(self, **kwargs: Any) -> MaterializeResult:
+        return await self._run(RecurringService.materialize, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Создание записей наступивших регулярных операций")
+    parser.parse_args()
+
+    print(run_scheduler_pass())
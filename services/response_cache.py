@@ -0,0 +1,183 @@
+import datetime
+import hashlib
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from typing import (Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple,
+                    Union)
+
+from fastapi import Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import UserModel
+from services.serialization import dumps
+
+users = UserModel.__table__
+# версия читается на каждом запросе к кешу: запрос строится один раз
+user_version = select(users.c.change_seq, users.c.cache_version).where(users.c.id == bindparam("user_id"))
+
+
+class CacheBackend:
+    """Хранилище кеша ответов.
+
+    Свой бэкенд (например, общий для нескольких процессов) наследует этот
+    класс и указывается в RESPONSE_CACHE_BACKEND как путь module:Class"""
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """(ETag, тело ответа) или None"""
+
+        raise NotImplementedError
+
+    def set(self, key: str, value: Tuple[str, bytes], ttl: int) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """LRU/TTL-кеш ответов в памяти процесса"""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        # ключ -> (ETag, тело ответа, время истечения записи)
+        self._entries: "OrderedDict[str, Tuple[str, bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key: str, value: Tuple[str, bytes], ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (*value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class ResponseCache:
+    """Кеш ответов читающих эндпоинтов по пользователю, пути и параметрам запроса.
+
+    В ключ входит версия данных пользователя из строки users: номер
+    последнего изменения записей change_seq и cache_version для остальных
+    изменений (bump). Версия читается из БД в сессии запроса, поэтому
+    изменение в одном воркере сбрасывает ответы во всех, а старые ответы
+    вытесняются по LRU/TTL. ETag - хеш тела ответа, так что If-None-Match
+    дает 304 и после вытеснения записи из кеша"""
+
+    def __init__(self, backend: CacheBackend, ttl: int, enabled: bool = True) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def bump(session: Session, user_ids: Optional[Iterable[int]] = None) -> None:
+        """Сбрасывает закешированные ответы пользователей (по умолчанию всех)
+        при изменениях не в записях: версия меняется в транзакции session.
+        Изменения записей меняют версию сами через users.change_seq"""
+
+        statement = update(users).values(cache_version=users.c.cache_version + 1)
+        if user_ids is not None:
+            statement = statement.where(users.c.id.in_(list(user_ids)))
+        session.execute(statement)
+
+    @staticmethod
+    async def _version(session: Union[AsyncSession, Session], user_id: int) -> str:
+        """Текущая версия данных пользователя. Читается в сессии запроса,
+        которая при промахе кеша строит ответ: отдельное соединение не нужно"""
+
+        if isinstance(session, AsyncSession):
+            row = (await session.execute(user_version, {"user_id": user_id})).first()
+        else:
+            row = await run_in_threadpool(lambda: session.execute(user_version, {"user_id": user_id}).first())
+
+        return f"{row.change_seq}.{row.cache_version}" if row else "0.0"
+
+    def _key(self, request: Request, user_id: int, version: str) -> str:
+        """Ключ ответа; текущая дата входит в ключ, так как выборки
+        за день/неделю/месяц считаются от сегодняшнего дня"""
+
+        params = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+        return f"{user_id}:{version}:{datetime.date.today()}:{request.url.path}?{params}"
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    @staticmethod
+    def _not_modified(request: Request, etag: str) -> bool:
+        """Есть ли etag в If-None-Match: теги через запятую с пробелами
+        или без, слабые W/ сравниваются как сильные, * - любая версия"""
+
+        for tag in request.headers.get("if-none-match", "").split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == etag:
+                return True
+
+        return False
+
+    def _response(self, request: Request, etag: str, body: bytes) -> Response:
+        """Ответ с телом или 304, если у клиента актуальная версия"""
+
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if self._not_modified(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def respond(self,
+                      request: Request,
+                      user_id: int,
+                      session: Union[AsyncSession, Session],
+                      produce: Callable[[], Awaitable[Any]]) -> Response:
+
+        """Ответ из кеша или результат produce(), сохраненный в кеш.
+        session - сессия запроса, в которой produce() читает данные"""
+
+        version = await self._version(session, user_id) if self.enabled else ""
+        key = self._key(request, user_id, version)
+
+        cached = self.backend.get(key) if self.enabled else None
+        if cached is not None:
+            self.hits += 1
+            return self._response(request, *cached)
+
+        self.misses += 1
+        body = dumps(await produce())
+        etag = self._etag(body)
+        if self.enabled:
+            self.backend.set(key, (etag, body), self.ttl)
+
+        return self._response(request, etag, body)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def create_backend() -> CacheBackend:
+    """Бэкенд из настроек: путь module:Class или LRU в памяти процесса"""
+
+    if settings.response_cache_backend:
+        module, name = settings.response_cache_backend.split(":")
+        return getattr(importlib.import_module(module), name)()
+
+    return MemoryBackend(maxsize=settings.response_cache_size)
+
+
+response_cache = ResponseCache(
+    backend=create_backend(),
+    ttl=settings.response_cache_ttl,
+    enabled=settings.response_cache_enabled
+)
@@ -0,0 +1,111 @@
+import re
+from typing import List
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, column, func, literal_column, select, table
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
+
+from config import settings
+from models import RecordModel
+
+# полнотекстовый индекс SQLite: внешнее содержимое из records, синхронизация триггерами,
+# поэтому индекс обновляют все пути записи, включая executemany импорта CSV
+SQLITE_SEARCH_DDL = (
+    "DROP TABLE IF EXISTS records_fts",
+    "CREATE VIRTUAL TABLE records_fts USING fts5("
+    "description, content='records', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS records_fts_insert AFTER INSERT ON records BEGIN "
+    "INSERT INTO records_fts (rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS records_fts_delete AFTER DELETE ON records BEGIN "
+    "INSERT INTO records_fts (records_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS records_fts_update AFTER UPDATE OF description ON records BEGIN "
+    "INSERT INTO records_fts (records_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO records_fts (rowid, description) VALUES (new.id, new.description); END",
+    "INSERT INTO records_fts (records_fts) VALUES ('rebuild')",
+)
+
+# триграммный индекс PostgreSQL ускоряет ILIKE '%...%' без отдельной синхронизации
+POSTGRESQL_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_records_description_trgm ON records USING gin (description gin_trgm_ops)",
+)
+
+SEARCH_DDL = {
+    "sqlite": SQLITE_SEARCH_DDL,
+    "postgresql": POSTGRESQL_SEARCH_DDL,
+}
+
+records_fts = table("records_fts", column("rowid"))
+
+
+def create_search_index(connection: Connection) -> None:
+    """Создает (или пересоздает и заполняет) индекс поиска по описаниям записей"""
+
+    for statement in SEARCH_DDL.get(connection.dialect.name, ()):
+        connection.exec_driver_sql(statement)
+
+
+def search_terms(text: str) -> List[str]:
+    """Слова поискового запроса без операторов и знаков препинания"""
+
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Пустой поисковый запрос")
+    return terms
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def description_like(terms: List[str]) -> ColumnElement:
+    """Все слова как подстроки описания: на PostgreSQL идет по триграммному
+    индексу, на других БД - полный просмотр записей пользователя"""
+
+    return and_(*(RecordModel.description.ilike(f"%{_escape_like(term)}%", escape="\\") for term in terms))
+
+
+def _fts_matches(terms: List[str]) -> Select:
+    """rowid записей из FTS5, описание которых содержит слова с префиксами terms"""
+
+    query = " ".join(f'"{term}"*' for term in terms)
+    return select(records_fts.c.rowid).where(literal_column("records_fts").op("MATCH")(query))
+
+
+def description_match(session: Session, text: str) -> ColumnElement:
+    """Условие поиска записей, описание которых содержит все слова text.
+
+    На SQLite слова ищутся по FTS5 как префиксы слов описания ("коф" найдет "кофе"),
+    на PostgreSQL и других БД - как подстроки"""
+
+    terms = search_terms(text)
+    if session.get_bind().dialect.name != "sqlite":
+        return description_like(terms)
+
+    return RecordModel.id.in_(_fts_matches(terms))
+
+
+def search_condition(session: Session, text: str, user_id: int) -> ColumnElement:
+    """Условие поиска по описанию среди записей пользователя.
+
+    SQLite по умолчанию идет по индексу (user_id, created_at) и проверяет каждую
+    запись пользователя по списку совпадений FTS5 - это быстро для частых слов
+    (первая страница набирается сразу), но для редких просматривает всю историю.
+    Если совпадений во всем индексе не больше search_fts_driving_limit (это
+    проверяет дешевый запрос с LIMIT), индекс по user_id отключается выражением
+    user_id + 0, и запрос идет от совпадений FTS5 по первичному ключу"""
+
+    condition = description_match(session, text)
+    if session.get_bind().dialect.name != "sqlite":
+        return and_(RecordModel.user_id == user_id, condition)
+
+    matches = _fts_matches(search_terms(text)).limit(settings.search_fts_driving_limit + 1).subquery()
+    found = session.execute(select(func.count()).select_from(matches)).scalar()
+    if found <= settings.search_fts_driving_limit:
+        return and_(RecordModel.user_id + 0 == user_id, condition)
+
+    return and_(RecordModel.user_id == user_id, condition)
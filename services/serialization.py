@@ -0,0 +1,31 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    """Типы, которые orjson не сериализует сам"""
+
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        # поверхностно: вложенные списки и словари orjson обходит сам
+        return dict(value)
+
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON через orjson: Decimal как число, datetime в ISO 8601, модели pydantic как объекты"""
+
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON-ответ без jsonable_encoder для больших выборок записей"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,196 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, List, Optional
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import case, func, literal_column, null, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
+
+from db_config import create_session
+from models import CategoryModel, DailyBalanceModel, RecordModel
+from schemas.record_schemas import OperationType
+from schemas.stats_schemas import Granularity, StatsBucket, StatsGroup
+from services.base import AsyncService
+from services.currency import check_rates, to_cents, with_rates
+
+balances = DailyBalanceModel.__table__
+categories = CategoryModel.__table__
+records = RecordModel.__table__
+
+# начало периода в SQLite: неделя начинается с понедельника, как date_trunc в PostgreSQL
+SQLITE_BUCKETS = {
+    Granularity.day: lambda column: func.date(column),
+    Granularity.week: lambda column: func.date(column, "weekday 0", "-6 days"),
+    Granularity.month: lambda column: func.strftime("%Y-%m-01", column),
+    Granularity.year: lambda column: func.strftime("%Y-01-01", column),
+}
+
+
+class StatsService:
+    """Класс аналитики доходов и расходов по периодам"""
+
+    def __init__(self, session: Session = Depends(create_session)) -> None:
+        """Инициализации сессии для работы с БД"""
+
+        self.session = session
+
+    def _bucket(self, column: ColumnElement, granularity: Granularity) -> ColumnElement:
+        """Начало периода, в который попадает значение column"""
+
+        if self.session.get_bind().dialect.name == "postgresql":
+            # единица подставляется в текст запроса, чтобы выражения в SELECT и GROUP BY совпадали
+            return func.date(func.date_trunc(literal_column(f"'{granularity.value}'"), column))
+
+        return SQLITE_BUCKETS[granularity](column)
+
+    def _record_buckets(self,
+                        user_id: int,
+                        granularity: Granularity,
+                        start: Optional[datetime.date],
+                        end: Optional[datetime.date],
+                        type_operation: Optional[OperationType],
+                        group_by: Optional[StatsGroup]) -> Select:
+
+        """Агрегаты по записям: GROUP BY по дням и валютам, затем пересчет
+        в базовую валюту и GROUP BY по периодам. Группа category - имя
+        категории, записи без категории попадают в группу null"""
+
+        period = self._bucket(RecordModel.created_at, granularity)
+        if group_by == StatsGroup.category:
+            group = categories.c.name
+        else:
+            group = getattr(RecordModel, group_by.value) if group_by else null()
+        day = func.date(RecordModel.created_at)
+        query = (
+            select(
+                period.label("period"),
+                group.label("group"),
+                RecordModel.currency,
+                day.label("day"),
+                func.sum(case((RecordModel.type_operation == OperationType.income.value, RecordModel.amount),
+                              else_=0)).label("income"),
+                func.sum(case((RecordModel.type_operation == OperationType.outcome.value, RecordModel.amount),
+                              else_=0)).label("expenses"),
+                func.count().label("count"),
+            )
+            .where(RecordModel.user_id == user_id)
+        )
+        # PostgreSQL не принимает константу NULL в GROUP BY: группа - только если она задана
+        if group_by:
+            query = query.group_by(period, group, RecordModel.currency, day)
+        else:
+            query = query.group_by(period, RecordModel.currency, day)
+        if group_by == StatsGroup.category:
+            query = query.select_from(records.outerjoin(categories, categories.c.id == records.c.category_id))
+
+        if start:
+            query = query.where(RecordModel.created_at >= datetime.datetime.combine(start, datetime.time()))
+        if end:
+            query = query.where(RecordModel.created_at < datetime.datetime.combine(end, datetime.time()))
+        if type_operation:
+            query = query.where(RecordModel.type_operation == type_operation)
+
+        return self._converted(query, by_group=group_by is not None)
+
+    def _balance_buckets(self,
+                         user_id: int,
+                         granularity: Granularity,
+                         start: Optional[datetime.date],
+                         end: Optional[datetime.date]) -> Select:
+
+        """Агрегаты по дневным итогам daily_balances - O(дней) вместо O(записей)"""
+
+        query = (
+            select(
+                self._bucket(balances.c.date, granularity).label("period"),
+                null().label("group"),
+                balances.c.currency,
+                balances.c.date.label("day"),
+                balances.c.income_sum.label("income"),
+                balances.c.expense_sum.label("expenses"),
+                balances.c["count"],
+            )
+            .where(balances.c.user_id == user_id, balances.c["count"] > 0)
+        )
+
+        if start:
+            query = query.where(balances.c.date >= start)
+        if end:
+            query = query.where(balances.c.date < end)
+
+        return self._converted(query)
+
+    @staticmethod
+    def _converted(query: Select, by_group: bool = False) -> Select:
+        """Суммы по дням и валютам из query, умноженные на курс дня
+        и сложенные по периодам (и группам)"""
+
+        days = with_rates(query)
+        keys = (days.c.group, days.c.period) if by_group else (days.c.period,)
+        # столбец вне GROUP BY PostgreSQL не примет, без группировки группа - NULL
+        group = days.c.group if by_group else null().label("group")
+
+        return (
+            select(
+                days.c.period,
+                group,
+                func.sum(days.c.income * days.c.rate),
+                func.sum(days.c.expenses * days.c.rate),
+                func.sum(days.c["count"]),
+                func.count() - func.count(days.c.rate),
+            )
+            .group_by(*keys)
+            .order_by(*keys)
+        )
+
+    def get_stats(self,
+                  user_id: int,
+                  granularity: Granularity = Granularity.month,
+                  start: Optional[datetime.date] = None,
+                  end: Optional[datetime.date] = None,
+                  type_operation: Optional[OperationType] = None,
+                  group_by: Optional[StatsGroup] = None) -> List[StatsBucket]:
+
+        """Доходы, расходы, сальдо, количество и нарастающий итог по периодам
+        в базовой валюте. Без фильтра по типу и группировки считается по дневным итогам"""
+
+        if start and end and start >= end:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Начало периода должно быть раньше конца")
+
+        if type_operation is None and group_by is None:
+            query = self._balance_buckets(user_id, granularity, start, end)
+        else:
+            query = self._record_buckets(user_id, granularity, start, end, type_operation, group_by)
+
+        rows = self.session.execute(query).all()
+        check_rates(sum(missing for *_, missing in rows))
+
+        running_balance = defaultdict(Decimal)
+        buckets = []
+        for period, group, income, expenses, count, _ in rows:
+            income, expenses = to_cents(income), to_cents(expenses)
+            running_balance[group] += income - expenses
+            buckets.append(StatsBucket(
+                period=period,
+                group=group,
+                income=income,
+                expenses=expenses,
+                net=income - expenses,
+                count=count,
+                running_balance=running_balance[group]
+            ))
+
+        return buckets
+
+
+class AsyncStatsService(AsyncService):
+    """Асинхронная версия сервиса аналитики"""
+
+    def _service(self, session: Session) -> StatsService:
+        return StatsService(session)
+
+    async def get_stats(self, **kwargs: Any) -> List[StatsBucket]:
+        return await self._run(StatsService.get_stats, **kwargs)
@@ -0,0 +1,110 @@
+import datetime
+from typing import Dict, Iterable
+
+from fastapi import Depends
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from db_config import create_session
+from models import RecordModel, RecordTombstoneModel, UserModel
+from schemas.record_schemas import ChangeKind, RecordChanges
+
+records = RecordModel.__table__
+tombstones = RecordTombstoneModel.__table__
+users = UserModel.__table__
+
+CHANGE_FIELDS = ("id", "created_at", "amount", "type_operation", "description", "external_id",
+                 "currency", "category_id", "updated_at", "change_seq")
+
+
+class SyncService:
+    """Класс последовательности изменений записей пользователя для синхронизации клиентов"""
+
+    def __init__(self, session: Session = Depends(create_session)) -> None:
+        """Инициализации сессии для работы с БД"""
+
+        self.session = session
+
+    def allocate_many(self, counts: Dict[int, int]) -> Dict[int, int]:
+        """Выделяет пользователям по counts[user_id] номеров изменений,
+        возвращает первый выделенный номер каждого пользователя.
+
+        Счетчик в строке users остается заблокированным до конца транзакции,
+        поэтому номера пользователя фиксируются строго по возрастанию и клиент,
+        прочитавший номер N, не пропустит позже зафиксированное изменение с
+        меньшим номером"""
+
+        counts = {user_id: count for user_id, count in sorted(counts.items()) if count}
+        if not counts:
+            return {}
+
+        self.session.execute(
+            update(users)
+            .where(users.c.id == bindparam("user_id"))
+            .values(change_seq=users.c.change_seq + bindparam("count")),
+            [{"user_id": user_id, "count": count} for user_id, count in counts.items()]
+        )
+        last = self.session.execute(
+            select(users.c.id, users.c.change_seq).where(users.c.id.in_(list(counts)))
+        ).all()
+
+        return {user_id: change_seq - counts[user_id] + 1 for user_id, change_seq in last}
+
+    def allocate(self, user_id: int, count: int = 1) -> int:
+        """Первый из count номеров изменений пользователя. При count=0
+        счетчик не меняется и возвращается номер, который будет выделен следующим"""
+
+        if not count:
+            return self.session.execute(select(users.c.change_seq).where(users.c.id == user_id)).scalar_one() + 1
+
+        return self.allocate_many({user_id: count})[user_id]
+
+    def mark_deleted(self, user_id: int, record_ids: Iterable[int]) -> None:
+        """Отметки об удалении записей с новыми номерами изменений"""
+
+        record_ids = sorted(record_ids)
+        if not record_ids:
+            return
+
+        first = self.allocate(user_id, len(record_ids))
+        now = datetime.datetime.now()
+        self.session.execute(insert(tombstones), [
+            {"user_id": user_id, "record_id": record_id, "change_seq": first + offset, "deleted_at": now}
+            for offset, record_id in enumerate(record_ids)
+        ])
+
+    def changes(self, user_id: int, since: int, limit: int) -> RecordChanges:
+        """Не больше limit изменений с номером больше since одним списком
+        по возрастанию номера, в котором их и нужно применять.
+
+        Запись, измененная несколько раз, приходит один раз в последнем состоянии;
+        оба запроса идут по индексам (user_id, change_seq), поэтому их стоимость
+        зависит от числа изменений, а не от размера истории"""
+
+        changed = self.session.execute(
+            select(*(records.c[field] for field in CHANGE_FIELDS))
+            .where(records.c.user_id == user_id, records.c.change_seq > since)
+            .order_by(records.c.change_seq)
+            .limit(limit + 1)
+        ).all()
+        deleted = self.session.execute(
+            select(tombstones.c.record_id, tombstones.c.change_seq)
+            .where(tombstones.c.user_id == user_id, tombstones.c.change_seq > since)
+            .order_by(tombstones.c.change_seq)
+            .limit(limit + 1)
+        ).all()
+
+        events = sorted(
+            [{"kind": ChangeKind.upsert.value, "id": row.id, "change_seq": row.change_seq,
+              "record": dict(zip(CHANGE_FIELDS, row))} for row in changed]
+            + [{"kind": ChangeKind.delete.value, "id": row.record_id, "change_seq": row.change_seq, "record": None}
+               for row in deleted],
+            key=lambda event: event["change_seq"]
+        )
+        page = events[:limit]
+
+        return RecordChanges.construct(
+            changes=page,
+            seq=page[-1]["change_seq"] if page else since,
+            has_more=len(events) > limit
+        )
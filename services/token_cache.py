@@ -0,0 +1,127 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from config import settings
+from schemas.auth_schemas import User
+from services.metrics import metrics
+
+
+def token_key(token: str) -> str:
+    """Ключ кеша - хеш токена, сам токен в памяти не хранится"""
+
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """LRU/TTL-кеш проверенных JWT-токенов.
+
+    Запись живет не дольше ttl и не дольше exp токена. Кеш экономит только
+    проверку подписи: отзыв токена проверяется по RevocationList"""
+
+    def __init__(self, maxsize: int, ttl: int, enabled: bool = True) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        # ключ токена -> (пользователь, время истечения записи)
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        """Пользователь из кеша или None"""
+
+        if not self.enabled:
+            return None
+
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, user: User, expires_at: float) -> None:
+        """Кеширует пользователя проверенного токена"""
+
+        if not self.enabled:
+            return
+
+        key = token_key(token)
+        with self._lock:
+            self._entries[key] = (user, min(time.time() + self.ttl, expires_at))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def revoke(self, token: str) -> None:
+        """Удаляет запись отозванного токена"""
+
+        with self._lock:
+            self._entries.pop(token_key(token), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class RevocationList:
+    """Ключи отозванных токенов (revoked_tokens) в памяти воркера.
+
+    Список перечитывается из БД не чаще раза в ttl секунд, остальные запросы
+    с токеном к БД не обращаются. Выход в этом воркере действует сразу,
+    в остальных - не позже чем через ttl"""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.loads = 0
+        self._keys: Set[str] = set()
+        self._loaded_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _stale(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self.ttl
+
+    def is_revoked(self, token: str, load: Callable[[], Iterable[str]]) -> bool:
+        """Отозван ли токен; load() читает ключи из БД, если список устарел"""
+
+        if self._stale():
+            with self._lock:
+                # пока ждали блокировку, список мог перечитать другой поток
+                if self._stale():
+                    loaded_at = time.monotonic()
+                    self._keys = set(load())
+                    self._loaded_at = loaded_at
+                    self.loads += 1
+
+        return token_key(token) in self._keys
+
+    def add(self, token: str) -> None:
+        """Токен, отозванный в этом воркере. Под блокировкой, чтобы
+        перечитывание, начатое до отзыва, не затерло ключ старым списком"""
+
+        with self._lock:
+            self._keys.add(token_key(token))
+
+
+token_cache = TokenCache(
+    maxsize=settings.token_cache_size,
+    ttl=settings.token_cache_ttl,
+    enabled=settings.token_cache_enabled
+)
+
+revocations = RevocationList(ttl=settings.token_revocation_ttl)
+
+metrics.gauge("token_cache_size", "Проверенные токены в кеше", lambda: token_cache.stats()["size"])
+metrics.counter_function("token_cache_hits_total", "Токены, найденные в кеше", lambda: token_cache.stats()["hits"])
+metrics.counter_function("token_cache_misses_total", "Токены, проверенные без кеша",
+                         lambda: token_cache.stats()["misses"])
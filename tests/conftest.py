@@ -0,0 +1,47 @@
+import itertools
+import os
+import tempfile
+from typing import Callable, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+# настройки читаются при импорте config: тестовая БД и секрет задаются до импорта приложения
+DATABASE_DIR = tempfile.mkdtemp(prefix="tests-")
+os.environ.setdefault("JWT_SECRET", "tests")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATABASE_DIR, 'database.db')}"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["RECURRING_SCHEDULER_ENABLED"] = "false"
+
+_users = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    """Клиент приложения на схеме последней миграции"""
+
+    import main
+    from db_config import engine
+    from migrations import migrate
+
+    migrate(engine)
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def register(client: TestClient) -> Callable[[], Dict[str, str]]:
+    """Регистрирует нового пользователя и возвращает заголовок с его токеном"""
+
+    def register_user() -> Dict[str, str]:
+        name = f"user{next(_users)}"
+        response = client.post("/auth/register", json={"email": f"{name}@example.com", "username": name,
+                                                       "password": "password"})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return register_user
+
+
+@pytest.fixture
+def headers(register: Callable[[], Dict[str, str]]) -> Dict[str, str]:
+    return register()
@@ -0,0 +1,20 @@
+import asyncio
+
+from services.auth import get_current_user
+
+
+def test_current_user_dependency_runs_in_threadpool():
+    # async-зависимость выполнялась бы в цикле событий вместе с jwt.decode
+    assert not asyncio.iscoroutinefunction(get_current_user)
+
+
+def test_logout_revokes_token(client, headers):
+    assert client.get("/auth/user", headers=headers).status_code == 200
+
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert client.get("/auth/user", headers=headers).status_code == 401
+
+
+def test_invalid_token(client):
+    response = client.get("/auth/user", headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
@@ -0,0 +1,24 @@
+from sqlalchemy import update
+
+from db_config import Session
+from models import DailyBalanceModel
+from services.balances import BalanceService
+
+balances = DailyBalanceModel.__table__
+
+
+def test_rebuild_resets_cached_totals(client, headers):
+    url = "/operation/get_record_by_month"
+    user_id = client.get("/auth/user", headers=headers).json()["id"]
+    client.post("/operation/", headers=headers, json={"amount": "12", "type_operation": "income"})
+
+    # расхождение итогов, которое исправляет пересчет
+    with Session() as session:
+        session.execute(update(balances).where(balances.c.user_id == user_id).values(income_sum=1000))
+        session.commit()
+    assert client.get(url, headers=headers).json()["total"] == 1000
+
+    with Session() as session:
+        assert BalanceService(session).rebuild(user_id) == 1
+
+    assert client.get(url, headers=headers).json()["total"] == 12
@@ -0,0 +1,104 @@
+import datetime
+
+from db_config import Session
+from models import RevokedTokenModel
+from services.currency import CurrencyService
+from services.metrics import metrics
+from services.response_cache import response_cache
+from services.token_cache import revocations, token_cache, token_key
+
+
+def user_id(client, headers):
+    return client.get("/auth/user", headers=headers).json()["id"]
+
+
+def test_response_cache_version_is_shared(client, headers):
+    url = "/operation/get_record_by_day"
+    first = client.get(url, headers=headers)
+    hits = response_cache.hits
+    assert client.get(url, headers=headers).headers["etag"] == first.headers["etag"]
+    assert response_cache.hits == hits + 1
+
+    # запись, добавленная другим воркером, меняет users.change_seq
+    client.post("/operation/", headers=headers, json={"amount": "3", "type_operation": "income"})
+    second = client.get(url, headers=headers)
+    assert second.headers["etag"] != first.headers["etag"]
+
+    # сброс без изменения записей (курсы, пересчет итогов) - через users.cache_version
+    with Session() as session:
+        response_cache.bump(session, [user_id(client, headers)])
+        session.commit()
+    misses = response_cache.misses
+    assert client.get(url, headers=headers).headers["etag"] == second.headers["etag"]
+    assert response_cache.misses == misses + 1
+
+
+def test_revocation_is_shared(client, headers, monkeypatch):
+    user = user_id(client, headers)
+    token = headers["Authorization"].split()[1]
+    assert token_cache.get(token) is not None
+
+    # выход через другой воркер: локальный кеш токенов об отзыве не знает
+    with Session() as session:
+        session.add(RevokedTokenModel(token_hash=token_key(token), user_id=user,
+                                      expires_at=datetime.datetime.utcnow() + datetime.timedelta(hours=1)))
+        session.commit()
+
+    # список отзыва в памяти воркера устаревает через token_revocation_ttl
+    monkeypatch.setattr(revocations, "ttl", 0)
+    assert client.get("/auth/user", headers=headers).status_code == 401
+
+
+def test_revocation_list_is_not_read_per_request(client, headers):
+    client.get("/auth/user", headers=headers)
+    loads = revocations.loads
+    for _ in range(5):
+        assert client.get("/auth/user", headers=headers).status_code == 200
+    assert revocations.loads == loads
+
+    # выход в этом воркере действует сразу, без перечитывания списка
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert client.get("/auth/user", headers=headers).status_code == 401
+    assert revocations.loads == loads
+
+
+def test_token_cache_metrics(client, headers):
+    client.get("/auth/user", headers=headers)
+    hits = token_cache.stats()["hits"]
+    assert f"token_cache_hits_total {hits}" in metrics.render()
+
+    client.get("/auth/user", headers=headers)
+    samples = client.get("/metrics").text.splitlines()
+    assert f"token_cache_hits_total {hits + 1}" in samples
+    assert "# TYPE token_cache_hits_total counter" in samples
+    assert any(line.startswith("token_cache_misses_total ") for line in samples)
+    assert any(line.startswith("token_cache_size ") for line in samples)
+
+
+def test_loading_rates_resets_cached_totals(client, headers):
+    url = "/operation/get_record_by_day"
+    today = datetime.date.today().isoformat()
+    with Session() as session:
+        CurrencyService(session).load_rates(["date,currency,rate", f"{today},USD,90"])
+
+    client.post("/operation/", headers=headers, json={"amount": "2", "type_operation": "income", "currency": "USD"})
+    client.post("/operation/", headers=headers, json={"amount": "5", "type_operation": "income"})
+    assert client.get(url, headers=headers).json()["total"] == 185
+
+    # курс на тот же день заменяется: закешированный итог устарел
+    with Session() as session:
+        CurrencyService(session).load_rates(["date,currency,rate", f"{today},USD,100"])
+
+    assert client.get(url, headers=headers).json()["total"] == 205
+
+
+def test_if_none_match_with_several_tags(client, headers):
+    url = "/operation/get_record_by_week"
+    etag = client.get(url, headers=headers).headers["etag"]
+
+    for value in (f'"a",{etag}', f'"a", W/{etag}', f' {etag} ,"b"', "*"):
+        response = client.get(url, headers={**headers, "If-None-Match": value})
+        assert response.status_code == 304, value
+        assert response.headers["etag"] == etag
+
+    assert client.get(url, headers={**headers, "If-None-Match": '"a","b"'}).status_code == 200
@@ -0,0 +1,43 @@
+import pytest
+from pydantic import ValidationError
+
+from schemas.category_schemas import REGEX_MAX_LENGTH, CategoryRuleCreate
+
+
+def regex_rule(pattern):
+    return CategoryRuleCreate(category_id=1, kind="regex", pattern=pattern)
+
+
+@pytest.mark.parametrize("pattern", [
+    r"^(?:uber|yandex)\s+taxi",
+    r"[a-z]+\d{2,4}",
+    "(a|b)*c",
+    "кафе|ресторан",
+])
+def test_regex_rule_accepts_linear_patterns(pattern):
+    assert regex_rule(pattern).pattern == pattern
+
+
+@pytest.mark.parametrize("pattern", [
+    "(a+)+$",
+    r"(\d+\s?)+$",
+    "(?:ab|cd)*x",
+    r"(\w+)\1",
+    "a" * (REGEX_MAX_LENGTH + 1),
+    "([",
+])
+def test_regex_rule_rejects_backtracking_patterns(pattern):
+    with pytest.raises(ValidationError):
+        regex_rule(pattern)
+
+
+def test_create_rule_with_nested_quantifiers_is_rejected(client, headers):
+    category = client.post("/categories/", headers=headers, json={"name": "такси"}).json()
+    response = client.post("/categories/rules", headers=headers,
+                           json={"category_id": category["id"], "kind": "regex", "pattern": "(taxi\\s*)+$"})
+    assert response.status_code == 422
+    assert "Вложенные квантификаторы" in response.text
+
+    response = client.post("/categories/rules", headers=headers,
+                           json={"category_id": category["id"], "kind": "regex", "pattern": "taxi\\s*\\d+"})
+    assert response.status_code == 200, response.text
@@ -0,0 +1,94 @@
+import gzip
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+import services.export
+from config import settings
+
+ROWS = [
+    ("2026-03-01T09:00:00", "10.50", "income", "зарплата, аванс"),
+    ("2026-03-02T09:00:00", "3.25", "expenses", None),
+    ("2026-03-05T09:00:00", "7", "expenses", 'кафе "у дома"'),
+]
+
+
+@pytest.fixture
+def records(client, headers):
+    for created_at, amount, type_operation, description in ROWS:
+        response = client.post("/operation/", headers=headers, json={
+            "created_at": created_at, "amount": amount, "type_operation": type_operation,
+            "description": description,
+        })
+        assert response.status_code == 200, response.text
+
+
+def export(client, headers, **params):
+    response = client.get("/file/load", headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def raw_export(client, headers, **params):
+    """Тело ответа без распаковки Content-Encoding"""
+
+    with client.stream("GET", "/file/load", headers=headers, params=params) as response:
+        assert response.status_code == 200
+        return response.headers, b"".join(response.iter_raw())
+
+
+def test_ndjson_export(client, headers, records):
+    response = export(client, headers, format="ndjson")
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["amount"], line["description"]) for line in lines] == [
+        (10.5, "зарплата, аванс"), (3.25, None), (7, 'кафе "у дома"'),
+    ]
+
+    ranged = export(client, headers, format="ndjson", start="2026-03-02T00:00:00", end="2026-03-05T00:00:00")
+    assert [json.loads(line)["amount"] for line in ranged.text.splitlines()] == [3.25]
+
+
+def test_ndjson_export_with_gzip(client, headers, records):
+    response_headers, body = raw_export(client, headers, format="ndjson", gzip="true")
+    assert response_headers["content-encoding"] == "gzip"
+    assert len(gzip.decompress(body).splitlines()) == len(ROWS)
+
+
+@pytest.mark.parametrize("export_format", ["arrow", "parquet"])
+def test_columnar_export(client, headers, records, monkeypatch, export_format):
+    pa = pytest.importorskip("pyarrow")
+    # несколько групп строк в одном файле
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+    monkeypatch.setattr(settings, "export_row_group_size", 2)
+
+    # gzip к колоночным форматам не применяется: они сжаты zstd
+    response_headers, body = raw_export(client, headers, format=export_format, gzip="true")
+    assert "content-encoding" not in response_headers
+
+    if export_format == "arrow":
+        table = pa.ipc.open_file(pa.BufferReader(body)).read_all()
+    else:
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(io.BytesIO(body))
+        assert parquet.metadata.num_row_groups == 2
+        table = parquet.read()
+
+    assert table.column("amount").to_pylist() == [Decimal("10.50"), Decimal("3.25"), Decimal("7.00")]
+    assert table.column("description").to_pylist() == [row[3] for row in ROWS]
+    assert str(table.schema.field("created_at").type) == "timestamp[us]"
+
+
+@pytest.mark.parametrize("export_format", ["arrow", "parquet"])
+def test_columnar_export_without_pyarrow(client, headers, monkeypatch, export_format):
+    monkeypatch.setattr(services.export, "pa", None)
+    monkeypatch.setattr(services.export, "pq", None)
+
+    response = client.get("/file/load", headers=headers, params={"format": export_format})
+    assert response.status_code == 400
+    assert "pyarrow" in response.json()["detail"]
+    # текстовые форматы от pyarrow не зависят
+    assert client.get("/file/load", headers=headers, params={"format": "ndjson"}).status_code == 200
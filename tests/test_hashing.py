@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from passlib.hash import bcrypt
+
+from db_config import Session
+from models import UserModel
+from services.hashing import PasswordHasher, password_hasher
+
+
+def login(client, username):
+    return client.post("/auth/login", data={"username": username, "password": "password"})
+
+
+def last_username():
+    with Session() as session:
+        return session.query(UserModel).order_by(UserModel.id.desc()).first().username
+
+
+def stored_hash(username):
+    with Session() as session:
+        return session.query(UserModel).filter_by(username=username).one().hash_password
+
+
+def test_pool_uses_spawn():
+    hasher = PasswordHasher(workers=1, queue_size=0, rounds=4)
+    try:
+        assert hasher.executor._mp_context.get_start_method() == "spawn"
+    finally:
+        hasher.shutdown()
+
+
+def test_saturated_pool_rejects_with_retry_after():
+    hasher = PasswordHasher(workers=1, queue_size=0, rounds=4)
+    try:
+        # единственное место занято долгой задачей
+        busy = hasher._submit(time.sleep, 1)
+        with pytest.raises(HTTPException) as error:
+            hasher.hash("password")
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == "1"
+
+        busy.result()
+        assert bcrypt.verify("password", hasher.hash("password"))
+        assert hasher.in_flight == 0
+    finally:
+        hasher.shutdown()
+
+
+def test_login_returns_503_when_queue_is_full(client, register, monkeypatch):
+    register()
+    monkeypatch.setattr(password_hasher, "_slots", threading.BoundedSemaphore(1))
+    password_hasher._slots.acquire()
+
+    response = login(client, last_username())
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_login_rehashes_with_new_rounds(client, register, monkeypatch):
+    register()
+    username = last_username()
+    assert bcrypt.from_string(stored_hash(username)).rounds == 4
+
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    assert login(client, username).status_code == 200
+    assert bcrypt.from_string(stored_hash(username)).rounds == 5
+
+    # новый хеш проверяется, повторный вход его не меняет
+    rehashed = stored_hash(username)
+    assert login(client, username).status_code == 200
+    assert stored_hash(username) == rehashed
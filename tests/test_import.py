@@ -0,0 +1,57 @@
+import time
+
+CSV = "created_at,amount,type_operation,description,external_id\n" + "".join(
+    f"2026-01-0{day % 3 + 1}T10:00:00,{day + 1}.50,{'income' if day % 2 else 'expenses'},d{day},{external_id}\n"
+    for day, external_id in enumerate(["a1", "", "a2", " ", ""])
+)
+
+
+def import_csv(client, headers, data):
+    response = client.post("/file/dump", headers=headers, files={"file": ("records.csv", data, "text/csv")})
+    assert response.status_code == 202, response.text
+
+    for _ in range(100):
+        job = client.get(f"/file/jobs/{response.json()['id']}", headers=headers).json()
+        if job["state"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("Импорт не завершился")
+
+
+def export_csv(client, headers):
+    response = client.get("/file/load", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.content
+
+
+def test_import_counts_duplicates(client, headers):
+    job = import_csv(client, headers, CSV.encode())
+    assert (job["state"], job["rows_accepted"], job["rows_rejected"], job["rows_duplicate"]) == ("done", 5, 0, 0)
+
+    job = import_csv(client, headers, CSV.encode())
+    # без external_id строки не считаются повтором
+    assert (job["rows_processed"], job["rows_accepted"], job["rows_rejected"], job["rows_duplicate"]) == (5, 3, 0, 2)
+
+
+def test_export_roundtrip_keeps_records_without_external_id(client, headers):
+    import_csv(client, headers, CSV.encode())
+    exported = export_csv(client, headers)
+
+    job = import_csv(client, headers, exported)
+    assert (job["rows_accepted"], job["rows_duplicate"]) == (3, 2)
+    assert len(export_csv(client, headers).splitlines()) == 1 + 5 + 3
+
+
+def test_blank_external_id_is_not_unique(client, headers):
+    for external_id in ("", "  ", None):
+        response = client.post("/operation/", headers=headers,
+                               json={"amount": "1", "type_operation": "income", "external_id": external_id})
+        assert response.status_code == 200, response.text
+        assert response.json()["external_id"] is None
+
+    response = client.post("/operation/", headers=headers,
+                           json={"amount": "1", "type_operation": "income", "external_id": "x"})
+    assert response.status_code == 200
+    response = client.post("/operation/", headers=headers,
+                           json={"amount": "1", "type_operation": "income", "external_id": "x"})
+    assert response.status_code == 409
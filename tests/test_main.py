@@ -0,0 +1,31 @@
+import os
+
+import main
+from config import settings
+from services.recurring import run_scheduler_pass, scheduler_lock
+
+
+def test_run_migrates_once_before_workers(monkeypatch):
+    migrations = []
+    monkeypatch.setattr(main, "migrate", migrations.append)
+    monkeypatch.setattr(main.uvicorn, "run", lambda *args, **kwargs: None)
+    monkeypatch.setattr(settings, "migrate_on_startup", True)
+    monkeypatch.setenv("MIGRATE_ON_STARTUP", "true")
+
+    main.run()
+
+    # один воркер работает в этом же процессе: startup читает уже загруженные настройки
+    assert migrations == [main.engine]
+    assert settings.migrate_on_startup is False
+    assert os.environ["MIGRATE_ON_STARTUP"] == "false"
+
+
+def test_scheduler_pass_runs_in_one_process_at_a_time(client):
+    with scheduler_lock() as locked:
+        assert locked
+        # второй воркер в это время пропускает проход
+        with scheduler_lock() as other:
+            assert not other
+        assert run_scheduler_pass() is None
+
+    assert run_scheduler_pass() is not None
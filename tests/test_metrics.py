@@ -0,0 +1,34 @@
+import threading
+
+from services import import_jobs
+
+
+def test_import_queue_size_counts_waiting_jobs(client, headers, monkeypatch):
+    started, release = threading.Semaphore(0), threading.Event()
+
+    def run_import_job(job_id, user_id, path):
+        started.release()
+        release.wait()
+
+    monkeypatch.setattr(import_jobs, "run_import_job", run_import_job)
+    workers = import_jobs.settings.import_workers
+    user_id = client.get("/auth/user", headers=headers).json()["id"]
+
+    with import_jobs.SessionFactory() as session:
+        service = import_jobs.ImportJobService(session)
+        for _ in range(workers + 2):
+            service.submit(user_id, "records.csv", "unused.csv")
+
+    for _ in range(workers):
+        started.acquire()
+    assert import_jobs._queued() == 2
+
+    with import_jobs._import_futures_lock:
+        futures = list(import_jobs._import_futures)
+    assert sum(future.cancel() for future in futures) == 2
+    assert import_jobs._queued() == 0
+
+    release.set()
+    for future in futures:
+        future.cancelled() or future.result()
+    assert import_jobs._queued() == 0
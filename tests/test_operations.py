@@ -0,0 +1,80 @@
+import datetime
+from decimal import Decimal
+
+from db_config import Session
+from schemas.record_schemas import RecordCreate
+from services.operations import OperationService, encode_cursor
+
+
+def create(client, headers, **fields):
+    response = client.post("/operation/", headers=headers, json={"amount": "1", "type_operation": "income", **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_get_record_hides_internal_fields(client, headers):
+    record = create(client, headers, description="кофе", external_id="get-1")
+
+    response = client.get(f"/operation/{record['id']}", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == record
+    assert not {"user_id", "change_seq", "category_manual", "updated_at"} & response.json().keys()
+
+
+def test_sync_session_keeps_objects_loaded_after_commit(client, headers):
+    user_id = client.get("/auth/user", headers=headers).json()["id"]
+    with Session() as session:
+        record = OperationService(session).create_record(
+            RecordCreate(amount=Decimal("12.5"), type_operation="income", description="после commit"), user_id
+        )
+        assert "amount" in record.__dict__
+
+    # сессия закрыта: истекшие после commit атрибуты дали бы DetachedInstanceError
+    assert (record.amount, record.description, record.user_id) == (Decimal("12.5"), "после commit", user_id)
+    assert record.id and record.change_seq
+
+
+def page(client, headers, **params):
+    response = client.get("/operation/", headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_keyset_pages_at_boundaries(client, headers):
+    assert page(client, headers) == {"items": [], "next_cursor": None, "prev_cursor": None}
+
+    # две записи с одинаковым created_at упорядочиваются по id
+    ids = [create(client, headers, created_at=f"2026-01-0{day}T10:00:00")["id"] for day in (1, 2, 2, 3, 4)]
+
+    first = page(client, headers, limit=2, fields="id")
+    assert [item["id"] for item in first["items"]] == ids[:2]
+    assert first["prev_cursor"] is None and first["next_cursor"]
+
+    second = page(client, headers, limit=2, fields="id", after=first["next_cursor"])
+    assert [item["id"] for item in second["items"]] == ids[2:4]
+    assert second["prev_cursor"] and second["next_cursor"]
+
+    last = page(client, headers, limit=2, fields="id", after=second["next_cursor"])
+    assert [item["id"] for item in last["items"]] == ids[4:]
+    assert last["next_cursor"] is None and last["prev_cursor"]
+
+    back = page(client, headers, limit=2, fields="id", before=last["prev_cursor"])
+    assert back == second
+
+    # за последней записью и перед первой - пустые страницы без курсоров
+    after_last = encode_cursor((datetime.datetime(2026, 1, 4, 10), ids[4]))
+    assert page(client, headers, after=after_last) == {"items": [], "next_cursor": None, "prev_cursor": None}
+    before_first = encode_cursor((datetime.datetime(2026, 1, 1, 10), ids[0]))
+    assert page(client, headers, before=before_first) == {"items": [], "next_cursor": None, "prev_cursor": None}
+
+    # первая страница назад: перед ней записей нет
+    start = page(client, headers, limit=2, fields="id", before=second["prev_cursor"])
+    assert [item["id"] for item in start["items"]] == ids[:2]
+    assert start["prev_cursor"] is None and start["next_cursor"]
+
+
+def test_keyset_rejects_both_cursors_and_unknown_fields(client, headers):
+    cursor = encode_cursor((datetime.datetime(2026, 1, 1), 1))
+    response = client.get("/operation/", headers=headers, params={"after": cursor, "before": cursor})
+    assert response.status_code == 400
+    assert client.get("/operation/", headers=headers, params={"fields": "amount,user_id"}).status_code == 400
@@ -0,0 +1,115 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select, update
+
+from db_config import Session
+from models import RecordModel, RecurringRuleModel
+from services.recurring import (RecurringService, due_occurrences,
+                                occurrence_external_id, run_scheduler_pass)
+
+
+def rule(frequency, start_at, interval=1, until=None, next_run_at=None):
+    return SimpleNamespace(frequency=frequency, interval=interval, start_at=start_at, until=until,
+                           next_run_at=next_run_at or start_at)
+
+
+@pytest.mark.parametrize("frequency, start_at, expected", [
+    # 31 число: в коротких месяцах последний день, затем снова 31
+    ("monthly", datetime.datetime(2024, 1, 31, 9), [
+        datetime.datetime(2024, 1, 31, 9), datetime.datetime(2024, 2, 29, 9),
+        datetime.datetime(2024, 3, 31, 9), datetime.datetime(2024, 4, 30, 9),
+    ]),
+    ("monthly", datetime.datetime(2023, 1, 31, 9), [
+        datetime.datetime(2023, 1, 31, 9), datetime.datetime(2023, 2, 28, 9),
+        datetime.datetime(2023, 3, 31, 9), datetime.datetime(2023, 4, 30, 9),
+    ]),
+    # 29 февраля: в невисокосные годы 28 февраля, в високосный снова 29
+    ("yearly", datetime.datetime(2024, 2, 29), [
+        datetime.datetime(2024, 2, 29), datetime.datetime(2025, 2, 28),
+        datetime.datetime(2026, 2, 28), datetime.datetime(2027, 2, 28),
+    ]),
+])
+def test_occurrences_keep_day_of_month(frequency, start_at, expected):
+    occurrences, next_run_at = due_occurrences(rule(frequency, start_at), expected[-1], limit=100)
+    assert occurrences == expected
+    assert next_run_at > expected[-1]
+
+
+def test_yearly_leap_day_returns_in_leap_year():
+    occurrences, next_run_at = due_occurrences(rule("yearly", datetime.datetime(2024, 2, 29)),
+                                               datetime.datetime(2027, 12, 31), limit=100)
+    assert len(occurrences) == 4
+    assert next_run_at == datetime.datetime(2028, 2, 29)
+
+
+def test_catchup_is_limited_and_stops_at_until():
+    start = datetime.datetime(2026, 1, 1)
+    weekly = rule("weekly", start, interval=2)
+
+    occurrences, next_run_at = due_occurrences(weekly, datetime.datetime(2026, 3, 1), limit=3)
+    assert occurrences == [start + datetime.timedelta(weeks=weeks) for weeks in (0, 2, 4)]
+    assert next_run_at == start + datetime.timedelta(weeks=6)
+
+    weekly.until = datetime.datetime(2026, 1, 20)
+    occurrences, next_run_at = due_occurrences(weekly, datetime.datetime(2026, 3, 1), limit=10)
+    assert occurrences == [start, start + datetime.timedelta(weeks=2)]
+    assert next_run_at is None
+
+
+def create_rule(client, headers, start_at, frequency="weekly"):
+    response = client.post("/recurring/", headers=headers, json={
+        "amount": "100", "type_operation": "expenses", "description": "аренда",
+        "frequency": frequency, "start_at": start_at.isoformat(),
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def rule_records(rule_id):
+    """(количество записей правила, количество разных external_id)"""
+
+    with Session() as session:
+        return session.execute(
+            select(func.count(), func.count(RecordModel.external_id.distinct()))
+            .where(RecordModel.external_id.like(f"rule:{rule_id}:%"))
+        ).one()
+
+
+def test_create_rule_catches_up_missed_periods(client, headers):
+    now = datetime.datetime.now().replace(microsecond=0)
+    created = create_rule(client, headers, now - datetime.timedelta(weeks=5, hours=1))
+
+    assert rule_records(created["id"]) == (6, 6)
+    assert datetime.datetime.fromisoformat(created["next_run_at"]) > now
+
+
+def test_materialization_is_idempotent(client, headers):
+    start = datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(days=3, hours=1)
+    created = create_rule(client, headers, start, frequency="daily")
+    assert rule_records(created["id"]) == (4, 4)
+
+    # после create_rule планировщик и ручной запуск ничего не добавляют
+    run_scheduler_pass()
+    assert client.post("/recurring/materialize", headers=headers).json()["records"] == 0
+    assert rule_records(created["id"]) == (4, 4)
+
+    # сбой после вставки записей, но до сдвига next_run_at: тот же проход повторяется
+    with Session() as session:
+        session.execute(update(RecurringRuleModel).where(RecurringRuleModel.id == created["id"])
+                        .values(next_run_at=start))
+        session.commit()
+
+        result = RecurringService(session).materialize()
+        assert result.records == 0 and result.rules >= 1
+        result = RecurringService(session).materialize()
+        assert result.records == 0
+
+    assert rule_records(created["id"]) == (4, 4)
+    with Session() as session:
+        external_ids = session.scalars(
+            select(RecordModel.external_id).where(RecordModel.external_id.like(f"rule:{created['id']}:%"))
+        ).all()
+    assert sorted(external_ids) == [occurrence_external_id(created["id"], start + datetime.timedelta(days=day))
+                                    for day in range(4)]
@@ -0,0 +1,73 @@
+import pytest
+
+from config import settings
+from db_config import Session
+from services.search import search_condition
+
+
+def create(client, headers, description, day, type_operation="expenses"):
+    response = client.post("/operation/", headers=headers, json={
+        "amount": "1", "type_operation": type_operation, "description": description,
+        "created_at": f"2026-02-{day:02}T12:00:00",
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def search(client, headers, **params):
+    response = client.get("/operation/search", headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture
+def records(client, headers, register):
+    # чужие записи с теми же словами не должны попадать в выдачу
+    create(client, register(), "Кофе с собой", 1)
+    return [
+        create(client, headers, "Кофе в кофейне", 1),
+        create(client, headers, "Чай", 2),
+        create(client, headers, "кофемашина, ремонт", 3),
+        create(client, headers, "зарплата за кофе", 4, type_operation="income"),
+    ]
+
+
+# 0 - совпадений больше порога, запрос идет по индексу user_id;
+# иначе индекс отключается выражением user_id + 0 и запрос идет от совпадений FTS5
+@pytest.mark.parametrize("driving_limit", [0, 5000])
+def test_search_finds_word_prefixes(client, headers, records, monkeypatch, driving_limit):
+    monkeypatch.setattr(settings, "search_fts_driving_limit", driving_limit)
+    coffee, _, machine, salary = records
+
+    assert [item["id"] for item in search(client, headers, q="коф")["items"]] == [salary, machine, coffee]
+    assert [item["id"] for item in search(client, headers, q="кофе ремонт")["items"]] == [machine]
+    assert [item["id"] for item in search(client, headers, q="коф", type_operation="expenses")["items"]] == [
+        machine, coffee,
+    ]
+    found = search(client, headers, q="коф", start="2026-02-02T00:00:00", end="2026-02-04T00:00:00")
+    assert [item["id"] for item in found["items"]] == [machine]
+    assert search(client, headers, q="какао") == {"items": [], "next_cursor": None}
+
+
+def test_search_pages_from_newest(client, headers, records):
+    coffee, _, machine, salary = records
+
+    first = search(client, headers, q="коф", limit=2)
+    assert [item["id"] for item in first["items"]] == [salary, machine]
+    rest = search(client, headers, q="коф", limit=2, before=first["next_cursor"])
+    assert [item["id"] for item in rest["items"]] == [coffee]
+    assert rest["next_cursor"] is None
+
+
+def test_search_rejects_query_without_words(client, headers):
+    assert client.get("/operation/search", headers=headers, params={"q": "%*\""}).status_code == 400
+    assert client.get("/operation/search", headers=headers, params={"q": ""}).status_code == 422
+
+
+@pytest.mark.parametrize("driving_limit, expression", [(0, "records.user_id = "), (5000, "records.user_id + ")])
+def test_search_condition_disables_user_index_for_rare_words(records, monkeypatch, driving_limit, expression):
+    monkeypatch.setattr(settings, "search_fts_driving_limit", driving_limit)
+    with Session() as session:
+        condition = search_condition(session, "кофе", user_id=1)
+
+    assert expression in str(condition)
@@ -0,0 +1,46 @@
+import re
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from schemas.record_schemas import OperationType
+from schemas.stats_schemas import Granularity, StatsGroup
+from services.stats import StatsService
+
+GROUP_BY = re.compile(r"GROUP BY (.+?)(?:\) AS | ORDER BY |$)", re.DOTALL)
+
+
+@pytest.fixture
+def pg_stats():
+    """Сервис с движком PostgreSQL без соединения: запросы только компилируются"""
+
+    with Session(create_engine("postgresql+psycopg2://")) as session:
+        yield StatsService(session)
+
+
+def compile_pg(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.parametrize("group_by", [None, *StatsGroup])
+def test_record_buckets_group_by_on_postgresql(pg_stats, group_by):
+    sql = compile_pg(pg_stats._record_buckets(1, Granularity.month, None, None, OperationType.income, group_by))
+    inner, outer = GROUP_BY.findall(sql)
+
+    # PostgreSQL отвергает константу в GROUP BY и столбцы вне GROUP BY
+    assert "NULL" not in inner
+    if group_by:
+        assert outer == 'anon_1."group", anon_1.period'
+        assert sql.startswith('SELECT anon_1.period, anon_1."group",')
+    else:
+        assert outer == "anon_1.period"
+        assert sql.startswith('SELECT anon_1.period, NULL AS "group",')
+
+
+def test_balance_buckets_group_by_on_postgresql(pg_stats):
+    sql = compile_pg(pg_stats._balance_buckets(1, Granularity.week, None, None))
+
+    assert GROUP_BY.findall(sql) == ["anon_1.period"]
+    assert sql.startswith('SELECT anon_1.period, NULL AS "group",')
@@ -0,0 +1,68 @@
+def create(client, headers, amount="10"):
+    response = client.post("/operation/", headers=headers, json={"amount": amount, "type_operation": "income"})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def changes(client, headers, since=0):
+    response = client.get(f"/operation/changes?since={since}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_batch_numbers_changes(client, headers):
+    first = create(client, headers)
+    seq = changes(client, headers)["seq"]
+
+    response = client.post("/operation/batch", headers=headers, json=[
+        {"action": "create", "data": {"amount": "5", "type_operation": "income"}},
+        {"action": "update", "id": first, "data": {"amount": "7", "type_operation": "expenses"}},
+    ])
+    assert response.status_code == 200, response.text
+
+    page = changes(client, headers, since=seq)
+    assert [(change["kind"], change["change_seq"]) for change in page["changes"]] == [
+        ("upsert", seq + 1), ("upsert", seq + 2),
+    ]
+    assert page["changes"][1]["record"]["amount"] == 7
+    assert page["seq"] == seq + 2
+
+
+def test_batch_delete_only(client, headers):
+    record_ids = [create(client, headers) for _ in range(2)]
+    seq = changes(client, headers)["seq"]
+
+    response = client.post("/operation/batch", headers=headers, json=[
+        {"action": "delete", "id": record_ids[0]},
+        {"action": "delete", "id": 10 ** 9},
+    ])
+    assert response.status_code == 200, response.text
+    assert [result["status"] for result in response.json()] == ["deleted", "not_found"]
+
+    page = changes(client, headers, since=seq)
+    assert page["changes"] == [{"kind": "delete", "id": record_ids[0], "change_seq": seq + 1, "record": None}]
+    assert page["seq"] == seq + 1
+
+
+def test_batch_without_changes(client, headers):
+    seq = changes(client, headers)["seq"]
+
+    for operations in ([], [{"action": "update", "id": 10 ** 9, "data": {"amount": "1", "type_operation": "income"}}]):
+        response = client.post("/operation/batch", headers=headers, json=operations)
+        assert response.status_code == 200, response.text
+
+    assert changes(client, headers)["seq"] == seq
+
+
+def test_changes_keep_replay_order_when_id_is_reused(client, headers):
+    seq = changes(client, headers)["seq"]
+    deleted = create(client, headers, amount="1")
+    assert client.delete(f"/operation/{deleted}/delete", headers=headers).status_code == 200
+    # SQLite без AUTOINCREMENT отдает новой записи id удаленной последней
+    created = create(client, headers, amount="2")
+
+    page = changes(client, headers, since=seq)
+    assert [(change["kind"], change["id"]) for change in page["changes"]] == [
+        ("delete", deleted), ("upsert", created),
+    ]
+    assert page["changes"][1]["record"]["amount"] == 2